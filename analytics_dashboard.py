@@ -12,17 +12,35 @@ from pathlib import Path
 
 from arbitrage_detector import ArbitrageDetector
 from config import MIN_PROFIT_THRESHOLD
+from historical_data import HistoricalDataFetcher, SPREAD_STREAM, select_resolution
+from live_stream import LiveStream, live_components
+
+# Seconds between re-renders of the active tab
+REFRESH_SECONDS = 5.0
 
 
 class AnalyticsDashboard:
     """Advanced analytics dashboard for strategy analysis."""
 
-    def __init__(self, detector: ArbitrageDetector):
+    def __init__(self, detector: ArbitrageDetector, push: bool = True):
+        """
+        Args:
+            detector: ArbitrageDetector to analyze
+            push: Re-render the active tab when the server signals new bars or
+                opportunities (at most every REFRESH_SECONDS), rather than
+                polling on a fixed interval while nothing changes
+        """
         self.detector = detector
+        self.push = push
+        self.history = HistoricalDataFetcher()
         self.app = dash.Dash(__name__, title="Arbitrage Analytics Suite")
         self.setup_layout()
         self.setup_callbacks()
 
+        if self.push:
+            self.live = LiveStream(detector, refresh_period=REFRESH_SECONDS, channels=('refresh',))
+            self.live.serve(self.app)
+
     def setup_layout(self):
         """Create the dashboard layout."""
         self.app.layout = html.Div([
@@ -45,8 +63,10 @@ class AnalyticsDashboard:
             # Tab Content
             html.Div(id='tab-content'),
 
-            # Auto-refresh
-            dcc.Interval(id='analytics-interval', interval=5000, n_intervals=0),
+            # Live refresh signal, or the auto-refresh interval
+            html.Div(live_components(self.app) if self.push else [
+                dcc.Interval(id='analytics-interval', interval=int(REFRESH_SECONDS * 1000), n_intervals=0)
+            ]),
         ], style={'fontFamily': 'Arial, sans-serif', 'padding': '20px', 'backgroundColor': '#f8f9fa'})
 
     def setup_callbacks(self):
@@ -55,7 +75,7 @@ class AnalyticsDashboard:
         @self.app.callback(
             Output('tab-content', 'children'),
             [Input('analytics-tabs', 'value'),
-             Input('analytics-interval', 'n_intervals')]
+             Input('live-refresh', 'data') if self.push else Input('analytics-interval', 'n_intervals')]
         )
         def render_tab_content(active_tab, n):
             if active_tab == 'strategy-params':
@@ -176,6 +196,14 @@ class AnalyticsDashboard:
                 dcc.Graph(id='performance-timeline',
                          figure=self.create_performance_timeline()),
             ], style={'backgroundColor': 'white', 'padding': '20px', 'marginBottom': '20px', 'borderRadius': '8px'}),
+
+            # Long-horizon spreads from the historical rollups
+            html.Div([
+                html.H2("🗓️ 30-Day Spread History",
+                       style={'color': '#2c3e50'}),
+                dcc.Graph(id='long-horizon-spreads',
+                         figure=self.create_long_horizon_spreads()),
+            ], style={'backgroundColor': 'white', 'padding': '20px', 'marginBottom': '20px', 'borderRadius': '8px'}),
         ])
 
     # Chart Creation Methods
@@ -575,6 +603,39 @@ class AnalyticsDashboard:
 
         return fig
 
+    def create_long_horizon_spreads(self, days: int = 30):
+        """Create long-horizon spread chart from the coarsest sufficient rollup."""
+        end = datetime.now(timezone.utc)
+        start = end - timedelta(days=days)
+        resolution = select_resolution(start, end, max_points=1000)
+
+        fig = go.Figure()
+        for symbol in ['BTC-USD', 'ETH-USD', 'SOL-USD']:
+            df = self.history.query(symbol, SPREAD_STREAM, start, end, resolution)
+            if df.empty:
+                continue
+            for col in [c for c in df.columns if c.startswith('spread_') and c.endswith('_mean')]:
+                pair = col[len('spread_'):-len('_mean')].replace('_', '→')
+                fig.add_trace(go.Scatter(
+                    x=df['timestamp'],
+                    y=df[col],
+                    mode='lines',
+                    name=f"{symbol} {pair}",
+                ))
+
+        if not fig.data:
+            return self.create_empty_chart("No historical data - run train_historical.py first...")
+
+        fig.update_layout(
+            title=f"Mean Spread per {resolution} Bucket (Last {days} Days)",
+            xaxis_title="Time",
+            yaxis_title="Spread %",
+            hovermode='x unified',
+            height=400
+        )
+
+        return fig
+
     def create_parameter_recommendations(self):
         """Create parameter recommendations card."""
         stats = self.detector.get_statistics()
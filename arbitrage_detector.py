@@ -1,48 +1,152 @@
 """Arbitrage opportunity detection and analysis."""
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta, timezone
 from collections import deque
+from itertools import islice
 import pandas as pd
 from loguru import logger
 
+from background_training import ModelHandle
+from bar_aggregator import Bar, BarAggregator
+from feature_engine import IncrementalFeatureEngine
 from config import (
     PriceData, ArbitrageOpportunity, EXCHANGE_CONFIGS,
     MIN_PROFIT_THRESHOLD, MAX_SPREAD_AGE_SECONDS, DATA_BUFFER_SIZE
 )
 
 
+class InlineScorer:
+    """
+    Fills confidence_score on each tick's opportunities without holding up detection.
+
+    Each micro-batch is scored inline, on the detection path, as long as the
+    serving model stays within budget_us per batch (the compiled classifier
+    takes ~150µs). A model that overruns the budget on max_overruns
+    consecutive batches is scored on a background thread instead; a batch
+    arriving while the previous one is still being scored there keeps its
+    0.0 score rather than queueing. Swapping in a new model re-evaluates it
+    inline.
+    """
+
+    def __init__(self, handle: ModelHandle, budget_us: float = 300, max_overruns: int = 3):
+        """
+        Args:
+            handle: ModelHandle serving the OpportunityScorer
+            budget_us: Inline scoring budget per micro-batch in microseconds
+            max_overruns: Consecutive over-budget batches before scoring off the detection path
+        """
+        self.handle = handle
+        self.budget = budget_us / 1e6
+        self.max_overruns = max_overruns
+        self.latencies = deque(maxlen=1000)  # Seconds per inline batch
+        self.stats = {'inline': 0, 'deferred': 0, 'unscored': 0, 'over_budget': 0}
+        self._overruns = 0
+        self._deferred_version = None  # Handle version being scored off the detection path
+        self._pending = None
+        self._executor = None
+
+    def score(self, batch: List[ArbitrageOpportunity]):
+        """Set confidence_score on batch, inline or in the background."""
+        version = self.handle.version
+        scorer = self.handle.get()
+        if scorer is None or not scorer.is_trained:
+            return
+
+        if version == self._deferred_version:
+            self._score_deferred(scorer, batch)
+        else:
+            self._score_inline(scorer, batch, version)
+
+    def _score_inline(self, scorer, batch: List[ArbitrageOpportunity], version: int):
+        started = time.perf_counter()
+        for opportunity, confidence in zip(batch, scorer.score_batch(batch)):
+            opportunity.confidence_score = float(confidence)
+        elapsed = time.perf_counter() - started
+
+        self.latencies.append(elapsed)
+        self.stats['inline'] += len(batch)
+        if elapsed <= self.budget:
+            self._overruns = 0
+            return
+
+        self.stats['over_budget'] += 1
+        self._overruns += 1
+        if self._overruns >= self.max_overruns:
+            self._overruns = 0
+            self._deferred_version = version
+            logger.warning(
+                f"Opportunity scoring took {elapsed * 1e6:.0f}µs per batch "
+                f"(budget {self.budget * 1e6:.0f}µs), scoring model v{version} in the background"
+            )
+
+    def _score_deferred(self, scorer, batch: List[ArbitrageOpportunity]):
+        if self._pending is not None and not self._pending.done():
+            self.stats['unscored'] += len(batch)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="opportunity-scorer")
+        self._pending = self._executor.submit(self._fill, scorer, batch)
+        self.stats['deferred'] += len(batch)
+
+    @staticmethod
+    def _fill(scorer, batch: List[ArbitrageOpportunity]):
+        for opportunity, confidence in zip(batch, scorer.score_batch(batch)):
+            opportunity.confidence_score = float(confidence)
+
+
 class ArbitrageDetector:
     """Detects arbitrage opportunities across exchanges."""
 
-    def __init__(self):
-        self.price_buffer: Dict[str, deque] = {}  # {symbol: deque of (exchange, PriceData)}
+    def __init__(self, scorer=None):
+        """
+        Args:
+            scorer: Optional trained OpportunityScorer (or a ModelHandle serving
+                one); new opportunities from each tick are scored together in one batch
+        """
+        self.scorer = scorer if isinstance(scorer, ModelHandle) else ModelHandle(scorer)
+        self.scoring = InlineScorer(self.scorer)
+        self.bars = BarAggregator()
+        self.bar_buffer: Dict[str, deque] = {}  # {symbol: deque of Bar.to_dict() rows}
         self.opportunities: List[ArbitrageOpportunity] = []
         self.latest_prices: Dict[tuple, PriceData] = {}  # {(exchange, symbol): PriceData}
+        self.features = IncrementalFeatureEngine()  # Live ML features over bar_buffer
 
         # Statistics
         self.total_opportunities_found = 0
         self.opportunities_by_pair = {}
 
-    def update_price(self, price_data: PriceData):
-        """Update latest price and check for arbitrage."""
+    def update_price(self, price_data: PriceData) -> List[Bar]:
+        """
+        Update latest price and check for arbitrage.
+
+        Returns:
+            Bars the tick closed (see BarAggregator); the ML features only
+            change when this is non-empty
+        """
         key = (price_data.exchange, price_data.symbol)
         self.latest_prices[key] = price_data
 
-        # Add to buffer for ML training
-        if price_data.symbol not in self.price_buffer:
-            self.price_buffer[price_data.symbol] = deque(maxlen=DATA_BUFFER_SIZE)
-
-        self.price_buffer[price_data.symbol].append({
-            'exchange': price_data.exchange,
-            'price': price_data.price,
-            'timestamp': price_data.timestamp,
-            'bid': price_data.bid,
-            'ask': price_data.ask,
-            'volume': price_data.volume
-        })
+        # Aggregate into bars for ML training, spread metrics and charts
+        closed = self.bars.update(price_data)
+        for bar in closed:
+            self._add_bar(bar)
 
         # Check for arbitrage opportunities
         self._check_arbitrage(price_data.symbol)
+        return closed
+
+    def _add_bar(self, bar: Bar):
+        if bar.symbol not in self.bar_buffer:
+            self.bar_buffer[bar.symbol] = deque(maxlen=DATA_BUFFER_SIZE)
+
+        buffer = self.bar_buffer[bar.symbol]
+        if len(buffer) == buffer.maxlen:
+            self.features.evict(bar.symbol, buffer[0]['exchange'])
+
+        buffer.append(bar.to_dict())
+        self.features.update(bar)
 
     def _check_arbitrage(self, symbol: str):
         """Check for arbitrage opportunities for a given symbol."""
@@ -68,11 +172,17 @@ class ArbitrageDetector:
             return
 
         # Find all profitable pairs
+        found = []
         for i, (exchange1, data1) in enumerate(fresh_prices):
             for exchange2, data2 in fresh_prices[i + 1:]:
                 # Check both directions
-                self._analyze_pair(exchange1, data1, exchange2, data2)
-                self._analyze_pair(exchange2, data2, exchange1, data1)
+                for opportunity in (self._analyze_pair(exchange1, data1, exchange2, data2),
+                                    self._analyze_pair(exchange2, data2, exchange1, data1)):
+                    if opportunity is not None:
+                        found.append(opportunity)
+
+        if found:
+            self._record_opportunities(found)
 
     def _analyze_pair(
         self,
@@ -80,7 +190,7 @@ class ArbitrageDetector:
         buy_data: PriceData,
         sell_exchange: str,
         sell_data: PriceData
-    ):
+    ) -> Optional[ArbitrageOpportunity]:
         """Analyze a specific buy/sell pair for arbitrage."""
         # Use ask price for buying, bid price for selling (if available)
         buy_price = buy_data.ask if buy_data.ask > 0 else buy_data.price
@@ -88,7 +198,7 @@ class ArbitrageDetector:
 
         # Calculate spread
         if buy_price <= 0 or sell_price <= 0:
-            return
+            return None
 
         spread_pct = ((sell_price - buy_price) / buy_price) * 100
 
@@ -101,30 +211,38 @@ class ArbitrageDetector:
         profit_after_fees = spread_pct - total_fee_pct
 
         # Check if profitable
-        if profit_after_fees >= MIN_PROFIT_THRESHOLD:
-            opportunity = ArbitrageOpportunity(
-                buy_exchange=buy_exchange,
-                sell_exchange=sell_exchange,
-                symbol=buy_data.symbol,
-                buy_price=buy_price,
-                sell_price=sell_price,
-                spread_pct=spread_pct,
-                profit_after_fees=profit_after_fees,
-                timestamp=datetime.now(timezone.utc)
-            )
+        if profit_after_fees < MIN_PROFIT_THRESHOLD:
+            return None
 
+        return ArbitrageOpportunity(
+            buy_exchange=buy_exchange,
+            sell_exchange=sell_exchange,
+            symbol=buy_data.symbol,
+            buy_price=buy_price,
+            sell_price=sell_price,
+            spread_pct=spread_pct,
+            profit_after_fees=profit_after_fees,
+            timestamp=datetime.now(timezone.utc)
+        )
+
+    def _record_opportunities(self, found: List[ArbitrageOpportunity]):
+        """Score one tick's new opportunities in a single batch and record them."""
+        self.scoring.score(found)
+
+        for opportunity in found:
             self.opportunities.append(opportunity)
             self.total_opportunities_found += 1
 
             # Track by pair
-            pair_key = f"{buy_exchange}->{sell_exchange}:{buy_data.symbol}"
+            pair_key = f"{opportunity.buy_exchange}->{opportunity.sell_exchange}:{opportunity.symbol}"
             self.opportunities_by_pair[pair_key] = \
                 self.opportunities_by_pair.get(pair_key, 0) + 1
 
             logger.success(
-                f"ARBITRAGE FOUND: Buy {buy_data.symbol} on {buy_exchange} @ ${buy_price:.2f}, "
-                f"Sell on {sell_exchange} @ ${sell_price:.2f} | "
-                f"Profit: {profit_after_fees:.2f}%"
+                f"ARBITRAGE FOUND: Buy {opportunity.symbol} on {opportunity.buy_exchange} "
+                f"@ ${opportunity.buy_price:.2f}, "
+                f"Sell on {opportunity.sell_exchange} @ ${opportunity.sell_price:.2f} | "
+                f"Profit: {opportunity.profit_after_fees:.2f}%"
             )
 
     def _get_exchange_fee(self, exchange_name: str) -> float:
@@ -188,32 +306,65 @@ class ArbitrageDetector:
             'top_pairs': [{'pair': pair, 'count': count} for pair, count in top_pairs]
         }
 
-    def get_historical_data(self, symbol: str) -> pd.DataFrame:
-        """Get historical price data for ML training."""
-        if symbol not in self.price_buffer:
+    def get_historical_data(self, symbol: str, limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Get the buffered bars of a symbol for ML training.
+
+        Args:
+            limit: Only the most recent rows (all exchanges together)
+        """
+        if symbol not in self.bar_buffer:
             return pd.DataFrame()
 
-        data = list(self.price_buffer[symbol])
+        buffer = self.bar_buffer[symbol]
+        data = list(buffer) if limit is None else list(islice(buffer, max(0, len(buffer) - limit), None))
         if not data:
             return pd.DataFrame()
 
         df = pd.DataFrame(data)
         return df
 
+    def get_bars_after(self, symbol: str, after: Dict[str, datetime]) -> List[Dict]:
+        """
+        Buffered bars of a symbol newer than the last one seen per exchange, oldest first.
+
+        The buffer is read from its newest end and the read stops at the first
+        bar already seen: everything buffered before it was there when it was
+        seen. A quiet exchange's old timestamp does not hold the read back, so
+        this costs O(new bars) plus at most one read chunk. Exchanges missing
+        from after have nothing seen, so they are read back through the
+        whole buffer.
+
+        Args:
+            after: {exchange: timestamp of the last bar seen}; exchanges
+                missing from it get all their buffered bars
+        """
+        buffer = self.bar_buffer.get(symbol)
+        if not buffer:
+            return []
+
+        def seen(bar: Dict) -> bool:
+            return bar['exchange'] in after and bar['timestamp'] <= after[bar['exchange']]
+
+        # Newest first, doubling the read until it reaches a bar already seen
+        n = 16
+        while True:
+            tail = list(islice(reversed(buffer), n))
+            if len(tail) < n or seen(tail[-1]):
+                break
+            n *= 2
+
+        return [bar for bar in reversed(tail) if not seen(bar)]
+
     def calculate_spread_metrics(self, symbol: str) -> Dict:
-        """Calculate spread statistics for a symbol."""
+        """Calculate spread statistics for a symbol from its aligned bar closes."""
         df = self.get_historical_data(symbol)
 
         if df.empty or len(df) < 2:
             return {}
 
-        # Pivot to get prices by exchange
-        pivot = df.pivot_table(
-            index='timestamp',
-            columns='exchange',
-            values='price',
-            aggfunc='mean'
-        ).ffill()
+        # Bars share interval starts across exchanges, so this pivot is dense
+        pivot = df.pivot(index='timestamp', columns='exchange', values='price').ffill()
 
         if len(pivot.columns) < 2:
             return {}
@@ -0,0 +1,171 @@
+/*
+ * Client side of live_stream.LiveStream: opens the event stream and applies
+ * its frames in the browser, without a round trip to the server.
+ *
+ * Opportunity rows: [ms, symbol, buy exchange, buy price, sell exchange,
+ * sell price, spread %, profit %, confidence]. Tick rows: [symbol, exchange,
+ * price, bid, ask, ms].
+ */
+(function () {
+    const TIME = 0, SYMBOL = 1, BUY_EXCHANGE = 2, BUY_PRICE = 3, SELL_EXCHANGE = 4,
+        SELL_PRICE = 5, SPREAD = 6, PROFIT = 7, CONFIDENCE = 8;
+
+    // Matching ArbitrageDashboard: the table covers 5 minutes, the best opportunity 1
+    const TABLE_MS = 5 * 60 * 1000, BEST_MS = 60 * 1000, TABLE_ROWS = 20;
+
+    function h(type, props, namespace) {
+        return {type: type, namespace: namespace || 'dash_html_components', props: props || {}};
+    }
+
+    function dbc(type, props) {
+        return h(type, props, 'dash_bootstrap_components');
+    }
+
+    function clock(ms) {
+        return new Date(ms).toISOString().substring(11, 19);
+    }
+
+    function usd(value) {
+        return '$' + value.toLocaleString('en-US', {minimumFractionDigits: 2, maximumFractionDigits: 2});
+    }
+
+    function stop() {
+        throw window.dash_clientside.PreventUpdate;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        live: {
+            connect: function (url) {
+                if (!url || window.liveStreamSource) {
+                    return window.dash_clientside.no_update;
+                }
+                const source = new EventSource(url);
+                source.onmessage = function (event) {
+                    window.dash_clientside.set_props('live-delta', {data: JSON.parse(event.data)});
+                };
+                source.onopen = function () {
+                    window.dash_clientside.set_props('live-status', {children: 'connected'});
+                };
+                source.onerror = function () {
+                    // EventSource reconnects by itself and gets a reset frame
+                    window.dash_clientside.set_props('live-status', {children: 'reconnecting'});
+                };
+                window.liveStreamSource = source;
+                return 'connecting';
+            },
+
+            refresh: function (frame) {
+                if (!frame || frame.refresh === undefined) {
+                    stop();
+                }
+                return frame.refresh;
+            },
+
+            stats: function (frame) {
+                if (!frame || !frame.stats) {
+                    stop();
+                }
+                const stats = frame.stats;
+                return [
+                    stats.total_opportunities.toLocaleString('en-US'),
+                    stats.avg_profit.toFixed(2) + '%',
+                    stats.max_profit.toFixed(2) + '%',
+                    String(stats.recent_count)
+                ];
+            },
+
+            // {now, rows}: the last 5 minutes of opportunities, re-evaluated at
+            // least every second so rows age out of the table and best alert
+            opportunities: function (frame, state) {
+                if (!frame) {
+                    stop();
+                }
+                const incoming = frame.opportunities || [];
+                if (!frame.reset && !incoming.length && state && frame.now - state.now < 1000) {
+                    stop();
+                }
+                const rows = (frame.reset || !state ? [] : state.rows).concat(incoming);
+                const cutoff = frame.now - TABLE_MS;
+                return {now: frame.now, rows: rows.filter(function (row) { return row[TIME] >= cutoff; })};
+            },
+
+            table: function (state) {
+                if (!state || !state.rows.length) {
+                    return h('P', {children: 'No opportunities detected yet...', className: 'text-muted'});
+                }
+                const top = state.rows.slice()
+                    .sort(function (a, b) { return b[PROFIT] - a[PROFIT]; })
+                    .slice(0, TABLE_ROWS);
+                const header = h('Thead', {children: h('Tr', {children: [
+                    'Time', 'Symbol', 'Buy', 'Sell', 'Spread', 'Profit', 'ML Score'
+                ].map(function (title) { return h('Th', {children: title}); })})});
+                const body = h('Tbody', {children: top.map(function (row) {
+                    return h('Tr', {children: [
+                        h('Td', {children: clock(row[TIME])}),
+                        h('Td', {children: row[SYMBOL]}),
+                        h('Td', {children: row[BUY_EXCHANGE] + ' $' + row[BUY_PRICE].toFixed(2)}),
+                        h('Td', {children: row[SELL_EXCHANGE] + ' $' + row[SELL_PRICE].toFixed(2)}),
+                        h('Td', {children: row[SPREAD].toFixed(2) + '%'}),
+                        h('Td', {children: row[PROFIT].toFixed(2) + '%', className: 'text-success fw-bold'}),
+                        h('Td', {children: row[CONFIDENCE] ? row[CONFIDENCE].toFixed(2) : '-'})
+                    ]});
+                })});
+                return dbc('Table', {
+                    children: [header, body], bordered: true, hover: true,
+                    responsive: true, striped: true, className: 'mb-0'
+                });
+            },
+
+            best: function (state) {
+                const cutoff = state ? state.now - BEST_MS : Infinity;
+                let best = null;
+                (state ? state.rows : []).forEach(function (row) {
+                    if (row[TIME] >= cutoff && (!best || row[PROFIT] > best[PROFIT])) {
+                        best = row;
+                    }
+                });
+                if (!best) {
+                    return dbc('Alert', {
+                        children: '⏳ Monitoring exchanges... No opportunities detected yet.',
+                        color: 'secondary'
+                    });
+                }
+                return dbc('Alert', {color: 'success', className: 'mb-0', children: [
+                    h('H4', {children: '🎯 BEST OPPORTUNITY', className: 'alert-heading'}),
+                    h('Hr'),
+                    h('P', {children: [
+                        h('Strong', {children: best[SYMBOL] + ': '}),
+                        'Buy on ' + best[BUY_EXCHANGE] + ' @ $' + best[BUY_PRICE].toFixed(2) + ' → ',
+                        'Sell on ' + best[SELL_EXCHANGE] + ' @ $' + best[SELL_PRICE].toFixed(2)
+                    ]}),
+                    h('P', {children: [
+                        h('Strong', {children: 'Profit after fees: '}),
+                        h('Span', {children: best[PROFIT].toFixed(2) + '%', className: 'text-success fs-4'}),
+                        ' (spread: ' + best[SPREAD].toFixed(2) + '%)'
+                    ]}),
+                    h('Small', {children: 'Detected: ' + clock(best[TIME])})
+                ]});
+            },
+
+            // Latest price per exchange of the selected symbol, tick by tick
+            quotes: function (frame, symbol, quotes) {
+                const triggered = window.dash_clientside.callback_context.triggered.map(function (t) {
+                    return t.prop_id;
+                });
+                if (triggered.length === 1 && triggered[0] === 'live-delta.data'
+                        && frame && !frame.reset && !frame.ticks) {
+                    stop();
+                }
+                quotes = frame && frame.reset ? {} : Object.assign({}, quotes);
+                ((frame && frame.ticks) || []).forEach(function (tick) {
+                    quotes[tick[0]] = Object.assign({}, quotes[tick[0]], {[tick[1]]: tick[2]});
+                });
+                const prices = quotes[symbol] || {};
+                const line = Object.keys(prices).sort().map(function (exchange) {
+                    return exchange + ' ' + usd(prices[exchange]);
+                }).join(' · ');
+                return [quotes, line];
+            }
+        }
+    });
+})();
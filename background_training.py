@@ -0,0 +1,321 @@
+"""Off-loop model retraining with validated, atomic model swaps."""
+import asyncio
+import copy
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+
+class ModelHandle:
+    """
+    Reference to the model currently in service.
+
+    Readers call get() once per operation and use that object throughout, so
+    a swap never changes the model under an in-flight prediction. swap()
+    replaces the reference in a single assignment, so there is no window in
+    which readers see a half-updated model. The last few swapped-out models
+    are kept in memory, so rollback() is as instant as a swap.
+    """
+
+    def __init__(self, model=None, keep: int = 3):
+        self._model = model
+        self._lock = threading.Lock()
+        self._previous = deque(maxlen=keep)  # (model, info) pairs swapped out, newest last
+        self.version = 0
+        self.info: Dict = {}  # Metrics of the swap that produced the current model
+
+    def get(self):
+        return self._model
+
+    def swap(self, model, info: Optional[Dict] = None) -> int:
+        """Put model into service and return its version number."""
+        with self._lock:
+            if self.version > 0:  # Only models put in by swap() can be rolled back to
+                self._previous.append((self._model, self.info))
+            self._model = model
+            self.version += 1
+            self.info = {**(info or {}), 'version': self.version,
+                         'swapped_at': datetime.now(timezone.utc).isoformat()}
+            return self.version
+
+    def rollback(self) -> bool:
+        """Put the previously served model back into service."""
+        with self._lock:
+            if not self._previous:
+                return False
+            self._model, info = self._previous.pop()
+            self.version += 1
+            self.info = {**info, 'version': self.version, 'rolled_back_from': self.version - 1,
+                         'swapped_at': datetime.now(timezone.utc).isoformat()}
+            return True
+
+
+def _lower_priority():
+    """Worker initializer: training yields the CPU to ingestion and the dashboard."""
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+def _mse(predictions: np.ndarray, targets: np.ndarray) -> float:
+    valid = ~np.isnan(predictions)
+    if not valid.any():
+        return float('inf')
+    return float(np.mean((predictions[valid] - targets[valid]) ** 2))
+
+
+def _extend_serving_models(training_sets: Dict[str, tuple], current, recent_fraction: float,
+                           n_trees: int, max_trees: int) -> Dict[tuple, object]:
+    """Copies of the serving pair models boosted on the newest training rows, where possible."""
+    extended = {}
+    for symbol, (X, Y, feature_names, pair_names) in training_sets.items():
+        recent = slice(int(len(X) * (1 - recent_fraction)), None)
+        for j, pair_name in enumerate(pair_names):
+            key = (symbol, *pair_name.split('->'))
+            serving = current.models.get(key)
+            if serving is None:
+                continue
+            model = copy.deepcopy(serving)
+            if model.extend(X[recent], Y[recent, j], n_trees, max_trees, feature_names=feature_names):
+                extended[key] = model
+    return extended
+
+
+def retrain_spread_models(rows_by_symbol: Dict[str, List[Dict]], current, backend: str = 'gbr',
+                          holdout_fraction: float = 0.2, incremental: bool = False,
+                          recent_fraction: float = 0.25, n_trees: int = 20,
+                          max_trees: int = 200) -> Dict:
+    """
+    Train a candidate SpreadModelSet on a buffer snapshot (runs in a worker process).
+
+    The trailing holdout_fraction of each symbol's feature rows is kept out of
+    training and used to compare every candidate pair model with the model
+    currently serving that pair.
+
+    With incremental=True, a pair whose serving model can be extended keeps
+    its ensemble and gains n_trees rounds fitted on the trailing
+    recent_fraction of the training rows (see SpreadPredictor.extend); the
+    other pairs (new pairs, compiled models) are fitted from scratch. Either
+    way, a pair whose serving model was pruned to a subset of the features
+    keeps that subset.
+
+    Args:
+        rows_by_symbol: {symbol: bar buffer rows} snapshot
+        current: SpreadModelSet in service (may be untrained)
+        backend: Model backend for the candidate
+        holdout_fraction: Trailing share of rows used for validation
+        incremental: Extend serving models instead of refitting them
+        recent_fraction: Trailing share of the training rows incremental rounds are fitted on
+        n_trees: Rounds added per incremental retrain
+        max_trees: Cap on the rounds of an extended model (oldest are dropped)
+
+    Returns:
+        Dict with the candidate set, per-pair validation MSEs, n_rows,
+        train_seconds and the number of extended pair models
+    """
+    import pandas as pd
+    from feature_selection import is_pruned
+    from ml_predictor import SpreadModelSet, SpreadPredictor
+    from model_registry import hash_arrays
+
+    started = time.perf_counter()
+    training_sets, holdouts = {}, {}
+    n_rows = 0
+    window = None
+
+    for symbol, rows in rows_by_symbol.items():
+        if not rows:
+            continue
+        n_rows += len(rows)
+        df = pd.DataFrame(rows)
+        start, end = df['timestamp'].min(), df['timestamp'].max()
+        window = (start, end) if window is None else (min(window[0], start), max(window[1], end))
+
+        X, Y = SpreadPredictor().build_pair_training_set(df)
+        if X is None:
+            continue
+        split = int(len(X) * (1 - holdout_fraction))
+        training_sets[symbol] = (X.iloc[:split].to_numpy(), Y.iloc[:split].to_numpy(),
+                                 X.columns.tolist(), Y.columns.tolist())
+        holdouts[symbol] = (X.iloc[split:].to_dict('records'), Y.iloc[split:])
+
+    candidate = SpreadModelSet(backend=backend, max_workers=1)
+    if incremental and current is not None:
+        candidate.models.update(
+            _extend_serving_models(training_sets, current, recent_fraction, n_trees, max_trees)
+        )
+    n_extended = len(candidate.models)
+
+    # Full fits for every pair not extended above, on the features the
+    # serving model was pruned to (see feature_selection.py), if any
+    remaining, selected = {}, {}
+    for symbol, (X, Y, feature_names, pair_names) in training_sets.items():
+        columns = [j for j, pair_name in enumerate(pair_names)
+                   if (symbol, *pair_name.split('->')) not in candidate.models]
+        if columns:
+            remaining[symbol] = (X, Y[:, columns], feature_names, [pair_names[j] for j in columns])
+        for j in columns:
+            key = (symbol, *pair_names[j].split('->'))
+            serving = current.models.get(key) if current is not None else None
+            if serving is not None and is_pruned(serving.feature_names) and \
+                    set(serving.feature_names) <= set(feature_names):
+                selected[key] = serving.feature_names
+    if remaining:
+        candidate.fit_matrices(remaining, selected)
+
+    validation = {}
+    for (symbol, ex1, ex2), model in candidate.models.items():
+        rows, targets = holdouts[symbol]
+        if not rows:
+            continue
+        y = targets[f"{ex1}->{ex2}"].to_numpy()
+        serving = current.models.get((symbol, ex1, ex2)) if current is not None else None
+        validation[(symbol, ex1, ex2)] = {
+            'candidate_mse': _mse(model.predict_batch(rows), y),
+            'current_mse': _mse(serving.predict_batch(rows), y) if serving is not None else float('inf'),
+            'holdout_rows': len(rows),
+        }
+
+    return {
+        'candidate': candidate,
+        'validation': validation,
+        'n_rows': n_rows,
+        'train_seconds': time.perf_counter() - started,
+        'extended': n_extended,
+        'window': {'start': str(window[0]), 'end': str(window[1])} if window else None,
+        'data_hash': hash_arrays(*(array for symbol in sorted(training_sets)
+                                   for array in training_sets[symbol][:2])),
+    }
+
+
+class BackgroundTrainer:
+    """
+    Periodic spread-model retraining in a separate, lower-priority process.
+
+    The bar buffers are snapshotted (a plain copy of each deque) on the event
+    loop, and everything else (DataFrame construction, feature engineering,
+    fitting and validation) happens in the worker process, so ingestion keeps
+    running during a fit. Pair models that beat the serving model on the
+    snapshot's holdout replace it in a new model set, which is swapped into the
+    ModelHandle in one step.
+    """
+
+    def __init__(self, handle: ModelHandle, backend: str = 'gbr', holdout_fraction: float = 0.2,
+                 tolerance: float = 0.0, min_rows: int = 100, incremental: bool = True,
+                 recent_fraction: float = 0.25, n_trees: int = 20, max_trees: int = 200):
+        """
+        Args:
+            handle: ModelHandle serving the SpreadModelSet
+            backend: Model backend for retrained pairs
+            holdout_fraction: Trailing share of each snapshot used for validation
+            tolerance: Accept a candidate whose holdout MSE is at most
+                (1 + tolerance) × the serving model's
+            min_rows: Minimum buffered rows per symbol to include it
+            incremental: Extend serving models with n_trees rounds on the newest
+                rows instead of refitting them (see retrain_spread_models)
+            recent_fraction: Trailing share of the training rows incremental rounds are fitted on
+            n_trees: Rounds added per incremental retrain
+            max_trees: Cap on the rounds of an extended model
+        """
+        self.handle = handle
+        self.backend = backend
+        self.holdout_fraction = holdout_fraction
+        self.tolerance = tolerance
+        self.min_rows = min_rows
+        self.incremental = incremental
+        self.recent_fraction = recent_fraction
+        self.n_trees = n_trees
+        self.max_trees = max_trees
+        self.history: List[Dict] = []  # One metrics dict per training run
+        self._busy = False
+        # spawn: the parent runs the dashboard thread, so forking is unsafe
+        self._pool = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context('spawn'),
+            initializer=_lower_priority
+        )
+
+    async def retrain(self, detector, symbols: List[str]) -> Optional[Dict]:
+        """
+        Retrain on a snapshot of detector's bar buffers and swap in accepted models.
+
+        Returns:
+            Metrics of the run, or None if skipped
+        """
+        if self._busy:
+            logger.info("Background training still running, skipping this round")
+            return None
+
+        snapshot = {
+            symbol: list(detector.bar_buffer.get(symbol, ()))
+            for symbol in symbols
+        }
+        snapshot = {symbol: rows for symbol, rows in snapshot.items() if len(rows) >= self.min_rows}
+        if not snapshot:
+            logger.warning("Not enough data for ML training yet")
+            return None
+
+        self._busy = True
+        started = time.perf_counter()
+        current = self.handle.get()
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._pool, retrain_spread_models, snapshot, current, self.backend,
+                self.holdout_fraction, self.incremental, self.recent_fraction,
+                self.n_trees, self.max_trees
+            )
+        except Exception as e:
+            logger.error(f"Background training failed: {e}")
+            return None
+        finally:
+            self._busy = False
+
+        accepted, rejected = {}, []
+        for key, scores in result['validation'].items():
+            if scores['candidate_mse'] <= scores['current_mse'] * (1 + self.tolerance):
+                accepted[key] = result['candidate'].models[key]
+            else:
+                rejected.append(key)
+
+        metrics = {
+            'n_rows': result['n_rows'],
+            'train_seconds': result['train_seconds'],
+            'wall_seconds': time.perf_counter() - started,
+            'extended': result['extended'],
+            'accepted': len(accepted),
+            'rejected': len(rejected),
+            'swapped': bool(accepted),
+            'window': result['window'],
+            'data_hash': result['data_hash'],
+            'validation': {f"{symbol} {ex1}->{ex2}": scores
+                           for (symbol, ex1, ex2), scores in result['validation'].items()},
+        }
+
+        if accepted:
+            from ml_predictor import SpreadModelSet
+
+            # A new set object, so readers holding the old one are unaffected
+            updated = SpreadModelSet(backend=self.backend)
+            updated.models = {**(current.models if current is not None else {}), **accepted}
+            metrics['version'] = self.handle.swap(updated, metrics)
+
+        self.history.append(metrics)
+        logger.info(
+            f"Background training: {metrics['n_rows']:,} rows in {metrics['train_seconds']:.1f}s "
+            f"(wall {metrics['wall_seconds']:.1f}s, {metrics['extended']} extended) | "
+            f"{len(accepted)} pair models accepted, "
+            f"{len(rejected)} rejected" + (f" | swapped in v{metrics['version']}" if accepted else "")
+        )
+        return metrics
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
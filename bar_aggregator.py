@@ -0,0 +1,181 @@
+"""Streaming fixed-interval bars per exchange and symbol, built from ticks."""
+import math
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from config import PriceData, BAR_INTERVAL_SECONDS, MAX_SPREAD_AGE_SECONDS
+
+
+@dataclass
+class Bar:
+    """One exchange's ticks for a symbol over one bar interval."""
+    exchange: str
+    symbol: str
+    timestamp: datetime  # Interval start (UTC)
+    open: float
+    high: float
+    low: float
+    close: float
+    vwap: float
+    volume: float
+    bid: float       # Last quote in the interval (0 = none, as in PriceData)
+    ask: float
+    best_bid: float  # Highest bid / lowest ask quoted in the interval
+    best_ask: float
+    ticks: int       # 0 = no ticks; prices and quotes carried from the previous bar
+
+    @property
+    def price(self) -> float:
+        """Closing price; lets a Bar stand in for a PriceData tick."""
+        return self.close
+
+    def to_dict(self) -> Dict:
+        """Buffer row: the raw price-row columns (price = close) plus the bar fields."""
+        return {
+            'exchange': self.exchange,
+            'timestamp': self.timestamp,
+            'price': self.close,
+            'bid': self.bid,
+            'ask': self.ask,
+            'volume': self.volume,
+            'open': self.open,
+            'high': self.high,
+            'low': self.low,
+            'vwap': self.vwap,
+            'best_bid': self.best_bid,
+            'best_ask': self.best_ask,
+            'ticks': self.ticks,
+        }
+
+
+class _OpenBar:
+    """Running OHLC / VWAP / quote state of the interval in progress."""
+
+    __slots__ = ('open', 'high', 'low', 'close', 'notional', 'volume',
+                 'bid', 'ask', 'best_bid', 'best_ask', 'ticks')
+
+    def __init__(self, price_data: PriceData):
+        self.open = self.high = self.low = self.close = price_data.price
+        self.notional = price_data.price * price_data.volume
+        self.volume = price_data.volume
+        self.bid, self.ask = price_data.bid, price_data.ask
+        self.best_bid = price_data.bid if price_data.bid > 0 else 0.0
+        self.best_ask = price_data.ask if price_data.ask > 0 else math.inf
+        self.ticks = 1
+
+    def add(self, price_data: PriceData):
+        price = price_data.price
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.close = price
+        self.notional += price * price_data.volume
+        self.volume += price_data.volume
+        self.bid, self.ask = price_data.bid, price_data.ask
+        if price_data.bid > self.best_bid:
+            self.best_bid = price_data.bid
+        if 0 < price_data.ask < self.best_ask:
+            self.best_ask = price_data.ask
+        self.ticks += 1
+
+
+class BarAggregator:
+    """
+    Aligned fixed-interval bars built tick by tick.
+
+    Each symbol keeps one open interval. A tick whose timestamp is at or past
+    its end closes the interval: every exchange that ticked in it gets a bar,
+    and every exchange that did not, but ticked within the last max_carry
+    intervals, gets a flat bar carrying its last close and quotes (ticks=0),
+    so all live exchanges have a bar at every interval start. Intervals with
+    no ticks at all are filled the same way. Ticks are assigned by their own
+    timestamp; one that arrives after its interval was closed counts towards
+    the open interval. Work and memory are O(exchanges) per symbol, whatever
+    the tick rate.
+
+    Volumes are summed as reported, so for feeds that report 24h volume on
+    each tick the bar volume and VWAP weights are relative, not traded size.
+    """
+
+    def __init__(self, interval: float = BAR_INTERVAL_SECONDS,
+                 max_carry: Optional[int] = None):
+        """
+        Args:
+            interval: Bar length in seconds
+            max_carry: Intervals an exchange without ticks keeps getting flat
+                bars (default: MAX_SPREAD_AGE_SECONDS worth)
+        """
+        self.interval = interval
+        self.max_carry = max_carry if max_carry is not None else \
+            max(1, math.ceil(MAX_SPREAD_AGE_SECONDS / interval))
+        self._start: Dict[str, float] = {}                   # {symbol: open interval start (epoch s)}
+        self._open: Dict[str, Dict[str, _OpenBar]] = {}      # {symbol: {exchange: open bar}}
+        self._last: Dict[str, Dict[str, tuple]] = {}         # {symbol: {exchange: (last bar, interval index)}}
+
+    def update(self, price_data: PriceData) -> List[Bar]:
+        """
+        Fold one tick in.
+
+        Returns:
+            Bars closed by this tick, oldest interval first (usually none)
+        """
+        symbol = price_data.symbol
+        start = math.floor(price_data.timestamp.timestamp() / self.interval) * self.interval
+
+        closed = []
+        current = self._start.get(symbol)
+        if current is None:
+            self._start[symbol] = current = start
+            self._open[symbol] = {}
+            self._last[symbol] = {}
+        elif start > current:
+            closed = self._close(symbol, start)
+
+        bars = self._open[symbol]
+        bar = bars.get(price_data.exchange)
+        if bar is None:
+            bars[price_data.exchange] = _OpenBar(price_data)
+        else:
+            bar.add(price_data)
+        return closed
+
+    def _close(self, symbol: str, until: float) -> List[Bar]:
+        """Emit bars for every interval of symbol from the open one up to until."""
+        start = self._start[symbol]
+        opened, last = self._open[symbol], self._last[symbol]
+        index = round(start / self.interval)
+        closed = []
+
+        # The open interval, then at most max_carry empty ones: after that
+        # every exchange has gone stale
+        n_intervals = min(round((until - start) / self.interval), self.max_carry + 1)
+        for step in range(n_intervals):
+            timestamp = datetime.fromtimestamp(start + step * self.interval, tz=timezone.utc)
+            for exchange in dict.fromkeys([*last, *opened]):
+                bar = opened.pop(exchange, None) if step == 0 else None
+                if bar is not None:
+                    emitted = Bar(
+                        exchange, symbol, timestamp, bar.open, bar.high, bar.low, bar.close,
+                        bar.notional / bar.volume if bar.volume > 0 else bar.close, bar.volume,
+                        bar.bid, bar.ask, bar.best_bid,
+                        bar.best_ask if bar.best_ask < math.inf else 0.0, bar.ticks,
+                    )
+                    last[exchange] = (emitted, index + step)
+                else:
+                    previous, seen = last[exchange]
+                    if index + step - seen > self.max_carry:
+                        continue
+                    close = previous.close
+                    emitted = Bar(
+                        exchange, symbol, timestamp, close, close, close, close, close, 0.0,
+                        previous.bid, previous.ask, previous.bid, previous.ask, 0,
+                    )
+                closed.append(emitted)
+
+        for exchange in [exchange for exchange, (_, seen) in last.items()
+                         if round(until / self.interval) - seen > self.max_carry]:
+            del last[exchange]
+        self._start[symbol] = until
+        return closed
@@ -112,4 +112,5 @@ SYMBOL_MAPPINGS = {
 # Trading configuration
 MIN_PROFIT_THRESHOLD = 0.2  # Minimum 0.2% profit after fees (lowered for more opportunities)
 MAX_SPREAD_AGE_SECONDS = 5  # Ignore old price data
-DATA_BUFFER_SIZE = 10000  # Keep last N price points for ML (2 hours = ~1080 updates per symbol)
+DATA_BUFFER_SIZE = 10000  # Keep last N bars per symbol for ML (~55 minutes of 1s bars from 3 exchanges)
+BAR_INTERVAL_SECONDS = 1.0  # Ticks are aggregated into bars of this length for ML, spreads and charts
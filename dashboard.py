@@ -1,20 +1,150 @@
 """Real-time Plotly Dash dashboard for arbitrage monitoring."""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Hashable, Optional
+
 import dash
-from dash import dcc, html, Input, Output, State
+from dash import dcc, html, Input, Output, State, ClientsideFunction
 import dash_bootstrap_components as dbc
 import plotly.graph_objs as go
-from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 from collections import deque
 from loguru import logger
 
+from config import BAR_INTERVAL_SECONDS
+from live_stream import LiveStream, live_components
+
+
+# Dashboard refresh period (the dcc.Interval period and snapshot rebuild rate)
+REFRESH_SECONDS = 1.0
+
+SYMBOLS = ['BTC-USD', 'ETH-USD', 'SOL-USD']
+
+# Price chart line colour per exchange
+CHART_COLORS = {'Coinbase': '#0052FF', 'Binance': '#F3BA2F', 'Bitstamp': '#00D43A'}
+
+
+class DashboardSnapshot:
+    """
+    Everything the dashboard shows at one refresh, read from the detector and models once.
+
+    Panels are rendered from it through view(), which memoizes each
+    rendering, so every panel of every open page shares one read of the
+    detector and one rendering per refresh.
+    """
+
+    def __init__(self, version: int, **data):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.data = data
+        self._views: Dict[Hashable, object] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: str):
+        return self.data[key]
+
+    def view(self, key: Hashable, render: Callable[['DashboardSnapshot'], object]):
+        """render(self), computed on first use and shared by every later caller."""
+        try:
+            return self._views[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._views:
+                self._views[key] = render(self)
+            return self._views[key]
+
+
+class SnapshotCache:
+    """
+    The current DashboardSnapshot, rebuilt every period in a background thread.
+
+    Callbacks only read the current snapshot, so the detector scans and model
+    calls behind the dashboard run once per period however many panels and
+    browser sessions are refreshing. While nobody has read a snapshot for
+    idle_after seconds the thread stops rebuilding, and the next read builds
+    one on the spot (as does any read of a snapshot older than two periods,
+    e.g. before start()).
+    """
+
+    def __init__(self, build: Callable[[int], DashboardSnapshot], period: float = REFRESH_SECONDS,
+                 idle_after: float = 10.0):
+        """
+        Args:
+            build: Returns a new snapshot, given its version number
+            period: Seconds between rebuilds
+            idle_after: Seconds without reads after which rebuilding pauses
+        """
+        self.build = build
+        self.period = period
+        self.idle_after = idle_after
+        self._snapshot: Optional[DashboardSnapshot] = None
+        self._version = 0
+        self._last_read = -float('inf')
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def get(self) -> DashboardSnapshot:
+        """The current snapshot, built now if there is none or it is stale."""
+        self._last_read = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is None or self._last_read - snapshot.built_at > 2 * self.period:
+            with self._lock:
+                # Concurrent readers of a stale snapshot wait for one rebuild
+                if self._snapshot is snapshot:
+                    self._refresh()
+                snapshot = self._snapshot
+        return snapshot
+
+    def _refresh(self):
+        try:
+            self._version += 1
+            self._snapshot = self.build(self._version)
+        except Exception as e:
+            logger.error(f"Error building dashboard snapshot: {e}")
+            if self._snapshot is None:
+                raise
+
+    def _run(self):
+        next_build = time.monotonic()
+        while not self._stopped.wait(max(0.0, next_build - time.monotonic())):
+            now = time.monotonic()
+            next_build = max(next_build + self.period, now)
+            if now - self._last_read < self.idle_after:
+                with self._lock:
+                    self._refresh()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="dashboard-snapshots", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
 
 class ArbitrageDashboard:
     """Real-time dashboard for monitoring arbitrage opportunities."""
 
-    def __init__(self, detector, ml_predictor=None):
+    def __init__(self, detector, ml_predictor=None, online_predictor=None, push: bool = True):
+        """
+        Args:
+            detector: ArbitrageDetector to display
+            ml_predictor: ModelHandle serving the batch SpreadModelSet
+            online_predictor: Optional OnlineSpreadPredictor; its (blended)
+                predictions are shown instead of the batch model's alone
+            push: Stream ticks, opportunities and statistics to the page as
+                they happen (see live_stream.LiveStream) and re-render the
+                other panels only when new bars or opportunities came in,
+                rather than polling every panel each REFRESH_SECONDS
+        """
         self.detector = detector
         self.ml_predictor = ml_predictor
+        self.online_predictor = online_predictor
+        self.push = push
 
         # Initialize Dash app with Bootstrap theme
         self.app = dash.Dash(
@@ -23,19 +153,22 @@ class ArbitrageDashboard:
             title="Crypto Arbitrage Monitor"
         )
 
-        # Data storage for time series
-        self.price_history = {
-            'BTC-USD': deque(maxlen=200),
-            'ETH-USD': deque(maxlen=200),
-            'SOL-USD': deque(maxlen=200)
-        }
+        # Bars per exchange shown on the price chart
+        self.chart_bars = 200
 
         self.opportunity_history = deque(maxlen=100)
 
+        # Detector reads and panel renderings shared by every callback and session
+        self.snapshots = SnapshotCache(self._build_snapshot)
+
         # Setup layout
         self._setup_layout()
         self._setup_callbacks()
 
+        if self.push:
+            self.live = LiveStream(detector, refresh_period=REFRESH_SECONDS)
+            self.live.serve(self.app)
+
     def _setup_layout(self):
         """Create dashboard layout."""
         self.app.layout = dbc.Container([
@@ -105,7 +238,8 @@ class ArbitrageDashboard:
                         dbc.CardHeader([
                             dbc.Row([
                                 dbc.Col([
-                                    html.Span("📈 Live Price Feeds", className="text-black")
+                                    html.Span("📈 Live Price Feeds", className="text-black"),
+                                    html.Small(id="live-quote-line", className="d-block text-muted")
                                 ], width=6),
                                 dbc.Col([
                                     dcc.Dropdown(
@@ -123,7 +257,8 @@ class ArbitrageDashboard:
                             ], align="center")
                         ], className="text-black"),
                         dbc.CardBody([
-                            dcc.Graph(id="price-chart", config={'displayModeBar': False})
+                            dcc.Graph(id="price-chart", config={'displayModeBar': False}),
+                            dcc.Store(id="chart-state")
                         ])
                     ], color="dark")
                 ])
@@ -175,17 +310,67 @@ class ArbitrageDashboard:
                 ])
             ]),
 
-            # Auto-refresh interval
-            dcc.Interval(
-                id='interval-component',
-                interval=1000,  # Update every 1 second
-                n_intervals=0
-            )
+            # Live updates, or the auto-refresh interval
+            html.Div(live_components(self.app) + [
+                dcc.Store(id='live-opportunities'),
+                dcc.Store(id='live-quotes'),
+            ] if self.push else [
+                dcc.Interval(
+                    id='interval-component',
+                    interval=int(REFRESH_SECONDS * 1000),
+                    n_intervals=0
+                )
+            ])
 
         ], fluid=True, className="p-4")
 
     def _setup_callbacks(self):
         """Setup dashboard callbacks."""
+        if self.push:
+            self._setup_live_callbacks()
+        else:
+            self._setup_polled_callbacks()
+
+        # Panels rendered on the server follow the pushed refresh signal, or the interval
+        refresh = Input("live-refresh", "data") if self.push else Input("interval-component", "n_intervals")
+
+        @self.app.callback(
+            [Output("price-chart", "figure"),
+             Output("price-chart", "extendData"),
+             Output("chart-state", "data")],
+            [refresh,
+             Input("symbol-dropdown", "value")],
+            State("chart-state", "data")
+        )
+        def update_price_chart(n, selected_symbol, chart):
+            # Redraw on load and symbol change, then only append new bars
+            if chart is None or chart['symbol'] != selected_symbol:
+                return self._price_chart(selected_symbol)
+            return self._extend_price_chart(chart)
+
+        @self.app.callback(
+            Output("spread-heatmap", "figure"),
+            refresh
+        )
+        def update_spread_heatmap(n):
+            return self.snapshots.get().view('heatmap', self._render_spread_heatmap)
+
+        @self.app.callback(
+            Output("ml-predictions", "children"),
+            refresh
+        )
+        def update_ml_predictions(n):
+            return self.snapshots.get().view('ml', self._render_ml_predictions)
+
+        @self.app.callback(
+            Output("backtest-results", "children"),
+            refresh
+        )
+        def update_backtest_results(n):
+            return self.snapshots.get().view('backtest', self._render_backtest_results)
+
+    def _setup_polled_callbacks(self):
+        """Statistics, best opportunity and table, rendered on the server each interval."""
 
         @self.app.callback(
             [
@@ -197,7 +382,7 @@ class ArbitrageDashboard:
             Input("interval-component", "n_intervals")
         )
         def update_stats(n):
-            stats = self.detector.get_statistics()
+            stats = self.snapshots.get()['stats']
 
             return (
                 f"{stats['total_opportunities']:,}",
@@ -211,281 +396,388 @@ class ArbitrageDashboard:
             Input("interval-component", "n_intervals")
         )
         def update_best_opportunity(n):
-            best = self.detector.get_best_opportunity()
-
-            if not best:
-                return dbc.Alert(
-                    "⏳ Monitoring exchanges... No opportunities detected yet.",
-                    color="secondary"
-                )
-
-            return dbc.Alert([
-                html.H4("🎯 BEST OPPORTUNITY", className="alert-heading"),
-                html.Hr(),
-                html.P([
-                    html.Strong(f"{best.symbol}: "),
-                    f"Buy on {best.buy_exchange} @ ${best.buy_price:.2f} → ",
-                    f"Sell on {best.sell_exchange} @ ${best.sell_price:.2f}"
-                ]),
-                html.P([
-                    html.Strong("Profit after fees: "),
-                    html.Span(f"{best.profit_after_fees:.2f}%", className="text-success fs-4"),
-                    f" (spread: {best.spread_pct:.2f}%)"
-                ]),
-                html.Small(f"Detected: {best.timestamp.strftime('%H:%M:%S')}")
-            ], color="success", className="mb-0")
-
-        @self.app.callback(
-            Output("price-chart", "figure"),
-            [Input("interval-component", "n_intervals"),
-             Input("symbol-dropdown", "value")]
-        )
-        def update_price_chart(n, selected_symbol):
-            fig = go.Figure()
-
-            symbols = ['BTC-USD', 'ETH-USD', 'SOL-USD']
-            colors = {'Coinbase': '#0052FF', 'Binance': '#F3BA2F', 'Bitstamp': '#00D43A'}
-
-            # Still collect data for all symbols (for history)
-            for symbol in symbols:
-                # Get latest prices for this symbol
-                prices = self.detector.get_latest_prices(symbol)
-
-                for exchange, price_data in prices.items():
-                    # Store in history
-                    if symbol not in self.price_history:
-                        self.price_history[symbol] = deque(maxlen=200)
-
-                    self.price_history[symbol].append({
-                        'timestamp': price_data.timestamp,
-                        'exchange': exchange,
-                        'price': price_data.price
-                    })
-
-            # Plot only the selected symbol
-            if selected_symbol in self.price_history and len(self.price_history[selected_symbol]) > 0:
-                df = pd.DataFrame(list(self.price_history[selected_symbol]))
-
-                for exchange in df['exchange'].unique():
-                    ex_df = df[df['exchange'] == exchange]
-
-                    fig.add_trace(go.Scatter(
-                        x=ex_df['timestamp'],
-                        y=ex_df['price'],
-                        mode='lines',
-                        name=f"{exchange}",
-                        line=dict(color=colors.get(exchange, '#FFFFFF'), width=2),
-                        hovertemplate=f"<b>{exchange}</b><br>" +
-                                    "Price: $%{y:.2f}<br>" +
-                                    "<extra></extra>"
-                    ))
-
-            # Get symbol name for title
-            symbol_names = {
-                'BTC-USD': 'Bitcoin',
-                'ETH-USD': 'Ethereum',
-                'SOL-USD': 'Solana'
-            }
-
-            fig.update_layout(
-                template="plotly_dark",
-                height=400,
-                title=dict(
-                    text=f"{symbol_names.get(selected_symbol, selected_symbol)} Price Comparison",
-                    x=0.5,
-                    xanchor='center'
-                ),
-                xaxis_title="Time",
-                yaxis_title="Price (USD)",
-                hovermode='x unified',
-                legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-            )
-
-            return fig
+            return self.snapshots.get().view('best', self._render_best_opportunity)
 
         @self.app.callback(
             Output("opportunities-table", "children"),
             Input("interval-component", "n_intervals")
         )
         def update_opportunities_table(n):
-            recent_opps = self.detector.get_recent_opportunities(minutes=5)
-
-            if not recent_opps:
-                return html.P("No opportunities detected yet...", className="text-muted")
-
-            # Sort by profit
-            recent_opps = sorted(
-                recent_opps,
-                key=lambda x: x.profit_after_fees,
-                reverse=True
-            )[:20]  # Top 20
-
-            table_header = [
-                html.Thead(html.Tr([
-                    html.Th("Time"),
-                    html.Th("Symbol"),
-                    html.Th("Buy"),
-                    html.Th("Sell"),
-                    html.Th("Spread"),
-                    html.Th("Profit"),
-                ]))
-            ]
-
-            rows = []
-            for opp in recent_opps:
-                rows.append(html.Tr([
-                    html.Td(opp.timestamp.strftime("%H:%M:%S")),
-                    html.Td(opp.symbol),
-                    html.Td(f"{opp.buy_exchange} ${opp.buy_price:.2f}"),
-                    html.Td(f"{opp.sell_exchange} ${opp.sell_price:.2f}"),
-                    html.Td(f"{opp.spread_pct:.2f}%"),
-                    html.Td(
-                        f"{opp.profit_after_fees:.2f}%",
-                        className="text-success fw-bold"
-                    ),
-                ]))
-
-            table_body = [html.Tbody(rows)]
-
-            return dbc.Table(
-                table_header + table_body,
-                bordered=True,
-                hover=True,
-                responsive=True,
-                striped=True,
-                className="mb-0"
-            )
+            return self.snapshots.get().view('opportunities', self._render_opportunities_table)
 
-        @self.app.callback(
-            Output("spread-heatmap", "figure"),
-            Input("interval-component", "n_intervals")
+    def _setup_live_callbacks(self):
+        """Statistics, best opportunity, table and quotes, applied in the browser from pushed frames."""
+        self.app.clientside_callback(
+            ClientsideFunction(namespace='live', function_name='stats'),
+            [
+                Output("total-opps", "children"),
+                Output("avg-profit", "children"),
+                Output("max-profit", "children"),
+                Output("recent-count", "children"),
+            ],
+            Input("live-delta", "data")
+        )
+        self.app.clientside_callback(
+            ClientsideFunction(namespace='live', function_name='opportunities'),
+            Output("live-opportunities", "data"),
+            Input("live-delta", "data"),
+            State("live-opportunities", "data")
+        )
+        self.app.clientside_callback(
+            ClientsideFunction(namespace='live', function_name='best'),
+            Output("best-opportunity-alert", "children"),
+            Input("live-opportunities", "data")
+        )
+        self.app.clientside_callback(
+            ClientsideFunction(namespace='live', function_name='table'),
+            Output("opportunities-table", "children"),
+            Input("live-opportunities", "data")
+        )
+        self.app.clientside_callback(
+            ClientsideFunction(namespace='live', function_name='quotes'),
+            [Output("live-quotes", "data"), Output("live-quote-line", "children")],
+            [Input("live-delta", "data"), Input("symbol-dropdown", "value")],
+            State("live-quotes", "data")
         )
-        def update_spread_heatmap(n):
-            """Create heatmap of spreads between exchanges."""
-            symbols = ['BTC-USD', 'ETH-USD', 'SOL-USD']
-            exchanges = ['Coinbase', 'Binance', 'Bitstamp']
 
-            # Calculate current spreads
-            spread_matrix = []
+    def _build_snapshot(self, version: int) -> DashboardSnapshot:
+        """Read everything the panels show from the detector and models, once."""
+        from arbitrage_detector import BacktestEngine
+
+        now = datetime.now(timezone.utc)
+        last_hour = self.detector.get_recent_opportunities(minutes=60)
+        recent = [opp for opp in last_hour if opp.timestamp >= now - timedelta(minutes=5)]
+        last_minute = [opp for opp in recent if opp.timestamp >= now - timedelta(minutes=1)]
+
+        backtest = BacktestEngine(initial_capital=10000)
+        for opp in last_hour:
+            backtest.execute_opportunity(opp)
+
+        return DashboardSnapshot(
+            version,
+            stats=self.detector.get_statistics(),
+            best=max(last_minute, key=lambda x: x.profit_after_fees) if last_minute else None,
+            recent=recent,
+            backtest=backtest.get_results(),
+            spreads={symbol: self.detector.calculate_spread_metrics(symbol) for symbol in SYMBOLS},
+            predictions=self._predict_spreads(),
+            model_info=dict(self.ml_predictor.info) if self.ml_predictor else {},
+        )
 
-            for symbol in symbols:
-                spreads = self.detector.calculate_spread_metrics(symbol)
-                row = []
+    def _predict_spreads(self):
+        """
+        (symbol, ex1, ex2, predicted spread) for every pair with a batch or
+        warmed-up online model, or None while no model is available.
+        """
+        # One model for the whole refresh, even if a retrain swaps it meanwhile
+        ml_predictor = self.ml_predictor.get() if self.ml_predictor else None
+        batch_trained = bool(ml_predictor and ml_predictor.is_trained)
+
+        # Every (symbol, exchange pair) with a batch or warmed-up online model
+        requests = sorted({
+            (symbol, ex1, ex2)
+            for symbol in SYMBOLS
+            for ex1, ex2 in (ml_predictor.pairs(symbol) if batch_trained else [])
+            + (self.online_predictor.pairs(symbol) if self.online_predictor else [])
+        })
+        if not requests:
+            return None
+
+        predictor = self.online_predictor or ml_predictor
+        preds = predictor.predict_batch(
+            requests, {symbol: self.detector.features.latest(
+                symbol, ml_predictor.feature_names(symbol) if ml_predictor else None
+            ) for symbol in SYMBOLS}
+        )
+        return [(*request, pred) for request, pred in zip(requests, preds)]
 
-                for ex1 in exchanges:
-                    for ex2 in exchanges:
-                        if ex1 == ex2:
-                            row.append(0)
-                        else:
-                            key = f"{ex1}->{ex2}"
-                            if key in spreads:
-                                row.append(spreads[key].get('current', 0))
-                            else:
-                                row.append(0)
-                spread_matrix.append(row)
-
-            fig = go.Figure(data=go.Heatmap(
-                z=spread_matrix,
-                x=exchanges * len(exchanges),
-                y=symbols,
-                colorscale='RdYlGn',
-                zmid=0,
-                text=[[f"{val:.2f}%" for val in row] for row in spread_matrix],
-                texttemplate="%{text}",
-                textfont={"size": 10},
-                hovertemplate="<b>%{y}</b><br>Spread: %{z:.2f}%<extra></extra>"
-            ))
+    def _render_best_opportunity(self, snapshot: DashboardSnapshot):
+        best = snapshot['best']
 
-            fig.update_layout(
-                template="plotly_dark",
-                height=300,
-                xaxis_title="Exchange",
-                yaxis_title="Symbol"
+        if not best:
+            return dbc.Alert(
+                "⏳ Monitoring exchanges... No opportunities detected yet.",
+                color="secondary"
             )
 
-            return fig
+        return dbc.Alert([
+            html.H4("🎯 BEST OPPORTUNITY", className="alert-heading"),
+            html.Hr(),
+            html.P([
+                html.Strong(f"{best.symbol}: "),
+                f"Buy on {best.buy_exchange} @ ${best.buy_price:.2f} → ",
+                f"Sell on {best.sell_exchange} @ ${best.sell_price:.2f}"
+            ]),
+            html.P([
+                html.Strong("Profit after fees: "),
+                html.Span(f"{best.profit_after_fees:.2f}%", className="text-success fs-4"),
+                f" (spread: {best.spread_pct:.2f}%)"
+            ]),
+            html.Small(f"Detected: {best.timestamp.strftime('%H:%M:%S')}")
+        ], color="success", className="mb-0")
+
+    def _price_chart(self, selected_symbol: str):
+        """
+        Full price chart of a symbol, with the chart-state the page keeps to extend it.
+
+        chart-state: {'symbol', 'exchanges': trace order, 'last': {exchange:
+        ISO timestamp of its newest bar on the chart}}
+        """
+        # Bar closes of the selected symbol, one row per exchange per bar
+        df = self.detector.get_historical_data(selected_symbol, limit=self.chart_bars * len(CHART_COLORS))
+        exchanges = list(df['exchange'].unique()) if not df.empty else []
+        last = df.groupby('exchange')['timestamp'].max() if not df.empty else {}
+        chart = {
+            'symbol': selected_symbol,
+            'exchanges': exchanges,
+            'last': {exchange: last[exchange].isoformat() for exchange in exchanges},
+        }
+        return self._render_price_chart(df, selected_symbol), dash.no_update, chart
+
+    def _extend_price_chart(self, chart: Dict):
+        """
+        extendData appending the bars closed since the page's chart-state.
+
+        The browser drops points beyond chart_bars per trace (maxPoints), so
+        the payload and the work here grow with the new bars, not the window.
+        A bar from an exchange the chart has no trace for yet redraws it.
+        """
+        last = {exchange: datetime.fromisoformat(ts) for exchange, ts in chart['last'].items()}
+        bars = self.detector.get_bars_after(chart['symbol'], last)
+        if not bars:
+            return dash.no_update, dash.no_update, dash.no_update
+        if any(bar['exchange'] not in last for bar in bars):
+            return self._price_chart(chart['symbol'])
+
+        x = {exchange: [] for exchange in chart['exchanges']}
+        y = {exchange: [] for exchange in chart['exchanges']}
+        for bar in bars:
+            x[bar['exchange']].append(bar['timestamp'])
+            y[bar['exchange']].append(bar['price'])
+            last[bar['exchange']] = bar['timestamp']
+
+        traces = [i for i, exchange in enumerate(chart['exchanges']) if x[exchange]]
+        extend = {
+            'x': [x[chart['exchanges'][i]][-self.chart_bars:] for i in traces],
+            'y': [y[chart['exchanges'][i]][-self.chart_bars:] for i in traces],
+        }
+        chart = dict(chart, last={exchange: ts.isoformat() for exchange, ts in last.items()})
+        return dash.no_update, [extend, traces, self.chart_bars], chart
+
+    def _render_price_chart(self, df: pd.DataFrame, selected_symbol: str):
+        fig = go.Figure()
+
+        # Bar closes of the selected symbol, one row per exchange per bar
+        if not df.empty:
+            for exchange in df['exchange'].unique():
+                ex_df = df[df['exchange'] == exchange]
+
+                fig.add_trace(go.Scatter(
+                    x=ex_df['timestamp'],
+                    y=ex_df['price'],
+                    mode='lines',
+                    name=f"{exchange}",
+                    line=dict(color=CHART_COLORS.get(exchange, '#FFFFFF'), width=2),
+                    hovertemplate=f"<b>{exchange}</b><br>" +
+                                "Price: $%{y:.2f}<br>" +
+                                "<extra></extra>"
+                ))
+
+        # Get symbol name for title
+        symbol_names = {
+            'BTC-USD': 'Bitcoin',
+            'ETH-USD': 'Ethereum',
+            'SOL-USD': 'Solana'
+        }
 
-        @self.app.callback(
-            Output("ml-predictions", "children"),
-            Input("interval-component", "n_intervals")
+        fig.update_layout(
+            template="plotly_dark",
+            height=400,
+            title=dict(
+                text=f"{symbol_names.get(selected_symbol, selected_symbol)} Price Comparison",
+                x=0.5,
+                xanchor='center'
+            ),
+            xaxis_title="Time",
+            yaxis_title="Price (USD)",
+            hovermode='x unified',
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
         )
-        def update_ml_predictions(n):
-            if not self.ml_predictor or not self.ml_predictor.is_trained:
-                return html.P(
-                    "⚙️ ML model training in progress... (need ~5 min of data)",
-                    className="text-muted"
-                )
 
-            predictions = []
-            symbols = ['BTC-USD', 'ETH-USD', 'SOL-USD']
-
-            for symbol in symbols:
-                df = self.detector.get_historical_data(symbol)
-                if not df.empty:
-                    pred = self.ml_predictor.predict_spread(df)
-                    if pred is not None:
-                        predictions.append(
-                            dbc.ListGroupItem([
-                                html.Strong(f"{symbol}: "),
-                                f"Predicted spread in 30s: ",
-                                html.Span(
-                                    f"{pred:.2f}%",
-                                    className="text-success" if pred > 0.5 else "text-danger"
-                                )
-                            ])
-                        )
+        return fig
+
+    def _render_opportunities_table(self, snapshot: DashboardSnapshot):
+        recent_opps = snapshot['recent']
+
+        if not recent_opps:
+            return html.P("No opportunities detected yet...", className="text-muted")
+
+        # Sort by profit
+        recent_opps = sorted(
+            recent_opps,
+            key=lambda x: x.profit_after_fees,
+            reverse=True
+        )[:20]  # Top 20
+
+        table_header = [
+            html.Thead(html.Tr([
+                html.Th("Time"),
+                html.Th("Symbol"),
+                html.Th("Buy"),
+                html.Th("Sell"),
+                html.Th("Spread"),
+                html.Th("Profit"),
+                html.Th("ML Score"),
+            ]))
+        ]
+
+        rows = []
+        for opp in recent_opps:
+            rows.append(html.Tr([
+                html.Td(opp.timestamp.strftime("%H:%M:%S")),
+                html.Td(opp.symbol),
+                html.Td(f"{opp.buy_exchange} ${opp.buy_price:.2f}"),
+                html.Td(f"{opp.sell_exchange} ${opp.sell_price:.2f}"),
+                html.Td(f"{opp.spread_pct:.2f}%"),
+                html.Td(
+                    f"{opp.profit_after_fees:.2f}%",
+                    className="text-success fw-bold"
+                ),
+                html.Td(f"{opp.confidence_score:.2f}" if opp.confidence_score else "-"),
+            ]))
+
+        table_body = [html.Tbody(rows)]
+
+        return dbc.Table(
+            table_header + table_body,
+            bordered=True,
+            hover=True,
+            responsive=True,
+            striped=True,
+            className="mb-0"
+        )
 
-            if not predictions:
-                return html.P("No predictions available yet...", className="text-muted")
+    def _render_spread_heatmap(self, snapshot: DashboardSnapshot):
+        """Create heatmap of spreads between exchanges."""
+        exchanges = ['Coinbase', 'Binance', 'Bitstamp']
+
+        # Calculate current spreads
+        spread_matrix = []
+
+        for symbol in SYMBOLS:
+            spreads = snapshot['spreads'][symbol]
+            row = []
+
+            for ex1 in exchanges:
+                for ex2 in exchanges:
+                    if ex1 == ex2:
+                        row.append(0)
+                    else:
+                        key = f"{ex1}->{ex2}"
+                        if key in spreads:
+                            row.append(spreads[key].get('current', 0))
+                        else:
+                            row.append(0)
+            spread_matrix.append(row)
+
+        fig = go.Figure(data=go.Heatmap(
+            z=spread_matrix,
+            x=exchanges * len(exchanges),
+            y=SYMBOLS,
+            colorscale='RdYlGn',
+            zmid=0,
+            text=[[f"{val:.2f}%" for val in row] for row in spread_matrix],
+            texttemplate="%{text}",
+            textfont={"size": 10},
+            hovertemplate="<b>%{y}</b><br>Spread: %{z:.2f}%<extra></extra>"
+        ))
+
+        fig.update_layout(
+            template="plotly_dark",
+            height=300,
+            xaxis_title="Exchange",
+            yaxis_title="Symbol"
+        )
 
-            return dbc.ListGroup(predictions)
+        return fig
 
-        @self.app.callback(
-            Output("backtest-results", "children"),
-            Input("interval-component", "n_intervals")
-        )
-        def update_backtest_results(n):
-            """Run backtest on recent opportunities."""
-            from arbitrage_detector import BacktestEngine
+    def _render_ml_predictions(self, snapshot: DashboardSnapshot):
+        if snapshot['predictions'] is None:
+            return html.P(
+                "⚙️ ML model training in progress... (need ~5 min of data)",
+                className="text-muted"
+            )
 
-            backtest = BacktestEngine(initial_capital=10000)
-            recent_opps = self.detector.get_recent_opportunities(minutes=60)
+        predictions = []
+        for symbol, ex1, ex2, pred in snapshot['predictions']:
+            if not np.isnan(pred):
+                predictions.append(
+                    dbc.ListGroupItem([
+                        html.Strong(f"{symbol} {ex1}→{ex2}: "),
+                        # The models predict the spread one bar ahead
+                        f"Predicted spread in {BAR_INTERVAL_SECONDS:g}s: ",
+                        html.Span(
+                            f"{pred:.2f}%",
+                            className="text-success" if pred > 0.5 else "text-danger"
+                        )
+                    ])
+                )
+
+        if not predictions:
+            return html.P("No predictions available yet...", className="text-muted")
+
+        info = snapshot['model_info']
+        if 'train_seconds' in info:
+            predictions.append(dbc.ListGroupItem(
+                f"Model v{info['version']} · retrained on {info['n_rows']:,} rows "
+                f"in {info['train_seconds']:.1f}s · {info['accepted']} pair models updated",
+                className="text-muted small"
+            ))
+        elif 'registry_version' in info:
+            window = info.get('window') or {}
+            predictions.append(dbc.ListGroupItem(
+                f"Model {info['registry_version']} ({info.get('source') or 'unknown'}) · "
+                f"trained on {window.get('start', '?')} to {window.get('end', '?')}",
+                className="text-muted small"
+            ))
 
-            for opp in recent_opps:
-                backtest.execute_opportunity(opp)
+        return dbc.ListGroup(predictions)
 
-            results = backtest.get_results()
+    def _render_backtest_results(self, snapshot: DashboardSnapshot):
+        """Backtest of the last hour's opportunities."""
+        results = snapshot['backtest']
 
-            if results['total_trades'] == 0:
-                return html.P("No trades to backtest yet...", className="text-muted")
+        if results['total_trades'] == 0:
+            return html.P("No trades to backtest yet...", className="text-muted")
 
-            return dbc.Row([
-                dbc.Col([
-                    html.P([
-                        html.Strong("Total Trades: "),
-                        str(results['total_trades'])
-                    ]),
-                    html.P([
-                        html.Strong("Win Rate: "),
-                        f"{results['win_rate']:.1f}%"
-                    ]),
+        return dbc.Row([
+            dbc.Col([
+                html.P([
+                    html.Strong("Total Trades: "),
+                    str(results['total_trades'])
                 ]),
-                dbc.Col([
-                    html.P([
-                        html.Strong("Total Return: "),
-                        html.Span(
-                            f"${results['total_return']:.2f} ({results['total_return_pct']:.2f}%)",
-                            className="text-success" if results['total_return'] > 0 else "text-danger"
-                        )
-                    ]),
-                    html.P([
-                        html.Strong("Avg Profit/Trade: "),
-                        f"${results['avg_profit_per_trade']:.2f}"
-                    ]),
+                html.P([
+                    html.Strong("Win Rate: "),
+                    f"{results['win_rate']:.1f}%"
                 ]),
-            ])
+            ]),
+            dbc.Col([
+                html.P([
+                    html.Strong("Total Return: "),
+                    html.Span(
+                        f"${results['total_return']:.2f} ({results['total_return_pct']:.2f}%)",
+                        className="text-success" if results['total_return'] > 0 else "text-danger"
+                    )
+                ]),
+                html.P([
+                    html.Strong("Avg Profit/Trade: "),
+                    f"${results['avg_profit_per_trade']:.2f}"
+                ]),
+            ]),
+        ])
 
     def run(self, host='0.0.0.0', port=8050, debug=False):
         """Start the dashboard server."""
         logger.info(f"Starting dashboard on http://{host}:{port}")
+        self.snapshots.start()
         self.app.run(host=host, port=port, debug=debug)
@@ -0,0 +1,229 @@
+"""Online drift monitoring for the live spread models and drift-triggered retraining."""
+import math
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from feature_engine import current_spread
+
+
+# Bins per feature for population stability (deciles of the training data)
+PSI_BINS = 10
+
+# Floor for bin shares so empty bins do not make the PSI infinite
+PSI_EPSILON = 1e-4
+
+# Features left out of PSI: price levels wander out of any training window and
+# clock features cover a few values per window, so both drift by construction
+DRIFT_EXEMPT_FEATURES = ('_price', '_price_ma_5', '_price_ma_20', '_hour', '_minute')
+
+
+def reference_profile(X: np.ndarray, bins: int = PSI_BINS) -> Dict[str, np.ndarray]:
+    """
+    Per-feature bin edges and bin shares of a training matrix.
+
+    Returns:
+        {'edges': (n_features, bins - 1) interior quantile edges,
+         'expected': (n_features, bins) share of training rows per bin}
+    """
+    X = np.asarray(X, dtype=np.float64)
+    edges = np.nanquantile(X, np.linspace(0, 1, bins + 1)[1:-1], axis=0).T
+    binned = bin_rows(X, edges)
+    expected = np.stack([np.bincount(binned[:, j], minlength=bins) for j in range(X.shape[1])])
+    return {'edges': edges, 'expected': expected / max(len(X), 1)}
+
+
+def bin_rows(X: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Bin index of every value of X (rows × features) given per-feature edges."""
+    return (np.asarray(X)[..., None] > edges).sum(axis=-1)
+
+
+def psi(actual: np.ndarray, expected: np.ndarray) -> np.ndarray:
+    """Population stability index per feature from (features × bins) shares."""
+    actual = np.maximum(actual, PSI_EPSILON)
+    expected = np.maximum(expected, PSI_EPSILON)
+    return ((actual - expected) * np.log(actual / expected)).sum(axis=1)
+
+
+class DriftMonitor:
+    """
+    Realized-vs-predicted error and feature drift of the served spread models.
+
+    Each symbol is sampled at most every sample_seconds from the live feature
+    engine. The pair predictions made at one sample are scored against the
+    spreads realized at the next, and each sample's features are binned against
+    the deciles the serving model was trained on, so both the error and the
+    population stability index (PSI) of every feature are kept up to date over
+    a sliding window of samples at O(features) cost per sample.
+
+    Retraining is due when a symbol's mean feature PSI exceeds psi_threshold
+    (the maximum over dozens of autocorrelated rolling features is noisy even
+    on a stationary market) or a pair's recent error exceeds error_ratio × the
+    error it had right after it was swapped in. It is also rate limited.
+    Retrains are spaced at least min_interval apart. A retrain that took T
+    seconds is followed by at least T / cpu_budget seconds without one, so
+    training uses at most cpu_budget of one core.
+    """
+
+    def __init__(self, handle, features, sample_seconds: float = 1.0, window: int = 300,
+                 min_samples: int = 100, psi_threshold: float = 0.25, error_ratio: float = 2.0,
+                 min_interval: float = 120.0, cpu_budget: float = 0.25,
+                 ignore: Tuple[str, ...] = DRIFT_EXEMPT_FEATURES):
+        """
+        Args:
+            handle: ModelHandle serving the SpreadModelSet
+            features: IncrementalFeatureEngine with the live features
+            sample_seconds: Minimum time between samples of a symbol
+            window: Samples per symbol (and errors per pair) kept
+            min_samples: Samples needed before drift is judged
+            psi_threshold: Mean feature PSI that triggers retraining (0.25 = major shift)
+            error_ratio: Recent / post-swap error ratio that triggers retraining
+            min_interval: Minimum seconds between retrains
+            cpu_budget: Maximum share of wall time spent retraining
+            ignore: Feature suffixes excluded from PSI
+        """
+        self.handle = handle
+        self.features = features
+        self.sample_seconds = sample_seconds
+        self.window = window
+        self.min_samples = min_samples
+        self.psi_threshold = psi_threshold
+        self.error_ratio = error_ratio
+        self.min_interval = min_interval
+        self.cpu_budget = cpu_budget
+        self.ignore = ignore
+        self.next_retrain = 0.0  # time.monotonic() before which no retrain is allowed
+        self._reset(handle.version)
+
+    def _reset(self, version: int):
+        """Drop all state tied to the previously served models."""
+        self._version = version
+        self._last_sample: Dict[str, float] = {}
+        self._pending: Dict[str, Dict[Tuple[str, str], float]] = {}  # {symbol: {pair: prediction}}
+        self._errors: Dict[tuple, deque] = {}      # {(symbol, ex1, ex2): squared errors}
+        self._baseline: Dict[tuple, float] = {}    # First full window's mean squared error
+        self._profiles: Dict[str, Optional[tuple]] = {}  # {symbol: (names, edges, expected)}
+        self._binned: Dict[str, deque] = {}        # {symbol: bin index rows}
+        self._counts: Dict[str, np.ndarray] = {}   # {symbol: (features × bins) counts}
+
+    def observe(self, symbol: str, now: Optional[float] = None):
+        """Sample symbol's latest features if sample_seconds have passed (call on every tick)."""
+        now = time.monotonic() if now is None else now
+        if self.handle.version != self._version:
+            self._reset(self.handle.version)
+        if now - self._last_sample.get(symbol, -math.inf) < self.sample_seconds:
+            return
+        self._last_sample[symbol] = now
+
+        models = self.handle.get()
+        if models is None or not models.is_trained:
+            return
+
+        latest = self.features.latest(symbol, models.feature_names(symbol))
+        if latest is None:
+            return
+
+        # Ground truth for the previous sample's predictions
+        for (ex1, ex2), predicted in self._pending.pop(symbol, {}).items():
+            realized = current_spread(latest, ex1, ex2)
+            if not math.isnan(realized):
+                self._add_error((symbol, ex1, ex2), (realized - predicted) ** 2)
+
+        pairs = models.pairs(symbol)
+        predictions = models.predict_batch([(symbol, ex1, ex2) for ex1, ex2 in pairs], {symbol: latest})
+        self._pending[symbol] = {
+            pair: float(prediction) for pair, prediction in zip(pairs, predictions)
+            if not math.isnan(prediction)
+        }
+
+        if pairs:
+            self._add_features(symbol, models.models[(symbol, *pairs[0])], latest)
+
+    def _add_error(self, key: tuple, squared_error: float):
+        errors = self._errors.get(key)
+        if errors is None:
+            errors = self._errors[key] = deque(maxlen=self.window)
+        errors.append(squared_error)
+        if key not in self._baseline and len(errors) == self.window:
+            self._baseline[key] = sum(errors) / len(errors)
+
+    def _add_features(self, symbol: str, model, latest: Dict[str, float]):
+        if symbol not in self._profiles:
+            profile = getattr(model, 'feature_profile', None)
+            if profile is None:
+                self._profiles[symbol] = None  # Model trained without a profile
+                return
+            keep = [j for j, name in enumerate(model.feature_names) if not name.endswith(self.ignore)]
+            names = [model.feature_names[j] for j in keep]
+            expected = np.asarray(profile['expected'])[keep]
+            self._profiles[symbol] = (names, np.asarray(profile['edges'])[keep], expected)
+            self._binned[symbol] = deque()
+            self._counts[symbol] = np.zeros(expected.shape)
+
+        profile = self._profiles[symbol]
+        if profile is None:
+            return
+        names, edges, _ = profile
+
+        row = bin_rows(np.array([latest.get(name, 0.0) for name in names]), edges)
+        columns = np.arange(len(names))
+        counts, binned = self._counts[symbol], self._binned[symbol]
+        counts[columns, row] += 1
+        binned.append(row)
+        if len(binned) > self.window:
+            counts[columns, binned.popleft()] -= 1
+
+    def feature_psi(self, symbol: str) -> Dict[str, float]:
+        """PSI of each monitored feature of symbol over the current window."""
+        profile = self._profiles.get(symbol)
+        if profile is None or len(self._binned[symbol]) < self.min_samples:
+            return {}
+        names, _, expected = profile
+        values = psi(self._counts[symbol] / len(self._binned[symbol]), expected)
+        return dict(zip(names, values.tolist()))
+
+    def error_ratios(self) -> Dict[tuple, float]:
+        """Recent / post-swap mean squared error per (symbol, ex1, ex2)."""
+        return {
+            key: (sum(errors) / len(errors)) / self._baseline[key]
+            for key, errors in self._errors.items()
+            if key in self._baseline and self._baseline[key] > 0
+        }
+
+    def drift(self) -> List[str]:
+        """Reasons to retrain, one per symbol or pair over its threshold."""
+        reasons = []
+        for symbol in self._profiles:
+            values = self.feature_psi(symbol)
+            if values and np.mean(list(values.values())) > self.psi_threshold:
+                name, worst = max(values.items(), key=lambda item: item[1])
+                reasons.append(
+                    f"{symbol} mean PSI {np.mean(list(values.values())):.2f} (worst {name} {worst:.2f})"
+                )
+        for (symbol, ex1, ex2), ratio in self.error_ratios().items():
+            if ratio > self.error_ratio:
+                reasons.append(f"{symbol} {ex1}->{ex2} error {ratio:.1f}x post-swap")
+        return reasons
+
+    def should_retrain(self, now: Optional[float] = None) -> Optional[str]:
+        """Why the spread models should be retrained now, or None."""
+        now = time.monotonic() if now is None else now
+        if now < self.next_retrain:
+            return None
+
+        models = self.handle.get()
+        if models is None or not models.is_trained:
+            return "no trained spread models"
+
+        reasons = self.drift()
+        return "; ".join(reasons) if reasons else None
+
+    def record_retrain(self, train_seconds: float, now: Optional[float] = None):
+        """Start the minimum interval / CPU budget wait after a retrain attempt."""
+        now = time.monotonic() if now is None else now
+        wait = max(self.min_interval, train_seconds / self.cpu_budget)
+        self.next_retrain = now + wait
+        logger.info(f"Next spread-model retrain allowed in {wait:.0f}s at the earliest")
@@ -0,0 +1,371 @@
+"""Spread-prediction features: vectorized batch kernel and incremental per-row state."""
+import math
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import PriceData
+
+
+# Per-exchange feature columns produced by SpreadPredictor.engineer_features
+EXCHANGE_FEATURES = [
+    'price', 'price_change', 'price_ma_5', 'price_ma_20',
+    'price_std_5', 'volatility', 'bid_ask_spread', 'volume_ma',
+    'hour', 'minute'
+]
+
+# engineer_features skips exchanges with fewer buffered rows than this
+MIN_EXCHANGE_ROWS = 10
+
+# Longest window; an exchange's price_ma_20 only exists once this many rows are buffered
+LONGEST_WINDOW = 20
+
+
+def _mean(window: deque) -> float:
+    return sum(window) / len(window)
+
+
+def _std(window: deque) -> float:
+    """Sample standard deviation (ddof=1), two-pass like a fresh rolling window."""
+    mean = sum(window) / len(window)
+    return math.sqrt(sum((v - mean) ** 2 for v in window) / (len(window) - 1))
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    """Float division with NumPy semantics for a zero denominator."""
+    if denominator == 0:
+        if numerator == 0 or numerator != numerator:
+            return math.nan
+        return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+    return numerator / denominator
+
+
+def current_spread(latest: Dict[str, float], ex1: str, ex2: str) -> float:
+    """
+    Spread (%) of ex2 over ex1 in a latest feature row, NaN if either price is missing.
+
+    This is the quantity a pair model trained on next_spread predicts one
+    step ahead, so it is the ground truth for the previous step's prediction.
+    """
+    p1 = latest.get(f"{ex1}_price")
+    p2 = latest.get(f"{ex2}_price")
+    if not p1 or p2 is None:
+        return math.nan
+    return (p2 - p1) / p1 * 100
+
+
+def _rolling(values: np.ndarray, window: int, reduce: str) -> np.ndarray:
+    """
+    Trailing rolling mean or sample std along axis 0 of a (ticks × exchanges) array.
+
+    Like pandas rolling(window) with the default min_periods: the first
+    window - 1 rows and every window holding a NaN are NaN. Each window is
+    summed directly from window shifted slices (contiguous vector adds, no
+    running sums), and the std is the exact two-pass one; a cumulative-sum
+    variance would lose all precision on price-level values.
+    """
+    out = np.full(values.shape, np.nan)
+    n = len(values) - window + 1
+    if n <= 0:
+        return out
+
+    mean = values[:n].copy()
+    for k in range(1, window):
+        mean += values[k:k + n]
+    mean /= window
+    if reduce == 'mean':
+        out[window - 1:] = mean
+        return out
+
+    squares = np.zeros_like(mean)
+    for k in range(window):
+        deviation = values[k:k + n] - mean
+        squares += deviation * deviation
+    out[window - 1:] = np.sqrt(squares / (window - 1))
+    return out
+
+
+def _forward_fill(matrix: np.ndarray):
+    """Forward-fill NaNs down each column of a 2-D array, in place (cheap if there are none)."""
+    rows = np.arange(len(matrix))
+    missing = np.isnan(matrix)
+    leading = np.argmax(~missing, axis=0)
+    for j in np.flatnonzero(missing.sum(axis=0) > leading):  # Skip columns with only leading NaNs
+        column = matrix[:, j]
+        filled = np.where(np.isnan(column), 0, rows)
+        np.maximum.accumulate(filled, out=filled)
+        matrix[:, j] = column[filled]
+
+
+def batch_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-exchange features of a symbol's raw price rows, one row per timestamp.
+
+    Vectorized equivalent of building each exchange's rolling features
+    separately and outer-merging them on timestamp. Rolling windows run over
+    each exchange's own rows, not over wall-clock time: the rows are laid out
+    as a (ticks × exchanges) array, one column per exchange, and every window
+    is computed for all exchanges at once. Each timestamp's row then holds
+    every exchange's latest tick so far, with missing values forward-filled,
+    from the first row where every exchange has a complete feature set
+    (merge + ffill + dropna, without the merges). Exchanges with fewer than
+    MIN_EXCHANGE_ROWS rows are left out; if an exchange has several rows at
+    one timestamp, the last one wins.
+
+    Args:
+        df: Raw rows of one symbol with timestamp, exchange and price columns,
+            and optionally bid, ask and volume
+
+    Returns:
+        DataFrame with a sorted timestamp column followed by
+        f"{exchange}_{feature}" columns (EXCHANGE_FEATURES per exchange,
+        exchanges in order of first appearance) backed by one contiguous
+        float64 matrix, or an empty DataFrame if no exchange has enough rows
+    """
+    if df.empty:
+        return pd.DataFrame()
+
+    timestamps = df['timestamp']
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps)
+    tz = getattr(timestamps.dtype, 'tz', None)
+    nanos = timestamps.to_numpy(dtype='datetime64[ns]').view(np.int64) if tz is None else \
+        timestamps.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy().view(np.int64)
+    order = np.argsort(nanos, kind='stable')
+    nanos = nanos[order]
+
+    # Exchange codes numbered in order of first appearance in time
+    codes, exchanges = pd.factorize(df['exchange'].to_numpy())
+    codes = codes[order]
+    first = np.full(len(exchanges), len(codes))
+    np.minimum.at(first, codes, np.arange(len(codes)))
+    rank = np.empty(len(exchanges), dtype=np.int64)
+    rank[np.argsort(first)] = np.arange(len(exchanges))
+    codes = rank[codes]
+    exchanges = np.asarray(exchanges)[np.argsort(first)]
+
+    counts = np.bincount(codes, minlength=len(exchanges))
+    kept = np.flatnonzero(counts >= MIN_EXCHANGE_ROWS)
+    if not len(kept):
+        return pd.DataFrame()
+    if len(kept) < len(exchanges):
+        keep = np.isin(codes, kept)
+        order, codes, nanos = order[keep], codes[keep], nanos[keep]
+    columns = np.searchsorted(kept, codes)
+    counts = counts[kept]
+    n_exchanges = len(kept)
+
+    # Row position of every tick within its own exchange
+    by_exchange = np.argsort(columns, kind='stable')
+    positions = np.empty(len(columns), dtype=np.int64)
+    positions[by_exchange] = np.arange(len(columns)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    def ticks(name: str) -> np.ndarray:
+        """(ticks × exchanges) array of a raw column, NaN past each exchange's last row."""
+        out = np.full((counts.max(), n_exchanges), np.nan)
+        out[positions, columns] = df[name].to_numpy(dtype=np.float64)[order]
+        return out
+
+    # Distinct timestamps; time_codes maps every tick to its row
+    new_time = np.empty(len(nanos), dtype=bool)
+    new_time[0] = True
+    np.not_equal(nanos[1:], nanos[:-1], out=new_time[1:])
+    time_codes = np.cumsum(new_time) - 1
+    times = pd.DatetimeIndex(nanos[new_time])
+    if tz is not None:
+        times = times.tz_localize('UTC').tz_convert(tz)
+
+    # Features of every tick as (ticks × exchanges) arrays, in EXCHANGE_FEATURES order
+    price = ticks('price')
+    change = np.full(price.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change[1:] = price[1:] / price[:-1] - 1
+    if 'bid' in df.columns and 'ask' in df.columns:
+        bid = ticks('bid')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bid_ask_spread = (ticks('ask') - bid) / bid
+    else:
+        bid_ask_spread = np.zeros(price.shape)
+    hour, minute = np.zeros(price.shape), np.zeros(price.shape)
+    hour[positions, columns] = times.hour.to_numpy()[time_codes]
+    minute[positions, columns] = times.minute.to_numpy()[time_codes]
+    features = [
+        price,
+        change,
+        _rolling(price, 5, 'mean'),
+        _rolling(price, LONGEST_WINDOW, 'mean'),
+        _rolling(price, 5, 'std'),
+        _rolling(change, 10, 'std'),
+        bid_ask_spread,
+        _rolling(ticks('volume'), 5, 'mean') if 'volume' in df.columns else np.zeros(price.shape),
+        hour,
+        minute,
+    ]
+    for values in features:
+        _forward_fill(values)
+
+    # Outer merge + ffill: each timestamp shows every exchange's latest tick so far
+    n_features = len(EXCHANGE_FEATURES)
+    tick_times = time_codes[by_exchange]
+    bounds = np.concatenate(([0], np.cumsum(counts)))
+    blocks, latest, start = [], [], 0
+    for column in range(n_exchanges):
+        block = np.stack([values[:counts[column], column] for values in features], axis=1)
+        complete = np.flatnonzero(~np.isnan(block).any(axis=1))
+        if not len(complete):
+            return pd.DataFrame()
+        segment = tick_times[bounds[column]:bounds[column + 1]]
+        start = max(start, segment[complete[0]])
+        blocks.append(block)
+        latest.append(np.cumsum(np.bincount(segment, minlength=len(times))) - 1)
+    del features
+
+    matrix = np.empty((len(times) - start, n_exchanges * n_features))
+    for column, (block, last) in enumerate(zip(blocks, latest)):
+        matrix[:, column * n_features:(column + 1) * n_features] = block[last[start:]]
+
+    names = [f"{exchange}_{name}" for exchange in exchanges[kept] for name in EXCHANGE_FEATURES]
+    result = pd.DataFrame(matrix, columns=names, copy=False)
+    result.insert(0, 'timestamp', times[start:])
+    return result
+
+
+class ExchangeFeatureState:
+    """Fixed-size rolling windows for one exchange of one symbol."""
+
+    __slots__ = ('prices', 'recent', 'changes', 'volumes', 'buffered', 'seen',
+                 'bid_ask_spread', 'bid_ask_seq', 'hour', 'minute')
+
+    def __init__(self):
+        self.prices = deque(maxlen=LONGEST_WINDOW)
+        self.recent = deque(maxlen=5)
+        self.changes = deque(maxlen=10)
+        self.volumes = deque(maxlen=5)
+        self.buffered = 0   # rows of this exchange still in the detector's buffer
+        self.seen = 0       # rows ever received
+        self.bid_ask_spread = math.nan
+        self.bid_ask_seq = 0
+        self.hour = 0
+        self.minute = 0
+
+    def update(self, price_data: PriceData):
+        if self.prices:
+            self.changes.append(_ratio(price_data.price, self.prices[-1]) - 1)
+        self.prices.append(price_data.price)
+        self.recent.append(price_data.price)
+        self.volumes.append(price_data.volume)
+        self.seen += 1
+        self.buffered += 1
+
+        # A NaN spread (bid = ask = 0) is forward-filled from the last valid one
+        spread = _ratio(price_data.ask - price_data.bid, price_data.bid)
+        if spread == spread:
+            self.bid_ask_spread = spread
+            self.bid_ask_seq = self.seen
+
+        self.hour = price_data.timestamp.hour
+        self.minute = price_data.timestamp.minute
+
+    def ready(self) -> bool:
+        """True once every feature is defined (see features)."""
+        return self.buffered >= LONGEST_WINDOW and self.bid_ask_seq > self.seen - self.buffered
+
+    def features(self, names: Iterable[str] = EXCHANGE_FEATURES) -> Optional[List[float]]:
+        """Current values of names (EXCHANGE_FEATURES entries), or None while any feature is undefined."""
+        if not self.ready():
+            return None
+        return [_FEATURE_GETTERS[name](self) for name in names]
+
+
+# How ExchangeFeatureState computes each of EXCHANGE_FEATURES; only the
+# requested ones are evaluated
+_FEATURE_GETTERS = {
+    'price': lambda state: state.prices[-1],
+    'price_change': lambda state: state.changes[-1],
+    'price_ma_5': lambda state: _mean(state.recent),
+    'price_ma_20': lambda state: _mean(state.prices),
+    'price_std_5': lambda state: _std(state.recent),
+    'volatility': lambda state: _std(state.changes),
+    'bid_ask_spread': lambda state: state.bid_ask_spread,
+    'volume_ma': lambda state: _mean(state.volumes),
+    'hour': lambda state: state.hour,
+    'minute': lambda state: state.minute,
+}
+
+
+@lru_cache(maxsize=64)
+def _features_by_exchange(names: Tuple[str, ...]) -> Dict[str, Tuple[str, ...]]:
+    """{exchange: EXCHANGE_FEATURES entries} wanted by f"{exchange}_{feature}" column names."""
+    wanted: Dict[str, Dict[str, None]] = {}
+    for name in names:
+        exchange, feature = name.split('_', 1)
+        if feature in _FEATURE_GETTERS:
+            wanted.setdefault(exchange, {'price': None})[feature] = None
+    return {exchange: tuple(features) for exchange, features in wanted.items()}
+
+
+class IncrementalFeatureEngine:
+    """
+    Latest SpreadPredictor feature row per symbol, maintained row by row.
+
+    Equivalent to the last row of SpreadPredictor.engineer_features over the
+    detector's bar buffer, but each bar only updates fixed-size windows for
+    its own exchange instead of recomputing every rolling window over the whole
+    buffer. The owner of the buffer reports evictions so exchanges drop out
+    (and back in) exactly as they would in the batch features. Per-exchange
+    rows (bars, or raw ticks) are assumed to arrive in timestamp order.
+    """
+
+    def __init__(self):
+        self._states: Dict[str, Dict[str, ExchangeFeatureState]] = {}
+
+    def update(self, price_data: PriceData):
+        """Fold one row (a PriceData tick or a Bar) into its exchange's windows."""
+        exchanges = self._states.setdefault(price_data.symbol, {})
+        state = exchanges.get(price_data.exchange)
+        if state is None:
+            state = exchanges[price_data.exchange] = ExchangeFeatureState()
+        state.update(price_data)
+
+    def evict(self, symbol: str, exchange: str):
+        """Record that the oldest buffered row of (symbol, exchange) was dropped."""
+        state = self._states.get(symbol, {}).get(exchange)
+        if state is not None and state.buffered > 0:
+            state.buffered -= 1
+
+    def latest(self, symbol: str, names: Optional[Iterable[str]] = None) -> Optional[Dict[str, float]]:
+        """
+        Latest features as {f"{exchange}_{feature}": value}.
+
+        Args:
+            symbol: Symbol to read
+            names: Only compute these columns (e.g. SpreadModelSet.feature_names),
+                plus every exchange's price, which realized spreads are read
+                from; None computes them all
+
+        Returns None where engineer_features would produce no complete row,
+        whichever columns are requested.
+        """
+        wanted = None if names is None else _features_by_exchange(tuple(names))
+        latest = {}
+        for exchange, state in self._states.get(symbol, {}).items():
+            if state.buffered < MIN_EXCHANGE_ROWS:
+                continue
+            features = EXCHANGE_FEATURES if wanted is None else wanted.get(exchange, ('price',))
+            values = state.features(features)
+            if values is None:
+                return None
+            for name, value in zip(features, values):
+                latest[f"{exchange}_{name}"] = value
+
+        return latest or None
+
+    def vector(self, symbol: str, feature_names: List[str]) -> Optional[np.ndarray]:
+        """Latest features as a 1 × n row in feature_names order (missing = 0)."""
+        latest = self.latest(symbol)
+        if latest is None:
+            return None
+        return np.array([[latest.get(name, 0.0) for name in feature_names]], dtype=np.float64)
@@ -0,0 +1,309 @@
+"""Permutation-importance feature pruning for the spread models, with an inference cost report."""
+import itertools
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+
+from config import PriceData
+from feature_engine import EXCHANGE_FEATURES, LONGEST_WINDOW, IncrementalFeatureEngine
+from ml_predictor import SpreadModelSet, SpreadPredictor, time_ordered_split
+
+
+def is_pruned(feature_names: Sequence[str]) -> bool:
+    """True if feature_names is not every EXCHANGE_FEATURES column of its exchanges."""
+    exchanges = {name.split('_', 1)[0] for name in feature_names}
+    return set(feature_names) != {f"{exchange}_{feature}" for exchange in exchanges
+                                  for feature in EXCHANGE_FEATURES}
+
+
+def _mse(predictions: np.ndarray, targets: np.ndarray) -> float:
+    return float(np.mean((predictions - targets) ** 2))
+
+
+def permutation_importance(predictor: SpreadPredictor, X: np.ndarray, y: np.ndarray,
+                           n_repeats: int = 3, random_state: int = 0) -> np.ndarray:
+    """
+    Increase in MSE on (X, y) when each column is shuffled, averaged over n_repeats.
+
+    Args:
+        predictor: Trained SpreadPredictor whose feature_names are X's columns
+        X: Unscaled feature rows, time-ordered and unseen in training
+        y: Their targets
+
+    Returns:
+        One importance per column; zero or below means the model does not
+        rely on it
+    """
+    rng = np.random.default_rng(random_state)
+    scaled = (np.asarray(X, dtype=np.float64) - predictor.scaler.mean_) / predictor.scaler.scale_
+    baseline = _mse(predictor.model.predict(scaled), y)
+
+    importance = np.zeros(scaled.shape[1])
+    for j in range(scaled.shape[1]):
+        column = scaled[:, j].copy()
+        for _ in range(n_repeats):
+            scaled[:, j] = rng.permutation(column)
+            importance[j] += _mse(predictor.model.predict(scaled), y) - baseline
+        scaled[:, j] = column
+    return importance / n_repeats
+
+
+def select_features(X: np.ndarray, y: np.ndarray, feature_names: List[str], backend: str = 'gbr',
+                    model_params: Optional[Dict] = None, tolerance: float = 0.01,
+                    validation_fraction: float = 0.2, n_repeats: int = 3,
+                    min_features: int = 1) -> Dict:
+    """
+    Backward elimination by permutation importance on a time-ordered validation set.
+
+    A model is fitted on the leading rows and scored on the trailing
+    validation_fraction. Each round drops every column whose shuffling does
+    not hurt the validation MSE, or failing that the least important one,
+    refits, and keeps the smaller set while its validation MSE stays within
+    (1 + tolerance) × the full model's. Importances are recomputed after
+    every accepted drop, so of a group of redundant columns (such as the
+    per-exchange copies of hour and minute) the last one left is judged on
+    its own.
+
+    Args:
+        X: Feature matrix from SpreadPredictor.build_pair_training_set, time-ordered
+        y: One pair's next-step spread targets
+        feature_names: X's column names
+        backend: Model backend, one of SPREAD_BACKENDS
+        model_params: Overrides for the backend's default hyperparameters
+        tolerance: Accepted relative increase in validation MSE
+        validation_fraction: Trailing share of rows importances and MSEs are measured on
+        n_repeats: Shuffles per column
+        min_features: Never go below this many columns
+
+    Returns:
+        Dict with selected and dropped (in drop order) feature names, the full
+        model's importance per feature, full_mse, selected_mse and n_fits
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    train_idx, val_idx = time_ordered_split(len(X), validation_fraction)
+    X_train, y_train, X_val, y_val = X[train_idx], y[train_idx], X[val_idx], y[val_idx]
+    n_fits = 0
+
+    def fit(columns: List[int]):
+        nonlocal n_fits
+        n_fits += 1
+        predictor = SpreadPredictor(backend=backend, n_jobs=1, model_params=model_params)
+        if not predictor.fit_matrix(X_train[:, columns], y_train,
+                                    feature_names=[feature_names[j] for j in columns]):
+            return None, float('inf')
+        return predictor, _mse(predictor.model.predict(predictor.scaler.transform(X_val[:, columns])), y_val)
+
+    # The refits' per-model training logs would drown the selection's
+    logger.disable('ml_predictor')
+    try:
+        columns = list(range(X.shape[1]))
+        model, full_mse = fit(columns)
+        if model is None:
+            return {'selected': list(feature_names), 'dropped': [], 'importance': {},
+                    'full_mse': full_mse, 'selected_mse': full_mse, 'n_fits': n_fits}
+        limit = full_mse * (1 + tolerance)
+        importance = permutation_importance(model, X_val, y_val, n_repeats)
+        full_importance = dict(zip(feature_names, importance.tolist()))
+        selected_mse, dropped = full_mse, []
+
+        while len(columns) > min_features:
+            order = np.argsort(importance, kind='stable')
+            weakest = [columns[order[0]]]
+            unused = [columns[k] for k in order if importance[k] <= 0][:len(columns) - min_features]
+
+            for drop in ([unused, weakest] if len(unused) > 1 else [weakest]):
+                trial = [j for j in columns if j not in drop]
+                trial_model, trial_mse = fit(trial)
+                if trial_mse <= limit:
+                    break
+            else:
+                break
+
+            columns, model, selected_mse = trial, trial_model, trial_mse
+            dropped += [feature_names[j] for j in drop]
+            importance = permutation_importance(model, X_val[:, columns], y_val, n_repeats)
+    finally:
+        logger.enable('ml_predictor')
+
+    return {
+        'selected': [feature_names[j] for j in columns],
+        'dropped': dropped,
+        'importance': full_importance,
+        'full_mse': full_mse,
+        'selected_mse': selected_mse,
+        'n_fits': n_fits,
+    }
+
+
+def _select_pair(backend: str, model_params: Dict, X: np.ndarray, y: np.ndarray,
+                 feature_names: List[str], kwargs: Dict) -> Dict:
+    """Run select_features for one pair (runs in a worker process)."""
+    return select_features(X, y, feature_names, backend, model_params, **kwargs)
+
+
+def _model_bytes(predictor: SpreadPredictor) -> int:
+    return len(pickle.dumps((predictor.model, predictor.scaler), protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _per_call_us(function, calls: int) -> float:
+    """Median over 5 runs of the mean time of function() in microseconds."""
+    runs = []
+    for _ in range(5):
+        started = time.perf_counter()
+        for _ in range(calls):
+            function()
+        runs.append((time.perf_counter() - started) / calls * 1e6)
+    return float(np.median(runs))
+
+
+def _warm_engine(symbol: str, feature_names: Sequence[str]) -> IncrementalFeatureEngine:
+    """An engine with a full window for every exchange in feature_names (values are irrelevant to cost)."""
+    engine = IncrementalFeatureEngine()
+    exchanges = dict.fromkeys(name.split('_', 1)[0] for name in feature_names)
+    now = datetime.now(timezone.utc)
+    for i in range(LONGEST_WINDOW):
+        for exchange in exchanges:
+            price = 100.0 + i % 3
+            engine.update(PriceData(exchange, symbol, price, 1.0, now, price - 0.01, price + 0.01))
+    return engine
+
+
+def inference_report(full: SpreadModelSet, pruned: SpreadModelSet,
+                     rows: Dict[str, List[Dict[str, float]]], calls: int = 200) -> Dict:
+    """
+    Measured live inference cost of a model set before and after pruning.
+
+    Args:
+        full: Model set on every feature
+        pruned: The same pairs on their selected features
+        rows: {symbol: feature rows as {feature_name: value}} to predict on
+        calls: Calls per timing run
+
+    Returns:
+        {'pairs': {"symbol ex1->ex2": per-pair report}, 'symbols': {symbol:
+        per-symbol report}}; each value is a (full, pruned) tuple. Pairs
+        report n_features, predict_us (one predict_latest call) and
+        model_bytes (pickled model and scaler); symbols report n_features
+        and features_us (one IncrementalFeatureEngine.latest call for the
+        columns the symbol's models read)
+    """
+    report = {'pairs': {}, 'symbols': {}}
+    for key in sorted(set(full.models) & set(pruned.models)):
+        symbol, ex1, ex2 = key
+        before, after = full.models[key], pruned.models[key]
+        report['pairs'][f"{symbol} {ex1}->{ex2}"] = {
+            'n_features': (len(before.feature_names), len(after.feature_names)),
+            'predict_us': tuple(
+                _per_call_us(lambda model=model, sample=itertools.cycle(rows[symbol]):
+                             model.predict_latest(next(sample)), calls)
+                for model in (before, after)
+            ),
+            'model_bytes': (_model_bytes(before), _model_bytes(after)),
+        }
+
+    for symbol in sorted({symbol for symbol, _, _ in pruned.models}):
+        before, after = full.feature_names(symbol), pruned.feature_names(symbol)
+        engine = _warm_engine(symbol, before)
+        report['symbols'][symbol] = {
+            'n_features': (len(engine.latest(symbol, before)), len(engine.latest(symbol, after))),
+            'features_us': tuple(_per_call_us(lambda names=names: engine.latest(symbol, names), calls)
+                                 for names in (before, after)),
+        }
+    return report
+
+
+def prune_model_set(model_set: SpreadModelSet, training_sets: Dict[str, tuple],
+                    tolerance: float = 0.01, validation_fraction: float = 0.2,
+                    n_repeats: int = 3) -> Optional[Dict]:
+    """
+    Select each pair's features, refit the pairs on them and report the savings.
+
+    The model set is replaced pair by pair with models fitted on the selected
+    columns only (the full training rows, as in fit_matrices). The live
+    feature row then only holds those columns (see
+    SpreadModelSet.feature_names), and background retrains keep them.
+
+    Args:
+        model_set: Trained SpreadModelSet, fitted on training_sets
+        training_sets: {symbol: (X, Y, feature_names, pair_names)} as for fit_matrices
+        tolerance: Accepted relative increase in validation MSE per pair
+        validation_fraction: Trailing share of rows selection is judged on
+        n_repeats: Shuffles per column for permutation importance
+
+    Returns:
+        {'selection': {"symbol ex1->ex2": select_features result}, **inference_report},
+        or None if nothing could be refitted
+    """
+    kwargs = {'tolerance': tolerance, 'validation_fraction': validation_fraction, 'n_repeats': n_repeats}
+    tasks = {}
+    for symbol, (X, Y, feature_names, pair_names) in training_sets.items():
+        X, Y = np.asarray(X, dtype=np.float64), np.asarray(Y, dtype=np.float64)
+        for j, pair_name in enumerate(pair_names):
+            key = (symbol, *pair_name.split('->'))
+            if key in model_set.models:
+                tasks[key] = (model_set.backend, model_set.model_params, X, Y[:, j], list(feature_names), kwargs)
+
+    if not tasks:
+        logger.warning("No trained pair models to prune")
+        return None
+
+    workers = min(model_set.max_workers or os.cpu_count() or 1, len(tasks))
+    logger.info(f"Selecting features for {len(tasks)} pair models on {workers} worker(s)...")
+    started = time.perf_counter()
+
+    selection = {}
+    if workers == 1:
+        for key, args in tasks.items():
+            selection[key] = _select_pair(*args)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_select_pair, *args): key for key, args in tasks.items()}
+            for future in as_completed(futures):
+                try:
+                    selection[futures[future]] = future.result()
+                except Exception as e:
+                    logger.error(f"Feature selection for {futures[future]} failed: {e}")
+    logger.info(f"Feature selection done in {time.perf_counter() - started:.1f}s")
+
+    pruned = SpreadModelSet(backend=model_set.backend, model_params=model_set.model_params,
+                            max_workers=model_set.max_workers)
+    if not pruned.fit_matrices(training_sets, {key: result['selected'] for key, result in selection.items()}):
+        return None
+
+    rows = {}
+    for symbol, (X, _, feature_names, _) in training_sets.items():
+        tail = np.asarray(X[-200:], dtype=np.float64)
+        rows[symbol] = [dict(zip(feature_names, row)) for row in tail.tolist()]
+    report = inference_report(model_set, pruned, rows)
+
+    model_set.models.update(pruned.models)
+    return {
+        'selection': {f"{symbol} {ex1}->{ex2}": result for (symbol, ex1, ex2), result in selection.items()},
+        **report,
+    }
+
+
+def log_report(report: Dict):
+    """Log a prune_model_set report as tables."""
+    logger.info(f"{'Pair':<28} {'Features':>10} {'Val MSE Δ':>10} {'Predict µs':>16} {'Model KB':>14}")
+    for name, pair in report['pairs'].items():
+        selection = report['selection'][name]
+        change = selection['selected_mse'] / selection['full_mse'] - 1 if selection['full_mse'] else 0.0
+        logger.info(
+            f"{name:<28} {pair['n_features'][0]:>4} → {pair['n_features'][1]:<3} {change:>+10.2%} "
+            f"{pair['predict_us'][0]:>7.1f} → {pair['predict_us'][1]:<6.1f} "
+            f"{pair['model_bytes'][0] / 1024:>6.0f} → {pair['model_bytes'][1] / 1024:<5.0f}"
+        )
+    logger.info(f"{'Symbol':<28} {'Features':>10} {'Live features µs':>27}")
+    for symbol, entry in report['symbols'].items():
+        logger.info(
+            f"{symbol:<28} {entry['n_features'][0]:>4} → {entry['n_features'][1]:<3} "
+            f"{entry['features_us'][0]:>16.1f} → {entry['features_us'][1]:<6.1f}"
+        )
@@ -0,0 +1,85 @@
+"""Content-addressed cache of materialized training matrices."""
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+from loguru import logger
+
+from ml_predictor import FEATURE_VERSION
+
+
+class FeatureStore:
+    """
+    Cache of feature matrices keyed by their inputs.
+
+    A key is the hash of the input files' contents, the feature-definition
+    version (ml_predictor.FEATURE_VERSION) and any caller parameters, so a
+    matrix is reused exactly when neither the raw data nor the feature code
+    has changed. Each entry is a directory of uncompressed .npy arrays plus a
+    meta.json, and arrays are memory-mapped on load.
+    """
+
+    def __init__(self, root: str = "feature_store"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def hash_files(paths: Iterable[Path]) -> str:
+        """Hash the names and contents of the input partitions."""
+        digest = hashlib.sha256()
+        for path in sorted(Path(p) for p in paths):
+            digest.update(path.name.encode())
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        return digest.hexdigest()
+
+    def key(self, input_paths: Iterable[Path], name: str, params: Optional[Dict] = None) -> str:
+        """Build the cache key for a feature set computed from input_paths."""
+        spec = json.dumps({
+            'inputs': self.hash_files(input_paths),
+            'name': name,
+            'feature_version': FEATURE_VERSION,
+            'params': params or {},
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(spec.encode()).hexdigest()
+
+    def load(self, key: str) -> Optional[Dict]:
+        """
+        Return {'arrays': {name: memmap}, 'meta': dict} for a cached key, or None.
+        """
+        entry = self.root / key
+        meta_file = entry / "meta.json"
+        if not meta_file.exists():
+            return None
+
+        meta = json.loads(meta_file.read_text())
+        arrays = {
+            name: np.load(entry / f"{name}.npy", mmap_mode='r')
+            for name in meta['arrays']
+        }
+        logger.info(f"Feature cache hit {key[:12]} ({', '.join(meta['arrays'])})")
+        return {'arrays': arrays, 'meta': meta}
+
+    def save(self, key: str, arrays: Dict[str, np.ndarray], meta: Optional[Dict] = None):
+        """Materialize arrays under key; the entry appears atomically when complete."""
+        entry = self.root / key
+        staging = self.root / f".{key}.tmp"
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir()
+
+        for name, array in arrays.items():
+            np.save(staging / f"{name}.npy", np.ascontiguousarray(array))
+        (staging / "meta.json").write_text(json.dumps(
+            {**(meta or {}), 'arrays': list(arrays)}, default=str
+        ))
+
+        if entry.exists():
+            shutil.rmtree(entry)
+        os.replace(staging, entry)
+        logger.info(f"Feature cache stored {key[:12]} ({', '.join(arrays)})")
@@ -4,7 +4,7 @@ import json
 import requests
 import pandas as pd
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 from loguru import logger
 import time
@@ -12,12 +12,342 @@ import time
 from config import Exchange, EXCHANGE_CONFIGS, SYMBOL_MAPPINGS
 
 
+# Rollup resolutions materialized from 1-minute candles (label -> pandas frequency)
+ROLLUP_RESOLUTIONS = {
+    '5m': '5min',
+    '15m': '15min',
+    '1h': '1h',
+    '1d': '1D',
+}
+
+# Every resolution query() can serve, finest first
+RESOLUTION_ORDER = ['1m', '5m', '15m', '1h', '1d']
+RESOLUTION_SPANS = {
+    '1m': pd.Timedelta('1min'),
+    '5m': pd.Timedelta('5min'),
+    '15m': pd.Timedelta('15min'),
+    '1h': pd.Timedelta('1h'),
+    '1d': pd.Timedelta('1D'),
+}
+
+# Pseudo-exchange name under which pairwise spread aggregates are stored
+SPREAD_STREAM = 'spread'
+
+# Retries of a failed candle page, backing off 1, 2, 4, 8 seconds
+PAGE_RETRIES = 4
+PAGE_BACKOFF_SECONDS = 1.0
+
+
+def select_resolution(start: datetime, end: datetime, max_points: int = 2000) -> str:
+    """Pick the finest resolution that covers [start, end) in at most max_points bars."""
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for resolution in RESOLUTION_ORDER:
+        if span / RESOLUTION_SPANS[resolution] <= max_points:
+            return resolution
+    return RESOLUTION_ORDER[-1]
+
+
+class CandleRollup:
+    """
+    Materialized multi-resolution rollups of 1-minute candles.
+
+    Each (exchange, symbol, resolution) stream is stored as one CSV under
+    ``<data_dir>/rollups``. Buckets carry the timestamp of the last minute they
+    absorbed (``last_ts``) and the number of minutes (``candles``), so new
+    minutes can be folded into the trailing partial bucket without re-reading
+    the raw history. Minutes at or before the cached tail that a bucket has
+    not absorbed yet (a backfill, a longer download) and columns the cache
+    lacks (a new exchange pair) re-aggregate the buckets they touch instead.
+    """
+
+    def __init__(self, data_dir: str = "historical_data"):
+        self.rollup_dir = Path(data_dir) / "rollups"
+        self.rollup_dir.mkdir(parents=True, exist_ok=True)
+        self._cache: Dict[Tuple[str, str, str], pd.DataFrame] = {}
+
+    def _path(self, symbol: str, stream: str, resolution: str) -> Path:
+        symbol_clean = symbol.replace("-", "_").lower()
+        return self.rollup_dir / f"{stream.lower()}_{symbol_clean}_{resolution}.csv"
+
+    def _load(self, symbol: str, stream: str, resolution: str) -> pd.DataFrame:
+        key = (symbol, stream.lower(), resolution)
+        if key not in self._cache:
+            path = self._path(symbol, stream, resolution)
+            if path.exists():
+                df = pd.read_csv(path)
+                df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+                df['last_ts'] = pd.to_datetime(df['last_ts'], utc=True)
+                self._cache[key] = df
+            else:
+                self._cache[key] = pd.DataFrame()
+        return self._cache[key]
+
+    def _store(self, symbol: str, stream: str, resolution: str, df: pd.DataFrame):
+        self._cache[(symbol, stream.lower(), resolution)] = df
+        df.to_csv(self._path(symbol, stream, resolution), index=False)
+
+    @staticmethod
+    def _aggregate_ohlcv(df: pd.DataFrame, freq: str) -> pd.DataFrame:
+        """Resample 1-minute candles into OHLCV buckets of the given frequency."""
+        indexed = df.set_index('timestamp', drop=False).sort_index()
+        grouped = indexed.resample(freq, label='left', closed='left')
+        rolled = pd.DataFrame({
+            'open': grouped['open'].first(),
+            'high': grouped['high'].max(),
+            'low': grouped['low'].min(),
+            'close': grouped['close'].last(),
+            'volume': grouped['volume'].sum(),
+            'candles': grouped['close'].count(),
+            'last_ts': grouped['timestamp'].max(),
+        })
+        rolled = rolled[rolled['candles'] > 0]
+        return rolled.reset_index()
+
+    @staticmethod
+    def _aggregate_spreads(df: pd.DataFrame, freq: str) -> pd.DataFrame:
+        """Resample 1-minute pairwise spreads into mean/min/max/last buckets."""
+        spread_cols = [col for col in df.columns if col.startswith('spread_')]
+        indexed = df.set_index('timestamp', drop=False).sort_index()
+        grouped = indexed.resample(freq, label='left', closed='left')
+
+        columns = {
+            'candles': grouped[spread_cols[0]].count(),
+            'last_ts': grouped['timestamp'].max(),
+        }
+        for col in spread_cols:
+            columns[f'{col}_mean'] = grouped[col].mean()
+            columns[f'{col}_min'] = grouped[col].min()
+            columns[f'{col}_max'] = grouped[col].max()
+            columns[f'{col}_last'] = grouped[col].last()
+        rolled = pd.DataFrame(columns)
+        rolled = rolled[rolled['candles'] > 0]
+        return rolled.reset_index()
+
+    @classmethod
+    def aggregate(cls, df: pd.DataFrame, stream: str, freq: str) -> pd.DataFrame:
+        """Resample 1-minute candles or spreads of a stream into rollup buckets."""
+        if stream == SPREAD_STREAM:
+            return cls._aggregate_spreads(df, freq)
+        return cls._aggregate_ohlcv(df, freq)
+
+    @staticmethod
+    def _merge_bucket(old: pd.Series, new: pd.Series) -> pd.Series:
+        """Fold a fresh partial bucket into the cached bucket with the same start."""
+        merged = new.copy()
+        total = old['candles'] + new['candles']
+        for col in new.index:
+            if col == 'open':
+                merged[col] = old[col]
+            elif col == 'high' or col.endswith('_max'):
+                merged[col] = max(old[col], new[col])
+            elif col == 'low' or col.endswith('_min'):
+                merged[col] = min(old[col], new[col])
+            elif col == 'volume':
+                merged[col] = old[col] + new[col]
+            elif col.endswith('_mean'):
+                merged[col] = (old[col] * old['candles'] + new[col] * new['candles']) / total
+        merged['candles'] = total
+        return merged
+
+    def _append(self, symbol: str, stream: str, resolution: str, fresh: pd.DataFrame):
+        """Append freshly aggregated buckets, merging the overlapping edge bucket."""
+        if fresh.empty:
+            return
+        cached = self._load(symbol, stream, resolution)
+        if not cached.empty and cached['timestamp'].iloc[-1] == fresh['timestamp'].iloc[0]:
+            edge = self._merge_bucket(cached.iloc[-1], fresh.iloc[0])
+            fresh = pd.concat([edge.to_frame().T, fresh.iloc[1:]], ignore_index=True)
+            cached = cached.iloc[:-1]
+        combined = pd.concat([cached, fresh], ignore_index=True) if not cached.empty else fresh
+        self._store_combined(symbol, stream, resolution, combined)
+
+    def _store_combined(self, symbol: str, stream: str, resolution: str, combined: pd.DataFrame):
+        value_cols = [col for col in combined.columns if col not in ('timestamp', 'last_ts')]
+        combined[value_cols] = combined[value_cols].apply(pd.to_numeric)
+        combined['timestamp'] = pd.to_datetime(combined['timestamp'], utc=True)
+        combined['last_ts'] = pd.to_datetime(combined['last_ts'], utc=True)
+        self._store(symbol, stream, resolution, combined)
+
+    @staticmethod
+    def _stale_buckets(cached: pd.DataFrame, rolled: pd.DataFrame) -> pd.Series:
+        """Mask of rolled buckets that hold minutes the cached bucket has not absorbed."""
+        if set(rolled.columns) - set(cached.columns):
+            return pd.Series(True, index=rolled.index)
+        cached_candles = rolled['timestamp'].map(cached.set_index('timestamp')['candles']).fillna(0)
+        return rolled['candles'] > cached_candles
+
+    def _repair(self, symbol: str, stream: str, resolution: str, rolled: pd.DataFrame):
+        """Replace cached buckets with the re-aggregated ones that supersede them."""
+        cached = self._load(symbol, stream, resolution)
+        rolled = rolled[self._stale_buckets(cached, rolled)]
+        kept = cached[~cached['timestamp'].isin(rolled['timestamp'])]
+        combined = pd.concat([kept, rolled], ignore_index=True).sort_values('timestamp')
+        self._store_combined(symbol, stream, resolution, combined.reset_index(drop=True))
+        logger.info(f"Re-aggregated {len(rolled)} {stream} {symbol} {resolution} buckets")
+
+    def update(self, symbol: str, exchange_data: Dict[str, pd.DataFrame],
+               spread_df: Optional[pd.DataFrame] = None):
+        """
+        Fold new 1-minute candles into every rollup of a symbol.
+
+        Args:
+            symbol: Standard symbol (e.g. BTC-USD)
+            exchange_data: {exchange: 1-minute OHLCV frame}; minutes already
+                rolled up are skipped, minutes older than a stream's tail that
+                its buckets lack are re-aggregated
+            spread_df: Output of HistoricalDataFetcher.calculate_spread_features for the same data
+        """
+        streams = dict(exchange_data)
+        if spread_df is not None and not spread_df.empty:
+            streams[SPREAD_STREAM] = spread_df
+
+        for stream, df in streams.items():
+            if df.empty:
+                continue
+            for resolution, freq in ROLLUP_RESOLUTIONS.items():
+                cached = self._load(symbol, stream, resolution)
+                if not cached.empty:
+                    older = df[df['timestamp'] <= cached['last_ts'].max()]
+                    if not older.empty and self._stale_buckets(cached, self.aggregate(older, stream, freq)).any():
+                        self._repair(symbol, stream, resolution, self.aggregate(df, stream, freq))
+                        continue
+                fresh = df if cached.empty else df[df['timestamp'] > cached['last_ts'].max()]
+                if fresh.empty:
+                    continue
+                self._append(symbol, stream, resolution, self.aggregate(fresh, stream, freq))
+
+        logger.info(f"Updated {symbol} rollups for {len(streams)} streams")
+
+    def has(self, symbol: str, stream: str) -> bool:
+        """Whether rollups have been materialized for a stream."""
+        return all(
+            self._path(symbol, stream, resolution).exists() for resolution in ROLLUP_RESOLUTIONS
+        )
+
+    def query(self, symbol: str, stream: str, start: datetime, end: datetime,
+              resolution: str) -> pd.DataFrame:
+        """Return cached buckets of a rolled-up stream with start <= timestamp < end."""
+        df = self._load(symbol, stream, resolution)
+        if df.empty:
+            return df
+        mask = (df['timestamp'] >= pd.Timestamp(start)) & (df['timestamp'] < pd.Timestamp(end))
+        return df[mask].reset_index(drop=True)
+
+
+class DownloadCheckpoint:
+    """
+    Page-level checkpoint for one paged candle download.
+
+    Every completed page is appended to ``<exchange>_<symbol>.pages.jsonl``
+    together with the cursor to resume from, so an interrupted download
+    continues from the last completed window instead of restarting.
+    """
+
+    def __init__(self, data_dir: Path, exchange: str, symbol: str):
+        checkpoint_dir = Path(data_dir) / "checkpoints"
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{exchange.lower()}_{symbol.replace('-', '_').lower()}"
+        self.pages_file = checkpoint_dir / f"{stem}.pages.jsonl"
+        self.state_file = checkpoint_dir / f"{stem}.state.json"
+
+    def resume(self, start_time: datetime, page_span: timedelta) -> Tuple[datetime, datetime, list]:
+        """
+        Restore a previous partial download.
+
+        Returns:
+            (window start, cursor to continue from, rows fetched so far). A
+            fresh checkpoint is started when none exists or when the requested
+            window begins more than one page before the checkpointed one.
+        """
+        if self.state_file.exists():
+            state = json.loads(self.state_file.read_text())
+            saved_start = datetime.fromisoformat(state['start'])
+
+            if start_time >= saved_start - page_span:
+                rows, cursor = [], saved_start
+                if self.pages_file.exists():
+                    with open(self.pages_file) as f:
+                        for line in f:
+                            try:
+                                page = json.loads(line)
+                            except json.JSONDecodeError:
+                                break  # Torn final write; refetch that page
+                            rows.extend(page['rows'])
+                            cursor = datetime.fromisoformat(page['cursor'])
+                logger.info(
+                    f"Resuming from checkpoint: {len(rows)} candles, "
+                    f"continuing at {cursor.isoformat()}"
+                )
+                return saved_start, cursor, rows
+
+            logger.info("Requested window starts before checkpoint, restarting download")
+
+        self.clear()
+        tmp_file = self.state_file.with_suffix('.tmp')
+        tmp_file.write_text(json.dumps({'start': start_time.isoformat()}))
+        os.replace(tmp_file, self.state_file)
+        return start_time, start_time, []
+
+    def append(self, rows: list, cursor: datetime):
+        """Durably record a completed page and the cursor after it."""
+        with open(self.pages_file, 'a') as f:
+            f.write(json.dumps({'cursor': cursor.isoformat(), 'rows': rows}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    @property
+    def pending(self) -> bool:
+        """Whether a download was started but never saved."""
+        return self.state_file.exists()
+
+    def clear(self):
+        """Remove the checkpoint once the download has been saved."""
+        for path in (self.pages_file, self.state_file):
+            if path.exists():
+                path.unlink()
+
+
 class HistoricalDataFetcher:
     """Fetch historical OHLCV data from multiple exchanges."""
 
     def __init__(self, data_dir: str = "historical_data"):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
+        self.rollups = CandleRollup(data_dir)
+        # (exchange, symbol) downloads that stopped at a failed page
+        self.incomplete = set()
+
+    def _get_page(self, exchange: str, url: str, params: Dict):
+        """
+        GET one page of candles, retrying server errors, rate limits and
+        network failures with exponential backoff.
+
+        Returns:
+            The decoded JSON body, or None if the page could not be fetched
+        """
+        for attempt in range(PAGE_RETRIES + 1):
+            try:
+                response = requests.get(url, params=params, timeout=10)
+                if response.status_code == 200:
+                    return response.json()
+                logger.warning(f"{exchange} API returned {response.status_code}")
+                if response.status_code != 429 and response.status_code < 500:
+                    return None
+            except Exception as e:
+                logger.error(f"Error fetching {exchange} data: {e}")
+
+            if attempt < PAGE_RETRIES:
+                time.sleep(PAGE_BACKOFF_SECONDS * 2 ** attempt)
+
+        return None
+
+    def _stop_download(self, exchange: str, symbol: str, cursor: datetime):
+        """Give up on a download at a failed page, keeping its checkpoint to resume from."""
+        logger.error(
+            f"Stopping {exchange} {symbol} download at {cursor.isoformat()}; "
+            f"the next run resumes from there"
+        )
+        self.incomplete.add((exchange, symbol))
 
     def fetch_coinbase_history(self, symbol: str, days: int = 30) -> pd.DataFrame:
         """Fetch historical data from Coinbase Pro."""
@@ -31,8 +361,9 @@ class HistoricalDataFetcher:
         # For 30 days = 43,200 minutes, need multiple requests
         granularity = 60  # 1 minute
 
-        all_data = []
-        current_start = start_time
+        self.incomplete.discard(('Coinbase', symbol))
+        checkpoint = DownloadCheckpoint(self.data_dir, 'Coinbase', symbol)
+        start_time, current_start, all_data = checkpoint.resume(start_time, timedelta(minutes=300))
 
         logger.info(f"Fetching Coinbase {product_id} history for {days} days...")
 
@@ -46,23 +377,20 @@ class HistoricalDataFetcher:
                 'granularity': granularity
             }
 
-            try:
-                response = requests.get(url, params=params, timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data:
-                        all_data.extend(data)
-                        logger.debug(f"Fetched {len(data)} candles from Coinbase")
-                else:
-                    logger.warning(f"Coinbase API returned {response.status_code}")
-
-                time.sleep(0.5)  # Rate limiting
-
-            except Exception as e:
-                logger.error(f"Error fetching Coinbase data: {e}")
+            data = self._get_page('Coinbase', url, params)
+            if data is None:
+                # Leave the cursor on the failed window so it is never checkpointed as done
+                self._stop_download('Coinbase', symbol, current_start)
+                break
 
+            if data:
+                all_data.extend(data)
+                logger.debug(f"Fetched {len(data)} candles from Coinbase")
+            checkpoint.append(data, current_end)
             current_start = current_end
 
+            time.sleep(0.5)  # Rate limiting
+
         if not all_data:
             logger.warning(f"No data fetched for {product_id}")
             return pd.DataFrame()
@@ -71,6 +399,7 @@ class HistoricalDataFetcher:
         # Format: [timestamp, low, high, open, close, volume]
         df = pd.DataFrame(all_data, columns=['timestamp', 'low', 'high', 'open', 'close', 'volume'])
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s', utc=True)
+        df = df.drop_duplicates('timestamp').sort_values('timestamp').reset_index(drop=True)
         df['exchange'] = 'Coinbase'
         df['symbol'] = SYMBOL_MAPPINGS.get(product_id, product_id)
 
@@ -95,8 +424,9 @@ class HistoricalDataFetcher:
         # Binance API: 1000 candles per request, 1 minute interval
         interval = "1m"
 
-        all_data = []
-        current_start = start_time
+        self.incomplete.discard(('Binance', symbol))
+        checkpoint = DownloadCheckpoint(self.data_dir, 'Binance', symbol)
+        start_time, current_start, all_data = checkpoint.resume(start_time, timedelta(minutes=1000))
 
         logger.info(f"Fetching Binance {binance_symbol} history for {days} days...")
 
@@ -112,23 +442,20 @@ class HistoricalDataFetcher:
                 'limit': 1000
             }
 
-            try:
-                response = requests.get(url, params=params, timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data:
-                        all_data.extend(data)
-                        logger.debug(f"Fetched {len(data)} candles from Binance")
-                else:
-                    logger.warning(f"Binance API returned {response.status_code}")
-
-                time.sleep(0.5)  # Rate limiting
-
-            except Exception as e:
-                logger.error(f"Error fetching Binance data: {e}")
+            data = self._get_page('Binance', url, params)
+            if data is None:
+                # Leave the cursor on the failed window so it is never checkpointed as done
+                self._stop_download('Binance', symbol, current_start)
+                break
 
+            if data:
+                all_data.extend(data)
+                logger.debug(f"Fetched {len(data)} candles from Binance")
+            checkpoint.append(data, current_end)
             current_start = current_end
 
+            time.sleep(0.5)  # Rate limiting
+
         if not all_data:
             logger.warning(f"No data fetched for {binance_symbol}")
             return pd.DataFrame()
@@ -140,7 +467,9 @@ class HistoricalDataFetcher:
             'close_time', 'quote_volume', 'trades', 'taker_base', 'taker_quote', 'ignore'
         ])
         df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms', utc=True)
+        df = df.drop_duplicates('timestamp').sort_values('timestamp').reset_index(drop=True)
         df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+        df[['open', 'high', 'low', 'close', 'volume']] = df[['open', 'high', 'low', 'close', 'volume']].astype(float)
         df['exchange'] = 'Binance'
 
         # Map back to standard symbol
@@ -162,8 +491,9 @@ class HistoricalDataFetcher:
         step = 60  # 1 minute
         limit = 1000
 
-        all_data = []
-        current_start = start_time
+        self.incomplete.discard(('Bitstamp', symbol))
+        checkpoint = DownloadCheckpoint(self.data_dir, 'Bitstamp', symbol)
+        start_time, current_start, all_data = checkpoint.resume(start_time, timedelta(minutes=limit))
 
         logger.info(f"Fetching Bitstamp {bitstamp_symbol} history for {days} days...")
 
@@ -175,31 +505,25 @@ class HistoricalDataFetcher:
                 'start': int(current_start.timestamp())
             }
 
-            try:
-                response = requests.get(url, params=params, timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
-                    if data and 'data' in data and 'ohlc' in data['data']:
-                        candles = data['data']['ohlc']
-                        if candles:
-                            all_data.extend(candles)
-                            logger.debug(f"Fetched {len(candles)} candles from Bitstamp")
-
-                            # Move to next batch
-                            last_timestamp = int(candles[-1]['timestamp'])
-                            current_start = datetime.fromtimestamp(last_timestamp, tz=timezone.utc)
-                        else:
-                            break
-                else:
-                    logger.warning(f"Bitstamp API returned {response.status_code}")
-                    break
-
-                time.sleep(0.5)  # Rate limiting
+            data = self._get_page('Bitstamp', url, params)
+            if data is None:
+                self._stop_download('Bitstamp', symbol, current_start)
+                break
 
-            except Exception as e:
-                logger.error(f"Error fetching Bitstamp data: {e}")
+            candles = data.get('data', {}).get('ohlc') if isinstance(data, dict) else None
+            if not candles:
                 break
 
+            all_data.extend(candles)
+            logger.debug(f"Fetched {len(candles)} candles from Bitstamp")
+
+            # Move to next batch
+            last_timestamp = int(candles[-1]['timestamp'])
+            current_start = datetime.fromtimestamp(last_timestamp, tz=timezone.utc)
+            checkpoint.append(candles, current_start)
+
+            time.sleep(0.5)  # Rate limiting
+
             # Prevent infinite loops
             if len(all_data) > days * 1440:  # More than expected
                 break
@@ -212,7 +536,9 @@ class HistoricalDataFetcher:
         df = pd.DataFrame(all_data)
         df['timestamp'] = pd.to_datetime(df['timestamp'].astype(int), unit='s', utc=True)
         df = df.rename(columns={'timestamp': 'timestamp'})
+        df = df.drop_duplicates('timestamp').sort_values('timestamp').reset_index(drop=True)
         df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+        df[['open', 'high', 'low', 'close', 'volume']] = df[['open', 'high', 'low', 'close', 'volume']].astype(float)
         df['exchange'] = 'Bitstamp'
 
         # Map to standard symbol
@@ -222,33 +548,151 @@ class HistoricalDataFetcher:
         logger.success(f"Fetched {len(df)} candles from Bitstamp for {bitstamp_symbol}")
         return df
 
-    def fetch_all_exchanges(self, symbol: str, days: int = 30) -> Dict[str, pd.DataFrame]:
-        """Fetch historical data from all exchanges for a symbol."""
+    def fetch_all_exchanges(self, symbol: str, days: int = 30,
+                            exchanges: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        """Fetch historical data from all exchanges (or the given ones) for a symbol."""
         data = {}
+        fetchers = {
+            'Coinbase': self.fetch_coinbase_history,
+            'Binance': self.fetch_binance_history,
+            'Bitstamp': self.fetch_bitstamp_history,
+        }
 
         # Fetch from each exchange
-        df_coinbase = self.fetch_coinbase_history(symbol, days)
-        if not df_coinbase.empty:
-            data['Coinbase'] = df_coinbase
-
-        df_binance = self.fetch_binance_history(symbol, days)
-        if not df_binance.empty:
-            data['Binance'] = df_binance
-
-        df_bitstamp = self.fetch_bitstamp_history(symbol, days)
-        if not df_bitstamp.empty:
-            data['Bitstamp'] = df_bitstamp
+        for exchange, fetch in fetchers.items():
+            if exchanges is not None and exchange not in exchanges:
+                continue
+            df = fetch(symbol, days)
+            if not df.empty:
+                data[exchange] = df
 
         return data
 
+    def pending_downloads(self, symbol: str) -> List[str]:
+        """Exchanges whose download of symbol was interrupted and not saved."""
+        return [
+            exchange for exchange in ['Coinbase', 'Binance', 'Bitstamp']
+            if DownloadCheckpoint(self.data_dir, exchange, symbol).pending
+        ]
+
     def save_data(self, symbol: str, exchange_data: Dict[str, pd.DataFrame]):
         """Save historical data to disk."""
         symbol_clean = symbol.replace("-", "_").lower()
 
+        saved = {}
         for exchange, df in exchange_data.items():
+            if (exchange, symbol) in self.incomplete:
+                # Caching a partial download would stop the next run from resuming it
+                logger.warning(f"Not saving incomplete {exchange} {symbol} download; its checkpoint is kept")
+                continue
+
             filename = self.data_dir / f"{exchange.lower()}_{symbol_clean}_history.csv"
             df.to_csv(filename, index=False)
             logger.info(f"Saved {len(df)} records to {filename}")
+            saved[exchange] = df
+
+            # The download is durable now; drop its page checkpoint
+            DownloadCheckpoint(self.data_dir, exchange, symbol).clear()
+
+        if saved:
+            self.update_rollups(symbol, saved)
+
+    def update_rollups(self, symbol: str, exchange_data: Dict[str, pd.DataFrame]):
+        """Fold 1-minute candles into the cached 5m/15m/1h/1d rollups."""
+        spread_df = self.calculate_spread_features(exchange_data) if len(exchange_data) >= 2 else None
+        self.rollups.update(symbol, exchange_data, spread_df)
+
+    def query(self, symbol: str, exchange: str, start: datetime, end: datetime,
+              resolution: str = 'auto', max_points: int = 2000) -> pd.DataFrame:
+        """
+        Query candles for one exchange (or SPREAD_STREAM for pairwise spreads).
+
+        Args:
+            symbol: Standard symbol (e.g. BTC-USD)
+            exchange: Exchange name, or SPREAD_STREAM for spread aggregates
+            start: Inclusive start of the window
+            end: Exclusive end of the window
+            resolution: One of RESOLUTION_ORDER, or 'auto' for the finest
+                resolution that fits the window in max_points bars
+            max_points: Bar budget used when resolution is 'auto'
+
+        Returns:
+            DataFrame of buckets with start <= timestamp < end, in the rollup
+            schema at every resolution (1m candles are single-minute buckets)
+        """
+        if resolution == 'auto':
+            resolution = select_resolution(start, end, max_points)
+        if resolution not in RESOLUTION_ORDER:
+            raise ValueError(f"Unknown resolution {resolution!r}, expected one of {RESOLUTION_ORDER}")
+
+        if resolution == '1m':
+            exchange_data = self.load_data(symbol)
+            if exchange == SPREAD_STREAM:
+                df = self.calculate_spread_features(exchange_data)
+            else:
+                df = exchange_data.get(exchange, pd.DataFrame())
+            if df.empty:
+                return df
+            mask = (df['timestamp'] >= pd.Timestamp(start)) & (df['timestamp'] < pd.Timestamp(end))
+            if not mask.any():
+                return pd.DataFrame()
+            return self.rollups.aggregate(df[mask], exchange, RESOLUTION_SPANS['1m'])
+
+        # Materialize rollups lazily from raw candles cached before rollups existed
+        if not self.rollups.has(symbol, exchange):
+            exchange_data = self.load_data(symbol)
+            if exchange_data:
+                self.update_rollups(symbol, exchange_data)
+
+        return self.rollups.query(symbol, exchange, start, end, resolution)
+
+    def _partition_dir(self, symbol: str) -> Path:
+        return self.data_dir / "partitions" / symbol.replace("-", "_").lower()
+
+    def write_partitions(self, symbol: str, spread_df: pd.DataFrame):
+        """Write spread features to one CSV partition per UTC day."""
+        partition_dir = self._partition_dir(symbol)
+        partition_dir.mkdir(parents=True, exist_ok=True)
+        for stale in partition_dir.glob("*.csv"):
+            stale.unlink()
+
+        for day, day_df in spread_df.groupby(spread_df['timestamp'].dt.strftime('%Y-%m-%d')):
+            day_df.to_csv(partition_dir / f"{day}.csv", index=False)
+
+        logger.info(f"Wrote {spread_df['timestamp'].dt.date.nunique()} daily partitions to {partition_dir}")
+
+    def partition_chunk_count(self, symbols: List[str], chunk_days: int = 1) -> int:
+        """Number of chunks iter_partitions will yield."""
+        return sum(
+            -(-len(list(self._partition_dir(symbol).glob("*.csv"))) // chunk_days)
+            for symbol in symbols
+        )
+
+    def iter_partitions(self, symbols: List[str], chunk_days: int = 1):
+        """
+        Yield spread-feature chunks of chunk_days consecutive daily partitions.
+
+        Chunks are time-ordered within each symbol and never mix symbols.
+        """
+        for symbol in symbols:
+            files = sorted(self._partition_dir(symbol).glob("*.csv"))
+            for i in range(0, len(files), chunk_days):
+                chunk = pd.concat(
+                    [pd.read_csv(f) for f in files[i:i + chunk_days]], ignore_index=True
+                )
+                chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], utc=True)
+                yield chunk
+
+    def source_files(self, symbols: List[str]) -> List[Path]:
+        """Raw 1-minute candle CSVs currently cached for the given symbols."""
+        files = []
+        for symbol in symbols:
+            symbol_clean = symbol.replace("-", "_").lower()
+            for exchange in ['Coinbase', 'Binance', 'Bitstamp']:
+                filename = self.data_dir / f"{exchange.lower()}_{symbol_clean}_history.csv"
+                if filename.exists():
+                    files.append(filename)
+        return files
 
     def load_data(self, symbol: str) -> Dict[str, pd.DataFrame]:
         """Load historical data from disk."""
@@ -313,13 +757,67 @@ class HistoricalDataFetcher:
         return merged
 
 
-def fetch_and_prepare_training_data(days: int = 30, symbols: List[str] = None) -> pd.DataFrame:
+def _prepare_symbol_spreads(fetcher: HistoricalDataFetcher, symbol: str, days: int,
+                            resolution: str) -> pd.DataFrame:
+    """Load (or fetch) one symbol's candles and return its spread features."""
+    logger.info(f"\n{'='*60}")
+    logger.info(f"Processing {symbol}")
+    logger.info(f"{'='*60}")
+
+    # Try to load cached data first
+    exchange_data = fetcher.load_data(symbol)
+
+    # If not cached, fetch from APIs
+    if not exchange_data:
+        logger.info(f"No cached data found, fetching from APIs...")
+        exchange_data = fetcher.fetch_all_exchanges(symbol, days)
+        if exchange_data:
+            fetcher.save_data(symbol, exchange_data)
+    else:
+        # Finish downloads an earlier run stopped at a failed page
+        pending = [exchange for exchange in fetcher.pending_downloads(symbol) if exchange not in exchange_data]
+        if pending:
+            logger.info(f"Resuming interrupted downloads: {', '.join(pending)}")
+            resumed = fetcher.fetch_all_exchanges(symbol, days, exchanges=pending)
+            if resumed:
+                fetcher.save_data(symbol, resumed)
+                exchange_data.update(resumed)
+                # save_data only saw the resumed exchanges; fold their spreads
+                # against the cached ones into the rollups as well
+                fetcher.update_rollups(symbol, {
+                    exchange: df for exchange, df in exchange_data.items()
+                    if (exchange, symbol) not in fetcher.incomplete
+                })
+
+    # Coarse runs read the materialized rollups
+    if exchange_data and resolution != '1m':
+        end = max(df['timestamp'].max() for df in exchange_data.values()) + pd.Timedelta('1min')
+        start = end - pd.Timedelta(days=days)
+        exchange_data = {
+            exchange: fetcher.query(symbol, exchange, start, end, resolution)
+            for exchange in exchange_data
+        }
+        exchange_data = {exchange: df for exchange, df in exchange_data.items() if not df.empty}
+
+    # Calculate spread features
+    if not exchange_data:
+        return pd.DataFrame()
+    spread_df = fetcher.calculate_spread_features(exchange_data)
+    if not spread_df.empty:
+        spread_df['symbol'] = symbol
+    return spread_df
+
+
+def fetch_and_prepare_training_data(days: int = 30, symbols: List[str] = None,
+                                    resolution: str = '1m') -> pd.DataFrame:
     """
     Fetch historical data and prepare for ML training.
 
     Args:
         days: Number of days of historical data (default 30)
         symbols: List of symbols to fetch (default: BTC-USD, ETH-USD, SOL-USD)
+        resolution: Candle resolution to train on (default 1m). Coarser
+            resolutions read the cached rollups instead of raw candles.
 
     Returns:
         DataFrame with spread features for all symbols
@@ -331,26 +829,9 @@ def fetch_and_prepare_training_data(days: int = 30, symbols: List[str] = None) -
     all_spread_data = []
 
     for symbol in symbols:
-        logger.info(f"\n{'='*60}")
-        logger.info(f"Processing {symbol}")
-        logger.info(f"{'='*60}")
-
-        # Try to load cached data first
-        exchange_data = fetcher.load_data(symbol)
-
-        # If not cached, fetch from APIs
-        if not exchange_data:
-            logger.info(f"No cached data found, fetching from APIs...")
-            exchange_data = fetcher.fetch_all_exchanges(symbol, days)
-            if exchange_data:
-                fetcher.save_data(symbol, exchange_data)
-
-        # Calculate spread features
-        if exchange_data:
-            spread_df = fetcher.calculate_spread_features(exchange_data)
-            if not spread_df.empty:
-                spread_df['symbol'] = symbol
-                all_spread_data.append(spread_df)
+        spread_df = _prepare_symbol_spreads(fetcher, symbol, days, resolution)
+        if not spread_df.empty:
+            all_spread_data.append(spread_df)
 
     if not all_spread_data:
         logger.error("No historical data fetched!")
@@ -368,6 +849,37 @@ def fetch_and_prepare_training_data(days: int = 30, symbols: List[str] = None) -
     return combined
 
 
+def prepare_partitioned_training_data(days: int = 30, symbols: List[str] = None,
+                                      resolution: str = '1m') -> HistoricalDataFetcher:
+    """
+    Out-of-core variant of fetch_and_prepare_training_data.
+
+    Spread features are computed one symbol at a time and written to daily
+    partitions, so no more than one symbol's history is ever held in memory.
+    That history is loaded whole, so memory here still grows with days; only
+    reading the partitions back with HistoricalDataFetcher.iter_partitions is
+    bounded by the chunk size.
+
+    Returns:
+        The fetcher owning the partitions
+    """
+    if symbols is None:
+        symbols = ['BTC-USD', 'ETH-USD', 'SOL-USD']
+
+    fetcher = HistoricalDataFetcher()
+    total = 0
+
+    for symbol in symbols:
+        spread_df = _prepare_symbol_spreads(fetcher, symbol, days, resolution)
+        if not spread_df.empty:
+            fetcher.write_partitions(symbol, spread_df)
+            total += len(spread_df)
+        del spread_df
+
+    logger.success(f"Partitioned {total:,} records for {len(symbols)} symbols")
+    return fetcher
+
+
 if __name__ == "__main__":
     # Test fetching
     logger.info("Fetching 30 days of historical data...")
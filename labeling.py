@@ -0,0 +1,168 @@
+"""Forward-looking opportunity labels: was the cross still executable after a latency?"""
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from config import ArbitrageOpportunity, EXCHANGE_CONFIGS, MIN_PROFIT_THRESHOLD, MAX_SPREAD_AGE_SECONDS
+
+
+# Reaction latencies (seconds) opportunities are labeled at
+DEFAULT_LATENCIES = (0.1, 0.5, 2.0)
+
+# Fee (%) for exchanges missing from EXCHANGE_CONFIGS, as in ArbitrageDetector
+DEFAULT_FEE_PCT = 0.5
+
+
+def label_column(latency: float) -> str:
+    """Label column name for a latency, e.g. 'persists_500ms'."""
+    return f"persists_{round(latency * 1000)}ms"
+
+
+def _nanos(timestamps) -> np.ndarray:
+    """UTC epoch nanoseconds of a timestamp column or list."""
+    return pd.to_datetime(pd.Series(timestamps), utc=True).to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+
+def _group_rows(symbols: np.ndarray, exchanges: np.ndarray) -> Dict[Tuple[str, str], np.ndarray]:
+    """Row positions per (symbol, exchange), each in its original order."""
+    symbol_codes, symbol_keys = pd.factorize(symbols)
+    exchange_codes, exchange_keys = pd.factorize(exchanges)
+    codes = symbol_codes * len(exchange_keys) + exchange_codes
+    order = np.argsort(codes, kind='stable')
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    return {
+        (symbol_keys[code // len(exchange_keys)], exchange_keys[code % len(exchange_keys)]): rows
+        for rows in np.split(order, bounds)
+        for code in (codes[rows[0]],)
+    }
+
+
+class QuoteStream:
+    """
+    Recorded quotes as time-sorted arrays per (symbol, exchange), for as-of lookups.
+
+    Executable prices follow ArbitrageDetector._analyze_pair: buy at the ask,
+    sell at the bid, falling back to the last price where a quote is missing.
+    """
+
+    def __init__(self, quotes: pd.DataFrame):
+        """
+        Args:
+            quotes: Rows with timestamp, symbol, exchange, price, bid and ask,
+                timestamped on the same clock as the opportunities
+        """
+        times = _nanos(quotes['timestamp'])
+        price = quotes['price'].to_numpy(dtype=np.float64)
+        bid = quotes['bid'].to_numpy(dtype=np.float64)
+        ask = quotes['ask'].to_numpy(dtype=np.float64)
+        buy = np.where(ask > 0, ask, price)
+        sell = np.where(bid > 0, bid, price)
+
+        # Grouped in time order, so every series is sorted
+        order = np.argsort(times, kind='stable')
+        groups = _group_rows(quotes['symbol'].to_numpy()[order], quotes['exchange'].to_numpy()[order])
+
+        self._series: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for key, rows in groups.items():
+            rows = order[rows]
+            self._series[key] = (times[rows], buy[rows], sell[rows])
+
+    def asof(self, symbol: str, exchange: str, times: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Latest quote at or before each time (epoch ns).
+
+        Returns:
+            (buy_price, sell_price, age_ns) arrays; NaN prices and age where
+            the exchange had not quoted yet
+        """
+        series = self._series.get((symbol, exchange))
+        if series is None:
+            missing = np.full(len(times), np.nan)
+            return missing, missing, missing
+        quote_times, buy, sell = series
+        index = np.searchsorted(quote_times, times, side='right') - 1
+        found = index >= 0
+        index = np.maximum(index, 0)
+        age = np.where(found, times - quote_times[index], np.nan)
+        return np.where(found, buy[index], np.nan), np.where(found, sell[index], np.nan), age
+
+
+def persistence_labels(opportunities: Union[pd.DataFrame, List[ArbitrageOpportunity]],
+                       quotes: Union[pd.DataFrame, QuoteStream],
+                       latencies: Sequence[float] = DEFAULT_LATENCIES,
+                       min_profit: float = MIN_PROFIT_THRESHOLD,
+                       max_age: float = MAX_SPREAD_AGE_SECONDS) -> pd.DataFrame:
+    """
+    Label whether each opportunity was still executable after each latency.
+
+    An opportunity detected at t persists at latency L if, on the quotes as
+    of t + L, buying on its buy exchange and selling on its sell exchange
+    still clears min_profit after fees, with both quotes younger than max_age
+    seconds. Each (symbol, exchange) leg is one searchsorted join of all
+    opportunities against that exchange's sorted quote times, so labeling is
+    O(n log m) in numpy.
+
+    Args:
+        opportunities: ArbitrageOpportunity list, or a DataFrame with
+            timestamp, symbol, buy_exchange and sell_exchange columns
+        quotes: Recorded quote stream (see QuoteStream)
+        latencies: Delays after detection to check, in seconds
+        min_profit: Profit after fees (%) still needed at t + L
+        max_age: Maximum quote age (seconds) at t + L
+
+    Returns:
+        DataFrame aligned with opportunities, with a boolean label_column(L)
+        and the profit after fees at t + L (profit_{L}ms, NaN if unknown) per
+        latency
+    """
+    if not isinstance(opportunities, pd.DataFrame):
+        opportunities = pd.DataFrame({
+            'timestamp': [o.timestamp for o in opportunities],
+            'symbol': [o.symbol for o in opportunities],
+            'buy_exchange': [o.buy_exchange for o in opportunities],
+            'sell_exchange': [o.sell_exchange for o in opportunities],
+        })
+    stream = quotes if isinstance(quotes, QuoteStream) else QuoteStream(quotes)
+
+    n = len(opportunities)
+    result = pd.DataFrame(index=opportunities.index)
+    if n == 0:
+        for latency in latencies:
+            result[label_column(latency)] = np.zeros(0, dtype=bool)
+        return result
+
+    times = _nanos(opportunities['timestamp'])
+    fees = {config.name: config.fee_pct for config in EXCHANGE_CONFIGS.values()}
+    max_age_ns = max_age * 1e9
+
+    # Opportunity rows per (symbol, exchange) leg, in time order so the
+    # searchsorted queries are sorted too
+    order = np.argsort(times, kind='stable')
+    symbols = opportunities['symbol'].to_numpy()[order]
+    legs = {}  # {side: {(symbol, exchange): opportunity rows}}
+    for side in ('buy_exchange', 'sell_exchange'):
+        groups = _group_rows(symbols, opportunities[side].to_numpy()[order])
+        legs[side] = {key: order[rows] for key, rows in groups.items()}
+
+    total_fee = (
+        opportunities['buy_exchange'].map(fees).fillna(DEFAULT_FEE_PCT).to_numpy(dtype=np.float64)
+        + opportunities['sell_exchange'].map(fees).fillna(DEFAULT_FEE_PCT).to_numpy(dtype=np.float64)
+    )
+
+    for latency in latencies:
+        at = times + round(latency * 1e9)
+        buy_price = np.full(n, np.nan)
+        sell_price = np.full(n, np.nan)
+        for side, prices, pick in (('buy_exchange', buy_price, 0), ('sell_exchange', sell_price, 1)):
+            for (symbol, exchange), rows in legs[side].items():
+                quote = stream.asof(symbol, exchange, at[rows])
+                prices[rows] = np.where(quote[2] < max_age_ns, quote[pick], np.nan)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            profit = (sell_price - buy_price) / buy_price * 100 - total_fee
+        suffix = label_column(latency)[len('persists_'):]
+        result[label_column(latency)] = profit >= min_profit  # NaN (unknown) is False
+        result[f"profit_{suffix}"] = profit
+
+    return result
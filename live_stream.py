@@ -0,0 +1,284 @@
+"""Server-sent event stream of compact dashboard deltas: new ticks, opportunities and stats."""
+import json
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import dash
+from dash import dcc, html, Input, Output, ClientsideFunction
+from flask import Response
+from loguru import logger
+
+from config import ArbitrageOpportunity, PriceData
+
+
+# Flask route the browser's EventSource connects to
+STREAM_PATH = '/_live'
+
+# Seconds between checks of the detector for new ticks and opportunities
+PUSH_PERIOD = 0.1
+
+CHANNELS = ('ticks', 'opportunities', 'stats', 'refresh')
+
+# Opportunities sent to a newly connected page (the table shows the last 5 minutes)
+REPLAY_MINUTES = 5
+
+# Statistics cover a trailing hour, so they are recomputed this often even
+# without new opportunities
+STATS_MAX_AGE = 30.0
+
+
+def _ms(timestamp: datetime) -> int:
+    return int(timestamp.timestamp() * 1000)
+
+
+def _tick_row(data: PriceData) -> list:
+    return [data.symbol, data.exchange, data.price, data.bid, data.ask, _ms(data.timestamp)]
+
+
+def _opportunity_row(opp: ArbitrageOpportunity) -> list:
+    return [
+        _ms(opp.timestamp), opp.symbol, opp.buy_exchange, opp.buy_price, opp.sell_exchange,
+        opp.sell_price, opp.spread_pct, opp.profit_after_fees, opp.confidence_score
+    ]
+
+
+class LiveStream:
+    """
+    Pushes what changed in the detector to every connected page.
+
+    One publisher thread, running only while a page is connected, checks
+    the detector every period and encodes a single frame per check for all
+    subscribers, holding only what changed since the last one:
+
+        ticks          [symbol, exchange, price, bid, ask, ms], the latest
+                       quote of each feed that ticked
+        opportunities  [ms, symbol, buy exchange, buy price, sell exchange,
+                       sell price, spread %, profit %, confidence], new ones
+        stats          detector.get_statistics(), when it changed
+        refresh        a counter, bumped at most every refresh_period while
+                       bars or opportunities are coming in, for panels still
+                       rendered on the server
+
+    Every frame carries the server time (now, ms). Nothing is sent while the
+    detector is idle except a frame with only now every keepalive seconds.
+    A page connecting gets a reset frame with the current quotes, the last
+    REPLAY_MINUTES of opportunities and the statistics; a page too slow to
+    keep up is disconnected and its EventSource reconnects to a new reset.
+    """
+
+    def __init__(self, detector, period: float = PUSH_PERIOD, refresh_period: float = 1.0,
+                 channels: Sequence[str] = CHANNELS, keepalive: float = 15.0, backlog: int = 256):
+        """
+        Args:
+            detector: ArbitrageDetector to follow
+            period: Seconds between checks of the detector
+            refresh_period: Minimum seconds between refresh signals
+            channels: Which of CHANNELS to send
+            keepalive: Seconds of silence before an empty frame is sent
+            backlog: Frames queued per page before it is disconnected
+        """
+        self.detector = detector
+        self.period = period
+        self.refresh_period = refresh_period
+        self.channels = set(channels)
+        self.keepalive = keepalive
+        self.backlog = backlog
+
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        # What has been sent so far
+        self._ticks: Dict[Tuple[str, str], PriceData] = {}
+        self._cursor = len(detector.opportunities)
+        self._bars: Dict[str, object] = {}
+        self._stats: Optional[dict] = None
+        self._stats_at = -float('inf')
+        self._stats_stale = True
+        self._refresh = 0
+        self._refresh_at = -float('inf')
+        self._dirty = True
+        self._sent_at = time.monotonic()
+
+    def subscribe(self) -> queue.Queue:
+        """A queue of encoded frames for one page, starting with its reset frame."""
+        subscriber = queue.Queue(maxsize=self.backlog)
+        with self._lock:
+            # Bring the pages already connected up to date first, so the
+            # reset frame and the frames after it line up
+            frame = self._poll()
+            if frame is not None and self._subscribers:
+                self._publish(self._encode(frame))
+            subscriber.put(self._encode(self._reset_frame()))
+            self._subscribers.append(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="live-stream", daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def events(self) -> Iterator[str]:
+        """Server-sent events for one page, until it disconnects or falls behind."""
+        subscriber = self.subscribe()
+        try:
+            while True:
+                event = subscriber.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            self.unsubscribe(subscriber)
+
+    def serve(self, app: dash.Dash, path: str = STREAM_PATH):
+        """
+        Add the event stream route to a Dash app's server, and the client-side
+        callbacks that feed its frames to the components from live_components().
+        """
+        app.server.add_url_rule(path, 'live_stream', lambda: Response(
+            self.events(),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        ))
+        app.clientside_callback(
+            ClientsideFunction(namespace='live', function_name='connect'),
+            Output('live-status', 'children'),
+            Input('live-url', 'data')
+        )
+        app.clientside_callback(
+            ClientsideFunction(namespace='live', function_name='refresh'),
+            Output('live-refresh', 'data'),
+            Input('live-delta', 'data')
+        )
+
+    def _run(self):
+        while True:
+            started = time.monotonic()
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+                try:
+                    frame = self._poll()
+                    if frame is None and started - self._sent_at >= self.keepalive:
+                        frame = {}
+                    if frame is not None:
+                        self._publish(self._encode(frame))
+                except Exception as e:
+                    logger.error(f"Error publishing live dashboard update: {e}")
+            time.sleep(max(0.0, self.period - (time.monotonic() - started)))
+
+    def _poll(self) -> Optional[dict]:
+        """The changes since the last poll as a frame, or None if there are none."""
+        frame = {}
+        now = time.monotonic()
+
+        ticks = [
+            data for data in list(self.detector.latest_prices.values())
+            if self._ticks.get((data.symbol, data.exchange)) is not data
+        ]
+        for data in ticks:
+            self._ticks[(data.symbol, data.exchange)] = data
+        if ticks and 'ticks' in self.channels:
+            frame['ticks'] = [_tick_row(data) for data in ticks]
+
+        cursor = len(self.detector.opportunities)
+        new = self.detector.opportunities[self._cursor:cursor]
+        self._cursor = cursor
+        if new and 'opportunities' in self.channels:
+            frame['opportunities'] = [_opportunity_row(opp) for opp in new]
+
+        # A closed bar changes the chart, spread metrics and model features
+        bars = {symbol: buffer[-1]['timestamp']
+                for symbol, buffer in list(self.detector.bar_buffer.items()) if buffer}
+        if new or bars != self._bars:
+            self._bars = bars
+            self._dirty = True
+        if new:
+            self._stats_stale = True
+
+        refresh_due = now - self._refresh_at >= self.refresh_period
+        if self._dirty and refresh_due:
+            self._dirty = False
+            self._refresh += 1
+            self._refresh_at = now
+            if 'refresh' in self.channels:
+                frame['refresh'] = self._refresh
+
+        if (self._stats_stale and refresh_due) or now - self._stats_at >= STATS_MAX_AGE:
+            self._stats_stale = False
+            stats = self._statistics(now)
+            if stats is not None and 'stats' in self.channels:
+                frame['stats'] = stats
+
+        if not frame:
+            return None
+        return frame
+
+    def _statistics(self, now: float) -> Optional[dict]:
+        """get_statistics(), or None if unchanged since last sent."""
+        stats = self.detector.get_statistics()
+        self._stats_at = now
+        if stats == self._stats:
+            return None
+        self._stats = stats
+        return stats
+
+    def _reset_frame(self) -> dict:
+        frame = {'reset': True}
+        if 'ticks' in self.channels:
+            frame['ticks'] = [_tick_row(data) for data in self._ticks.values()]
+        if 'opportunities' in self.channels:
+            cutoff = datetime.now(timezone.utc) - timedelta(minutes=REPLAY_MINUTES)
+            replay = []
+            for opp in reversed(self.detector.opportunities[:self._cursor]):
+                if opp.timestamp < cutoff:
+                    break
+                replay.append(_opportunity_row(opp))
+            frame['opportunities'] = replay[::-1]
+        if 'stats' in self.channels:
+            if self._stats is None:
+                self._statistics(time.monotonic())
+            frame['stats'] = self._stats
+        if 'refresh' in self.channels:
+            frame['refresh'] = self._refresh
+        return frame
+
+    def _encode(self, frame: dict) -> str:
+        frame['now'] = _ms(datetime.now(timezone.utc))
+        return f"data: {json.dumps(frame, separators=(',', ':'), default=str)}\n\n"
+
+    def _publish(self, event: str):
+        self._sent_at = time.monotonic()
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Drop the backlog and disconnect; the page reconnects to a reset frame
+                logger.warning("Live dashboard page fell behind, disconnecting it")
+                self._subscribers.remove(subscriber)
+                with subscriber.mutex:
+                    subscriber.queue.clear()
+                subscriber.put_nowait(None)
+
+
+def live_components(app: dash.Dash, path: str = STREAM_PATH) -> list:
+    """
+    Layout components of a push-mode page, for a LiveStream served at path.
+
+    assets/live_stream.js opens the EventSource and writes each frame to
+    the live-delta store; callbacks that should run on pushed refreshes
+    take Input('live-refresh', 'data') instead of an Interval.
+    """
+    return [
+        dcc.Store(id='live-url', data=app.get_relative_path(path)),
+        dcc.Store(id='live-delta'),
+        dcc.Store(id='live-refresh', data=0),
+        html.Div(id='live-status', hidden=True),
+    ]
@@ -2,11 +2,16 @@
 import asyncio
 import threading
 import time
+
 from loguru import logger
 
 from data_ingestion import MultiExchangeAggregator
 from arbitrage_detector import ArbitrageDetector
-from ml_predictor import SpreadPredictor
+from background_training import BackgroundTrainer, ModelHandle
+from drift_monitor import DriftMonitor
+from online_model import OnlineSpreadPredictor
+from ml_predictor import SpreadModelSet, FEATURE_VERSION
+from model_registry import ModelRegistry, SPREAD_MODELS, OPPORTUNITY_SCORER
 from dashboard import ArbitrageDashboard
 
 
@@ -14,49 +19,130 @@ class ArbitrageSystem:
     """Main arbitrage detection system."""
 
     def __init__(self):
-        # Initialize components
+        # Initialize components; models are loaded in the background by run()
+        self.registry = ModelRegistry()
         self.detector = ArbitrageDetector()
-        self.ml_predictor = SpreadPredictor()
+        self.ml_predictor = ModelHandle(SpreadModelSet())
+        self.models = {SPREAD_MODELS: self.ml_predictor, OPPORTUNITY_SCORER: self.detector.scorer}
+        self.trainer = BackgroundTrainer(self.ml_predictor)
+        self.drift = DriftMonitor(self.ml_predictor, self.detector.features)
+        self.online_predictor = OnlineSpreadPredictor(self.ml_predictor, self.detector.features)
         self.aggregator = MultiExchangeAggregator(self.on_price_update)
         self.dashboard = None
 
         # Control flags
         self.running = False
-        self.training_interval = 300  # Train ML model every 5 minutes
+        self.drift_check_interval = 10  # Seconds between drift checks
+
+    def load_models(self):
+        """
+        Load the registered model versions in service and swap them in.
+
+        Runs in a background thread at startup, so ingestion and detection
+        start immediately; predictions and opportunity scores switch on as each
+        model finishes loading.
+        """
+        for name, handle in self.models.items():
+            started = time.perf_counter()
+            try:
+                model, meta = self.registry.load(name)
+            except Exception as e:
+                logger.error(f"Error loading {name}: {e}")
+                continue
+
+            if model is None:
+                logger.info(f"No registered {name}, starting untrained")
+                continue
+            if meta.get('feature_version') != FEATURE_VERSION:
+                logger.warning(
+                    f"{name} {meta['version']} was trained on feature version "
+                    f"{meta.get('feature_version', 'unknown')}, not {FEATURE_VERSION}; retrain it"
+                )
+                continue
+            if handle.version > 0:
+                # A retrained model was swapped in while this one was loading
+                continue
+
+            handle.swap(model, self._registry_info(meta, time.perf_counter() - started))
+            logger.success(
+                f"Loaded {name} {meta['version']} (trained on {meta.get('window')}) "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+
+    @staticmethod
+    def _registry_info(meta: dict, load_seconds: float = 0.0) -> dict:
+        return {
+            'registry_version': meta['version'],
+            'source': meta.get('source'),
+            'window': meta.get('window'),
+            'load_seconds': load_seconds,
+        }
+
+    def rollback(self, name: str = SPREAD_MODELS) -> bool:
+        """
+        Take the model version in service out and serve the previous good one.
+
+        The previous model is normally still in memory and is swapped back
+        in at once; otherwise it is loaded from the registry.
+        """
+        version = self.registry.rollback(name)
+        if version is None:
+            return False
+
+        handle = self.models[name]
+        if handle.rollback():
+            logger.success(f"Rolled {name} back to {version} (from memory)")
+            return True
+
+        model, meta = self.registry.load(name, version)
+        handle.swap(model, self._registry_info(meta))
+        logger.success(f"Rolled {name} back to {version}")
+        return True
 
     def on_price_update(self, price_data):
         """Callback for new price data."""
         # Update detector (which checks for arbitrage)
-        self.detector.update_price(price_data)
+        bars = self.detector.update_price(price_data)
+
+        # The ML features only move when a bar closes
+        if bars:
+            self.drift.observe(price_data.symbol)
+            self.online_predictor.observe(price_data.symbol)
 
     async def train_ml_model(self):
-        """Periodically train the ML model on collected data."""
+        """Retrain the ML models off the event loop when drift calls for it, and hot-swap them."""
         while self.running:
-            await asyncio.sleep(self.training_interval)
-
-            logger.info("Training ML model on historical data...")
-
-            symbols = ['BTC-USD', 'ETH-USD', 'SOL-USD']
-            all_data = []
-
-            for symbol in symbols:
-                df = self.detector.get_historical_data(symbol)
-                if not df.empty:
-                    all_data.append(df)
+            await asyncio.sleep(self.drift_check_interval)
 
-            if all_data:
-                import pandas as pd
-                combined_df = pd.concat(all_data, ignore_index=True)
+            reason = self.drift.should_retrain()
+            if reason is None:
+                continue
 
-                if len(combined_df) > 100:
-                    success = self.ml_predictor.train(combined_df)
-                    if success:
-                        logger.success("ML model training completed")
+            logger.info(f"Training ML model on buffered data ({reason})...")
 
-                        # Save model
-                        self.ml_predictor.save("models/spread_predictor.pkl")
-                else:
-                    logger.warning("Not enough data for ML training yet")
+            symbols = ['BTC-USD', 'ETH-USD', 'SOL-USD']
+            metrics = await self.trainer.retrain(self.detector, symbols)
+            self.drift.record_retrain(metrics['train_seconds'] if metrics else 0.0)
+
+            if metrics and metrics['swapped']:
+                logger.success("ML model training completed")
+
+                # Register the new version without blocking ingestion
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._register_spread_models, self.ml_predictor.get(), metrics
+                )
+
+    def _register_spread_models(self, models: SpreadModelSet, metrics: dict):
+        try:
+            self.registry.register(SPREAD_MODELS, models, {
+                'source': 'background',
+                'window': metrics['window'],
+                'data_hash': metrics['data_hash'],
+                'validation': metrics['validation'],
+                'n_rows': metrics['n_rows'],
+            })
+        except Exception as e:
+            logger.error(f"Error registering spread models: {e}")
 
     async def run_data_collection(self):
         """Run the data collection and arbitrage detection."""
@@ -65,7 +151,7 @@ class ArbitrageSystem:
 
     def start_dashboard(self):
         """Start the web dashboard in a separate thread."""
-        self.dashboard = ArbitrageDashboard(self.detector, self.ml_predictor)
+        self.dashboard = ArbitrageDashboard(self.detector, self.ml_predictor, self.online_predictor)
         self.dashboard.run(host='0.0.0.0', port=8050, debug=False)
 
     async def run(self):
@@ -80,6 +166,9 @@ class ArbitrageSystem:
         logger.info("Dashboard: http://localhost:8050")
         logger.info("=" * 60)
 
+        # Load models without holding up ingestion
+        threading.Thread(target=self.load_models, name="model-loader", daemon=True).start()
+
         # Start dashboard in separate thread
         dashboard_thread = threading.Thread(target=self.start_dashboard, daemon=True)
         dashboard_thread.start()
@@ -90,7 +179,7 @@ class ArbitrageSystem:
         # Run data collection and ML training concurrently
         await asyncio.gather(
             self.run_data_collection(),
-            # self.train_ml_model(),
+            self.train_ml_model(),
             return_exceptions=True
         )
 
@@ -98,6 +187,7 @@ class ArbitrageSystem:
         """Stop the system."""
         logger.info("Stopping arbitrage system...")
         self.running = False
+        self.trainer.shutdown()
 
 
 def main():
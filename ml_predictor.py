@@ -1,107 +1,349 @@
 """Machine learning models for spread prediction and opportunity scoring."""
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+from pathlib import Path
+from typing import Optional, Dict, Iterable, List, Tuple
 import joblib
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingRegressor
+import xgboost as xgb
+from sklearn.ensemble import (
+    RandomForestClassifier, GradientBoostingRegressor, HistGradientBoostingRegressor
+)
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
+from threadpoolctl import threadpool_limits
 from loguru import logger
 
-from config import ArbitrageOpportunity
+from config import ArbitrageOpportunity, Exchange
+from drift_monitor import reference_profile
+from feature_engine import batch_features
+from tree_export import export_model, load_model
 
 
-class SpreadPredictor:
-    """Predicts future spreads using historical data."""
+# Longest rolling window used by SpreadPredictor.engineer_features
+FEATURE_WARMUP = 20
 
-    def __init__(self):
-        self.model = GradientBoostingRegressor(
-            n_estimators=100,
-            max_depth=5,
-            learning_rate=0.1,
-            random_state=42
-        )
-        self.scaler = StandardScaler()
-        self.is_trained = False
-        self.feature_names = []
+# Feature-definition version; bump whenever engineer_features, create_target,
+# build_training_set or the OpportunityScorer feature layout change so cached
+# feature matrices (see feature_store.py) are rebuilt
+FEATURE_VERSION = 4
 
-    def engineer_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Create features from raw price data."""
-        if df.empty:
-            return pd.DataFrame()
 
-        # Ensure timestamp is datetime
-        df = df.copy()
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp')
+# Model backends SpreadPredictor can train with
+SPREAD_BACKENDS = ('gbr', 'hist', 'xgboost')
 
-        # Create features by exchange
-        features_list = []
-
-        for exchange in df['exchange'].unique():
-            ex_df = df[df['exchange'] == exchange].copy()
-
-            if len(ex_df) < 10:
+# Default hyperparameters per backend (100 trees of depth 5 at lr 0.1)
+DEFAULT_SPREAD_PARAMS = {
+    'gbr': {'n_estimators': 100, 'max_depth': 5, 'learning_rate': 0.1},
+    'hist': {'max_iter': 100, 'max_depth': 5, 'learning_rate': 0.1},
+    'xgboost': {'n_estimators': 100, 'max_depth': 5, 'learning_rate': 0.1},
+}
+
+# Stable OpportunityScorer exchange codes (0 = unknown exchange); append new
+# exchanges at the end of config.Exchange so existing codes never change
+EXCHANGE_CODES = {exchange.value: code for code, exchange in enumerate(Exchange, start=1)}
+
+# Default OpportunityScorer random forest hyperparameters
+DEFAULT_SCORER_PARAMS = {'n_estimators': 100, 'max_depth': 10}
+
+# Parameter holding the number of boosting rounds for each backend
+N_ROUNDS_PARAM = {'gbr': 'n_estimators', 'hist': 'max_iter', 'xgboost': 'n_estimators'}
+
+
+def make_spread_model(backend: str = 'gbr', n_jobs: int = -1, params: Optional[Dict] = None):
+    """
+    Build an unfitted regressor for a SpreadPredictor backend.
+
+    Args:
+        backend: 'gbr' (sklearn GradientBoostingRegressor, exact splits, single
+            thread), 'hist' (sklearn HistGradientBoostingRegressor) or
+            'xgboost' (XGBRegressor with tree_method='hist')
+        n_jobs: Threads for xgboost (-1 = all cores); 'hist' threads are
+            limited at fit time, 'gbr' is always single-threaded
+        params: Overrides for DEFAULT_SPREAD_PARAMS[backend]
+    """
+    if backend not in SPREAD_BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {SPREAD_BACKENDS}")
+
+    model_params = {**DEFAULT_SPREAD_PARAMS[backend], **(params or {})}
+
+    if backend == 'gbr':
+        return GradientBoostingRegressor(random_state=42, **model_params)
+    if backend == 'hist':
+        return HistGradientBoostingRegressor(early_stopping=False, random_state=42, **model_params)
+    return xgb.XGBRegressor(
+        tree_method='hist', n_jobs=n_jobs, random_state=42, **model_params
+    )
+
+
+def exchange_pairs(exchanges: Iterable[str]) -> List[Tuple[str, str]]:
+    """Every unordered exchange pair once, as sorted (ex1, ex2) tuples."""
+    exchanges = sorted(set(exchanges))
+    return [(ex1, ex2) for i, ex1 in enumerate(exchanges) for ex2 in exchanges[i + 1:]]
+
+
+def next_spread(df: pd.DataFrame, ex1: str, ex2: str) -> pd.Series:
+    """Next-step spread (%) of ex2 over ex1 from engineered {exchange}_price columns."""
+    spread = ((df[f"{ex2}_price"] - df[f"{ex1}_price"]) / df[f"{ex1}_price"]) * 100
+    return spread.shift(-1)
+
+
+def time_ordered_split(n_rows: int, test_fraction: float):
+    """Split row positions into leading train and trailing test index arrays."""
+    n_test = max(1, int(n_rows * test_fraction))
+    return np.arange(n_rows - n_test), np.arange(n_rows - n_test, n_rows)
+
+
+def ensemble_size(model) -> int:
+    """Number of boosting rounds in a fitted spread model."""
+    if isinstance(model, GradientBoostingRegressor):
+        return len(model.estimators_)
+    if isinstance(model, HistGradientBoostingRegressor):
+        return model.n_iter_
+    return model.get_booster().num_boosted_rounds()
+
+
+def extend_ensemble(model, X: np.ndarray, y: np.ndarray, n_trees: int, max_trees: int):
+    """
+    Boost a fitted spread model by n_trees more rounds on (X, y), in place.
+
+    When the ensemble would exceed max_trees, its oldest rounds are dropped
+    first. The new rounds are fitted to the residuals of the remaining
+    ensemble, so on (X, y) they also make up for what the dropped rounds
+    contributed.
+
+    Args:
+        model: Fitted GradientBoostingRegressor, HistGradientBoostingRegressor
+            or XGBRegressor
+        X: Scaled features, on the scale the model was trained on
+        y: Targets
+        n_trees: Rounds to add
+        max_trees: Cap on the rounds kept
+
+    Returns:
+        The extended model (a new object for XGBRegressor)
+    """
+    drop = max(0, ensemble_size(model) + n_trees - max_trees)
+
+    if isinstance(model, GradientBoostingRegressor):
+        if drop:
+            model.estimators_ = model.estimators_[drop:]
+            model.train_score_ = model.train_score_[drop:]
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_trees)
+        model.fit(X, y)
+        model.set_params(warm_start=False)
+        return model
+
+    if isinstance(model, HistGradientBoostingRegressor):
+        if drop:
+            model._predictors = model._predictors[drop:]  # n_iter_ follows
+            model.train_score_ = model.train_score_[drop:]
+            model.validation_score_ = model.validation_score_[drop:]
+        model.set_params(warm_start=True, max_iter=model.n_iter_ + n_trees)
+        model.fit(X, y)
+        model.set_params(warm_start=False)
+        return model
+
+    booster = model.get_booster()
+    best_iteration = getattr(model, 'best_iteration', None)
+    if best_iteration is not None:
+        booster = booster[:best_iteration + 1]  # Rounds past the best one are never used
+    if drop:
+        booster = booster[drop:]
+    extended = xgb.XGBRegressor(**{**model.get_params(), 'n_estimators': n_trees,
+                                   'early_stopping_rounds': None})
+    extended.fit(X, y, xgb_model=booster, verbose=False)
+    return extended
+
+
+def truncate_ensemble(model, n_rounds: int):
+    """
+    Keep only the first n_rounds boosting rounds of a fitted sklearn spread model, in place.
+
+    Used after early stopping, which grows the ensemble past the round that
+    scored best on validation (xgboost models stop at best_iteration instead).
+
+    Args:
+        model: Fitted GradientBoostingRegressor or HistGradientBoostingRegressor
+        n_rounds: Rounds to keep
+    """
+    if isinstance(model, GradientBoostingRegressor):
+        model.estimators_ = model.estimators_[:n_rounds]
+        model.train_score_ = model.train_score_[:n_rounds]
+        for name in ('oob_improvement_', 'oob_scores_'):
+            if hasattr(model, name):
+                setattr(model, name, getattr(model, name)[:n_rounds])
+        if hasattr(model, 'n_estimators_'):
+            model.n_estimators_ = n_rounds
+        model.set_params(n_estimators=n_rounds)
+        return
+
+    # The score arrays start with the score before the first round
+    model._predictors = model._predictors[:n_rounds]  # n_iter_ follows
+    model.train_score_ = model.train_score_[:n_rounds + 1]
+    model.validation_score_ = model.validation_score_[:n_rounds + 1]
+    model.set_params(max_iter=n_rounds)
+
+
+class BoosterRegressor:
+    """Minimal regressor interface around a trained xgboost Booster."""
+
+    def __init__(self, booster: xgb.Booster):
+        self.booster = booster
+
+    def predict(self, X) -> np.ndarray:
+        return self.booster.predict(xgb.DMatrix(np.asarray(X, dtype=np.float32)))
+
+    def score(self, X, y) -> float:
+        y = np.asarray(y, dtype=float)
+        residual = ((y - self.predict(X)) ** 2).sum()
+        total = ((y - y.mean()) ** 2).sum()
+        return 1 - residual / total if total > 0 else 0.0
+
+
+class _SpilledChunkIter(xgb.DataIter):
+    """Feeds spilled feature chunks to XGBoost one at a time (external memory)."""
+
+    def __init__(self, chunk_files: List[tuple], scaler: StandardScaler, column: int, cache_prefix: str):
+        self._chunk_files = chunk_files
+        self._scaler = scaler
+        self._column = column
+        self._position = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data) -> bool:
+        if self._position == len(self._chunk_files):
+            return False
+        X_file, Y_file = self._chunk_files[self._position]
+        X = self._scaler.transform(np.load(X_file)).astype(np.float32)
+        input_data(data=X, label=np.load(Y_file)[:, self._column])
+        self._position += 1
+        return True
+
+    def reset(self):
+        self._position = 0
+
+
+def spill_pair_chunks(chunks: Iterable[pd.DataFrame], work_dir: Path) -> Tuple[List[tuple], List[str], List[str]]:
+    """
+    Engineer one symbol's time-ordered raw-price chunks into pair training
+    chunks on disk, as build_pair_training_set does for a whole history.
+
+    Each chunk is prefixed with the last FEATURE_WARMUP + 1 rows per exchange
+    of the previous one, so rolling windows and the next-step targets see the
+    same context as a single batch run. The first usable chunk fixes the
+    feature columns and exchange pairs; later chunks that do not produce
+    exactly those (in any column order) are skipped.
+
+    Args:
+        chunks: Long-format price frames (timestamp/exchange/price/...) of a
+            single symbol
+        work_dir: Directory the chunks are spilled to
+
+    Returns:
+        ([(X file, Y file)] per spilled chunk, feature names, pair names as
+        "ex1->ex2"); Y holds one column per pair
+    """
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    chunk_files = []
+    feature_names, pairs = None, None
+    carry, emitted_until = None, None
+
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        frame = chunk if carry is None else pd.concat([carry, chunk], ignore_index=True)
+        carry = frame.sort_values('timestamp').groupby('exchange').tail(FEATURE_WARMUP + 1)
+
+        features_df = batch_features(frame)
+        if features_df.empty:
+            continue
+        exchanges = [ex for ex in frame['exchange'].unique() if f"{ex}_price" in features_df.columns]
+        chunk_features = [col for col in features_df.columns if col != 'timestamp']
+
+        if pairs is None:
+            if len(exchanges) < 2:
                 continue
+            feature_names, pairs = chunk_features, exchange_pairs(exchanges)
+        elif set(chunk_features) != set(feature_names) or exchange_pairs(exchanges) != pairs:
+            logger.warning(
+                f"Skipping chunk from {chunk['timestamp'].min()}: its columns differ from the first chunk's"
+            )
+            continue
 
-            # Price-based features
-            ex_df['price_change'] = ex_df['price'].pct_change()
-            ex_df['price_ma_5'] = ex_df['price'].rolling(window=5).mean()
-            ex_df['price_ma_20'] = ex_df['price'].rolling(window=20).mean()
-            ex_df['price_std_5'] = ex_df['price'].rolling(window=5).std()
-
-            # Volatility
-            ex_df['volatility'] = ex_df['price_change'].rolling(window=10).std()
-
-            # Bid-ask spread (if available)
-            if 'bid' in ex_df.columns and 'ask' in ex_df.columns:
-                ex_df['bid_ask_spread'] = (ex_df['ask'] - ex_df['bid']) / ex_df['bid']
-            else:
-                ex_df['bid_ask_spread'] = 0
-
-            # Volume features
-            if 'volume' in ex_df.columns:
-                ex_df['volume_ma'] = ex_df['volume'].rolling(window=5).mean()
-            else:
-                ex_df['volume_ma'] = 0
-
-            # Time features
-            ex_df['hour'] = ex_df['timestamp'].dt.hour
-            ex_df['minute'] = ex_df['timestamp'].dt.minute
+        targets = pd.DataFrame({
+            f"{ex1}->{ex2}": next_spread(features_df, ex1, ex2) for ex1, ex2 in pairs
+        })
+        timestamps = features_df['timestamp']
+        features_df = features_df[feature_names]
 
-            # Prefix with exchange name
-            feature_cols = [
-                'price', 'price_change', 'price_ma_5', 'price_ma_20',
-                'price_std_5', 'volatility', 'bid_ask_spread', 'volume_ma',
-                'hour', 'minute'
-            ]
+        valid = ~(features_df.isna().any(axis=1) | targets.isna().any(axis=1))
+        if emitted_until is not None:
+            valid &= timestamps > emitted_until
+        if not valid.any():
+            continue
+        emitted_until = timestamps[valid].max()
 
-            ex_df = ex_df[['timestamp'] + feature_cols].copy()
-            ex_df.columns = ['timestamp'] + [f"{exchange}_{col}" for col in feature_cols]
+        X_file = work_dir / f"chunk_{len(chunk_files):05d}_X.npy"
+        Y_file = work_dir / f"chunk_{len(chunk_files):05d}_Y.npy"
+        np.save(X_file, features_df[valid].to_numpy(dtype=np.float32))
+        np.save(Y_file, targets[valid].to_numpy(dtype=np.float32))
+        chunk_files.append((str(X_file), str(Y_file)))
 
-            features_list.append(ex_df)
+    pair_names = [f"{ex1}->{ex2}" for ex1, ex2 in pairs or []]
+    return chunk_files, feature_names or [], pair_names
 
-        if not features_list:
-            return pd.DataFrame()
 
-        # Merge all exchange features on timestamp
-        merged = features_list[0]
-        for ex_features in features_list[1:]:
-            merged = pd.merge(merged, ex_features, on='timestamp', how='outer')
+class SpreadPredictor:
+    """Predicts future spreads using historical data."""
 
-        # Forward fill missing values
-        merged = merged.fillna(method='ffill').dropna()
+    def __init__(self, backend: str = 'gbr', n_jobs: int = -1,
+                 early_stopping_rounds: Optional[int] = 10, test_fraction: float = 0.2,
+                 validation_fraction: float = 0.1, model_params: Optional[Dict] = None,
+                 target_pair: Optional[Tuple[str, str]] = None):
+        """
+        Args:
+            backend: Model backend, one of SPREAD_BACKENDS
+            n_jobs: Training threads for multi-threaded backends (-1 = all cores)
+            early_stopping_rounds: Stop adding trees after this many rounds
+                without improvement on the validation split (None disables)
+            test_fraction: Trailing share of rows held out for the reported test R²
+            validation_fraction: Trailing share of the training rows used for early stopping
+            model_params: Overrides for the backend's default hyperparameters
+            target_pair: (ex1, ex2) whose spread is predicted (default: the
+                first two exchanges in the training data)
+        """
+        self.backend = backend
+        self.n_jobs = n_jobs
+        self.early_stopping_rounds = early_stopping_rounds
+        self.test_fraction = test_fraction
+        self.validation_fraction = validation_fraction
+        self.model_params = dict(model_params or {})
+        self.target_pair = tuple(target_pair) if target_pair else None
+        self.model = make_spread_model(backend, n_jobs, self.model_params)
+        self.scaler = StandardScaler()
+        self.is_trained = False
+        self.feature_names = []
+        self.train_metrics: Dict = {}
+        self.feature_profile: Optional[Dict] = None  # Training feature deciles for drift monitoring
 
-        return merged
+    def engineer_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Create features from raw price data (see feature_engine.batch_features)."""
+        return batch_features(df)
 
     def create_target(self, df: pd.DataFrame, exchanges: List[str]) -> pd.Series:
         """Create target variable: future spread between exchanges."""
         if df.empty or len(exchanges) < 2:
             return pd.Series()
 
-        # Calculate spread between first two exchanges
-        ex1, ex2 = exchanges[0], exchanges[1]
+        # Calculate spread between the target pair (default: first two exchanges)
+        ex1, ex2 = self.target_pair or (exchanges[0], exchanges[1])
         price_col1 = f"{ex1}_price"
         price_col2 = f"{ex2}_price"
 
@@ -109,73 +351,186 @@ class SpreadPredictor:
             return pd.Series()
 
         # Future spread (1 step ahead)
-        spread = ((df[price_col2] - df[price_col1]) / df[price_col1]) * 100
-        target = spread.shift(-1)  # Predict next spread
+        return next_spread(df, ex1, ex2)
+
+    def build_training_set(self, historical_df: pd.DataFrame):
+        """
+        Engineer features and the next-step spread target from raw price rows.
 
-        return target
+        Returns:
+            (X, y) time-ordered, with NaN rows and the timestamp column removed,
+            or (None, None) if the data cannot produce a training set
+        """
+        # Engineer features
+        features_df = self.engineer_features(historical_df)
 
-    def train(self, historical_df: pd.DataFrame):
-        """Train the spread prediction model."""
-        try:
-            # Engineer features
-            features_df = self.engineer_features(historical_df)
+        if features_df.empty or len(features_df) < 50:
+            logger.warning("Insufficient data for training")
+            return None, None
 
-            if features_df.empty or len(features_df) < 50:
-                logger.warning("Insufficient data for training")
-                return False
+        # Get unique exchanges
+        exchanges = historical_df['exchange'].unique().tolist()
 
-            # Get unique exchanges
-            exchanges = historical_df['exchange'].unique().tolist()
+        if len(exchanges) < 2:
+            logger.warning("Need at least 2 exchanges for training")
+            return None, None
 
-            if len(exchanges) < 2:
-                logger.warning("Need at least 2 exchanges for training")
-                return False
+        # Create target
+        target = self.create_target(features_df, exchanges)
 
-            # Create target
-            target = self.create_target(features_df, exchanges)
+        if target.empty:
+            logger.warning("Failed to create target variable")
+            return None, None
 
-            if target.empty:
-                logger.warning("Failed to create target variable")
-                return False
+        # Align features and target
+        features_df = features_df.iloc[:-1]  # Remove last row (no future target)
+        target = target.iloc[:-1]  # Remove last row
+
+        # Remove timestamp column
+        if 'timestamp' in features_df.columns:
+            features_df = features_df.drop('timestamp', axis=1)
+
+        # Drop rows with NaN
+        valid_idx = ~(features_df.isna().any(axis=1) | target.isna())
+        return features_df[valid_idx], target[valid_idx]
+
+    def build_pair_training_set(self, historical_df: pd.DataFrame):
+        """
+        Engineer features and next-step spread targets for every exchange pair.
 
-            # Align features and target
-            features_df = features_df.iloc[:-1]  # Remove last row (no future target)
-            target = target.iloc[:-1]  # Remove last row
+        historical_df must hold a single symbol. All pairs share the same
+        feature rows, so one feature matrix serves every pair model.
 
-            # Remove timestamp column
-            if 'timestamp' in features_df.columns:
-                features_df = features_df.drop('timestamp', axis=1)
+        Returns:
+            (X, Y) time-ordered, with one Y column per pair named "ex1->ex2",
+            or (None, None) if the data cannot produce a training set
+        """
+        features_df = self.engineer_features(historical_df)
+
+        if features_df.empty or len(features_df) < 50:
+            logger.warning("Insufficient data for training")
+            return None, None
+
+        pairs = exchange_pairs(
+            ex for ex in historical_df['exchange'].unique() if f"{ex}_price" in features_df.columns
+        )
+        if not pairs:
+            logger.warning("Need at least 2 exchanges for training")
+            return None, None
+
+        targets = pd.DataFrame({
+            f"{ex1}->{ex2}": next_spread(features_df, ex1, ex2) for ex1, ex2 in pairs
+        })
+
+        # Align features and targets, dropping the last row (no future target)
+        features_df = features_df.iloc[:-1].drop('timestamp', axis=1)
+        targets = targets.iloc[:-1]
+
+        valid_idx = ~(features_df.isna().any(axis=1) | targets.isna().any(axis=1))
+        return features_df[valid_idx], targets[valid_idx]
+
+    def _fit_model(self, X_train: np.ndarray, y_train: np.ndarray,
+                   X_val: Optional[np.ndarray] = None, y_val: Optional[np.ndarray] = None) -> int:
+        """
+        Fit self.model, early-stopping on (X_val, y_val) when given.
+
+        Returns:
+            Boosting rounds the fitted model predicts with
+        """
+        if X_val is None or not self.early_stopping_rounds:
+            with threadpool_limits(self.n_jobs if self.n_jobs > 0 else None):
+                self.model.fit(X_train, y_train)
+            return ensemble_size(self.model)
+
+        if self.backend == 'xgboost':
+            self.model.set_params(early_stopping_rounds=self.early_stopping_rounds)
+            self.model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+            return self.model.best_iteration + 1
+
+        # sklearn backends: grow the ensemble with warm_start and stop once the
+        # validation error has not improved for early_stopping_rounds trees
+        rounds_param = N_ROUNDS_PARAM[self.backend]
+        max_rounds = self.model.get_params()[rounds_param]
+        step = max(1, min(10, self.early_stopping_rounds))
+        best_error, best_rounds, rounds = np.inf, 0, 0
+
+        self.model.set_params(warm_start=True)
+        with threadpool_limits(self.n_jobs if self.n_jobs > 0 else None):
+            while rounds < max_rounds:
+                rounds = min(rounds + step, max_rounds)
+                self.model.set_params(**{rounds_param: rounds})
+                self.model.fit(X_train, y_train)
+
+                error = np.mean((self.model.predict(X_val) - y_val) ** 2)
+                if error < best_error:
+                    best_error, best_rounds = error, rounds
+                elif rounds - best_rounds >= self.early_stopping_rounds:
+                    break
+        self.model.set_params(warm_start=False)
+
+        # Serve (and export) the ensemble that scored best, not the rounds after it
+        if best_rounds < ensemble_size(self.model):
+            truncate_ensemble(self.model, best_rounds)
+        return best_rounds
+
+    def fit_matrix(self, X: pd.DataFrame, y: pd.Series,
+                   feature_names: Optional[List[str]] = None) -> bool:
+        """
+        Fit scaler and model on a time-ordered training set from build_training_set.
 
-            # Drop rows with NaN
-            valid_idx = ~(features_df.isna().any(axis=1) | target.isna())
-            X = features_df[valid_idx]
-            y = target[valid_idx]
+        X may also be a plain (or memory-mapped) array, in which case
+        feature_names gives its column names.
 
-            if len(X) < 20:
+        The trailing test_fraction of rows is held out for the reported test R²
+        and the trailing validation_fraction of the rest drives early stopping,
+        so no future rows leak into training.
+        """
+        try:
+            if X is None or len(X) < 20:
                 logger.warning("Not enough valid samples for training")
                 return False
 
             # Store feature names
-            self.feature_names = X.columns.tolist()
+            if isinstance(X, pd.DataFrame):
+                self.feature_names = X.columns.tolist()
+            elif feature_names is not None:
+                self.feature_names = list(feature_names)
+            X = np.asarray(X, dtype=np.float64)
+            y = np.asarray(y, dtype=np.float64)
 
-            # Train/test split
-            X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42
-            )
+            # Time-ordered train/test split
+            train_idx, test_idx = time_ordered_split(len(X), self.test_fraction)
+            fit_idx, val_idx = time_ordered_split(len(train_idx), self.validation_fraction)
 
             # Scale features
-            X_train_scaled = self.scaler.fit_transform(X_train)
-            X_test_scaled = self.scaler.transform(X_test)
+            self.feature_profile = reference_profile(X[train_idx])
+            X_train_scaled = self.scaler.fit_transform(X[train_idx])
+            X_test_scaled = self.scaler.transform(X[test_idx])
 
             # Train model
-            self.model.fit(X_train_scaled, y_train)
+            self.model = make_spread_model(self.backend, self.n_jobs, self.model_params)
+            started = time.perf_counter()
+            best_rounds = self._fit_model(
+                X_train_scaled[fit_idx], y[train_idx][fit_idx],
+                X_train_scaled[val_idx], y[train_idx][val_idx]
+            )
+            fit_seconds = time.perf_counter() - started
 
             # Evaluate
-            train_score = self.model.score(X_train_scaled, y_train)
-            test_score = self.model.score(X_test_scaled, y_test)
+            train_score = self.model.score(X_train_scaled, y[train_idx])
+            test_score = self.model.score(X_test_scaled, y[test_idx])
+            self.train_metrics = {
+                'backend': self.backend,
+                'fit_seconds': fit_seconds,
+                'train_r2': train_score,
+                'test_r2': test_score,
+                'n_rows': len(X),
+                'best_rounds': best_rounds,
+            }
 
             logger.info(
-                f"Model trained | Train R²: {train_score:.3f} | Test R²: {test_score:.3f}"
+                f"Model trained ({self.backend}, {fit_seconds:.2f}s) | "
+                f"Train R²: {train_score:.3f} | Test R²: {test_score:.3f}"
             )
 
             self.is_trained = True
@@ -185,6 +540,187 @@ class SpreadPredictor:
             logger.error(f"Error training model: {e}")
             return False
 
+    def train(self, historical_df: pd.DataFrame):
+        """Train the spread prediction model."""
+        try:
+            X, y = self.build_training_set(historical_df)
+        except Exception as e:
+            logger.error(f"Error training model: {e}")
+            return False
+        if X is None:
+            return False
+        return self.fit_matrix(X, y)
+
+    def extend(self, X, y, n_trees: int = 20, max_trees: int = 200,
+               feature_names: Optional[List[str]] = None) -> bool:
+        """
+        Add n_trees boosting rounds fitted on the newest rows to the trained model.
+
+        The scaler is kept so the new trees split on the same scale as the
+        old ones, and the oldest rounds are dropped beyond max_trees (see
+        extend_ensemble). A fraction of the cost of fit_matrix on the same rows.
+
+        Args:
+            X: Newest feature rows (DataFrame, or array with feature_names)
+            y: Their targets
+
+        Returns:
+            False if the model cannot be extended (untrained, compiled or
+            out-of-core, or trained on features X lacks) or on error
+        """
+        names = X.columns.tolist() if isinstance(X, pd.DataFrame) else list(feature_names or [])
+        if not self.is_trained or not set(self.feature_names) <= set(names) or not isinstance(
+                self.model, (GradientBoostingRegressor, HistGradientBoostingRegressor, xgb.XGBRegressor)):
+            return False
+        if len(X) < 20:
+            logger.warning("Not enough valid samples for training")
+            return False
+
+        try:
+            # Buffer snapshots may list the features in another order, or more
+            # of them than a pruned model reads
+            columns = [names.index(name) for name in self.feature_names]
+            X = np.asarray(X, dtype=np.float64)[:, columns]
+            X = (X - self.scaler.mean_) / self.scaler.scale_
+            y = np.asarray(y, dtype=np.float64)
+
+            started = time.perf_counter()
+            with threadpool_limits(self.n_jobs if self.n_jobs > 0 else None):
+                self.model = extend_ensemble(self.model, X, y, n_trees, max_trees)
+            fit_seconds = time.perf_counter() - started
+
+            self.train_metrics = {
+                'backend': self.backend,
+                'fit_seconds': fit_seconds,
+                'train_r2': self.model.score(X, y),
+                'n_rows': len(X),
+                'n_trees': ensemble_size(self.model),
+                'incremental': True,
+            }
+            logger.info(
+                f"Model extended by {n_trees} trees ({self.backend}, {fit_seconds:.2f}s, "
+                f"{self.train_metrics['n_trees']} total)"
+            )
+            return True
+
+        except Exception as e:
+            logger.error(f"Error extending model: {e}")
+            return False
+
+    def train_streaming(self, chunks: Iterable[pd.DataFrame], work_dir: Optional[str] = None,
+                        validation_chunks: int = 1, num_boost_round: int = 100) -> bool:
+        """
+        Train out-of-core on a stream of one symbol's time-ordered raw-price
+        chunks, predicting target_pair (default: the first exchange pair).
+
+        Chunks are engineered and spilled to disk by spill_pair_chunks and
+        XGBoost trains from an external-memory iterator, so peak memory is
+        bounded by the chunk size rather than the history. Use
+        SpreadModelSet.train_streaming to train every pair of several symbols.
+
+        Args:
+            chunks: Long-format price frames (timestamp/exchange/price/...)
+            work_dir: Where to spill chunks (default: a temporary directory)
+            validation_chunks: Trailing chunks held out for a time-ordered R²
+            num_boost_round: Boosting rounds
+        """
+        tmp_dir = None
+        if work_dir is None:
+            tmp_dir = tempfile.TemporaryDirectory(prefix="spread_stream_")
+            work_dir = tmp_dir.name
+
+        try:
+            chunk_files, feature_names, pair_names = spill_pair_chunks(chunks, Path(work_dir))
+            pair_name = '->'.join(self.target_pair) if self.target_pair else next(iter(pair_names), None)
+            if pair_name not in pair_names:
+                logger.warning(f"No training data for pair {pair_name}")
+                return False
+            return self.fit_spilled(
+                chunk_files, feature_names, pair_names.index(pair_name), Path(work_dir),
+                validation_chunks, num_boost_round
+            )
+        except Exception as e:
+            logger.error(f"Error in streaming training: {e}")
+            return False
+        finally:
+            if tmp_dir is not None:
+                tmp_dir.cleanup()
+
+    def fit_spilled(self, chunk_files: List[tuple], feature_names: List[str], column: int,
+                    work_dir: Path, validation_chunks: int = 1, num_boost_round: int = 100) -> bool:
+        """
+        Fit scaler and an XGBoost booster on chunks from spill_pair_chunks.
+
+        Args:
+            chunk_files: (X file, Y file) per chunk, time-ordered
+            feature_names: Columns of the X files
+            column: Y column (pair) to predict
+            work_dir: Where XGBoost keeps its external-memory cache
+            validation_chunks: Trailing chunks held out for a time-ordered R²
+            num_boost_round: Boosting rounds
+        """
+        validation_chunks = max(0, min(validation_chunks, len(chunk_files) - 1))
+        train_files = chunk_files[:len(chunk_files) - validation_chunks]
+        if not train_files:
+            logger.warning("Insufficient data for streaming training")
+            return False
+
+        self.feature_names = list(feature_names)
+        self.scaler = StandardScaler()
+        for X_file, _ in train_files:
+            self.scaler.partial_fit(np.load(X_file))
+
+        # External-memory boosting over the spilled chunks
+        started = time.perf_counter()
+        data_iter = _SpilledChunkIter(train_files, self.scaler, column, str(Path(work_dir) / f"xgb_cache_{column}"))
+        dtrain = xgb.DMatrix(data_iter)
+        params = {
+            'objective': 'reg:squarederror',
+            'tree_method': 'hist',
+            'max_depth': 5,
+            'learning_rate': 0.1,
+            'seed': 42,
+            'nthread': self.n_jobs,
+        }
+        booster = xgb.train(params, dtrain, num_boost_round=num_boost_round)
+        self.model = BoosterRegressor(booster)
+        self.backend = 'xgboost'
+        fit_seconds = time.perf_counter() - started
+
+        # Time-ordered evaluation on the trailing chunks
+        n_rows = sum(len(np.load(Y_file, mmap_mode='r')) for _, Y_file in train_files)
+        self.train_metrics = {
+            'backend': self.backend,
+            'fit_seconds': fit_seconds,
+            'n_rows': n_rows,
+            'best_rounds': num_boost_round,
+        }
+        if validation_chunks > 0:
+            X_val = np.vstack([np.load(f) for f, _ in chunk_files[-validation_chunks:]])
+            y_val = np.concatenate([np.load(f)[:, column] for _, f in chunk_files[-validation_chunks:]])
+            self.train_metrics['test_r2'] = self.model.score(self.scaler.transform(X_val), y_val)
+            logger.info(
+                f"Streaming model trained on {n_rows:,} rows in {len(train_files)} chunks | "
+                f"Validation R²: {self.train_metrics['test_r2']:.3f}"
+            )
+        else:
+            logger.info(f"Streaming model trained on {n_rows:,} rows in {len(train_files)} chunks")
+
+        self.is_trained = True
+        return True
+
+    def predict(self, df: pd.DataFrame) -> np.ndarray:
+        """Predict the next-step spread for every feature row of df."""
+        if not self.is_trained:
+            return np.array([])
+
+        features_df = self.engineer_features(df)
+        if features_df.empty:
+            return np.array([])
+
+        features_df = features_df.reindex(columns=self.feature_names, fill_value=0)
+        return self.model.predict(self.scaler.transform(features_df))
+
     def predict_spread(self, current_df: pd.DataFrame) -> Optional[float]:
         """Predict future spread from current data."""
         if not self.is_trained:
@@ -219,12 +755,57 @@ class SpreadPredictor:
             logger.error(f"Error predicting spread: {e}")
             return None
 
+    def predict_batch(self, rows: List[Optional[Dict[str, float]]]) -> np.ndarray:
+        """
+        Predict future spread for many latest feature rows in one model call.
+
+        Args:
+            rows: One {feature_name: value} dict per symbol (e.g. from
+                IncrementalFeatureEngine.latest); None entries are skipped
+
+        Returns:
+            Predicted spread per row, NaN where the row was None or on error
+        """
+        predictions = np.full(len(rows), np.nan)
+        valid = [i for i, row in enumerate(rows) if row]
+        if not self.is_trained or not valid:
+            return predictions
+
+        try:
+            X = np.array([[rows[i].get(name, 0.0) for name in self.feature_names] for i in valid])
+            # Same arithmetic as scaler.transform without its input validation
+            X = (X - self.scaler.mean_) / self.scaler.scale_
+            predictions[valid] = self.model.predict(X)
+        except Exception as e:
+            logger.error(f"Error predicting spreads: {e}")
+
+        return predictions
+
+    def predict_latest(self, features: Optional[Dict[str, float]]) -> Optional[float]:
+        """
+        Predict future spread from an already-computed latest feature row.
+
+        Args:
+            features: {feature_name: value}, e.g. IncrementalFeatureEngine.latest();
+                missing features are 0 as in predict_spread
+
+        Returns:
+            Predicted spread, or None if untrained or no features
+        """
+        if not self.is_trained or not features:
+            return None
+
+        prediction = self.predict_batch([features])[0]
+        return None if np.isnan(prediction) else prediction
+
     def save(self, filepath: str):
         """Save model to disk."""
         joblib.dump({
             'model': self.model,
             'scaler': self.scaler,
             'feature_names': self.feature_names,
+            'target_pair': self.target_pair,
+            'feature_profile': self.feature_profile,
             'is_trained': self.is_trained
         }, filepath)
         logger.info(f"Model saved to {filepath}")
@@ -236,6 +817,8 @@ class SpreadPredictor:
             self.model = data['model']
             self.scaler = data['scaler']
             self.feature_names = data['feature_names']
+            self.target_pair = data.get('target_pair')
+            self.feature_profile = data.get('feature_profile')
             self.is_trained = data['is_trained']
             logger.info(f"Model loaded from {filepath}")
             return True
@@ -243,32 +826,389 @@ class SpreadPredictor:
             logger.error(f"Error loading model: {e}")
             return False
 
+    def export(self, directory: str):
+        """Export model and scaler as flat arrays for fast, memory-mapped inference."""
+        export_model(directory, self.model, self.scaler, meta={
+            'feature_names': self.feature_names,
+            'target_pair': self.target_pair,
+            'backend': self.backend,
+            'feature_profile': {name: values.tolist() for name, values in self.feature_profile.items()}
+            if self.feature_profile else None,
+        })
+        logger.info(f"Compiled model exported to {directory}")
+
+    def load_compiled(self, directory: str, mmap: bool = True) -> bool:
+        """
+        Load a model written by export() for inference only.
+
+        The compiled ensemble and scaler stand in for self.model and
+        self.scaler, so predict_batch / predict_latest work unchanged.
+        """
+        try:
+            self.model, self.scaler, meta = load_model(directory, mmap=mmap)
+            self.feature_names = meta['feature_names']
+            self.target_pair = tuple(meta['target_pair']) if meta.get('target_pair') else None
+            self.backend = meta.get('backend', self.backend)
+            if meta.get('feature_profile'):
+                self.feature_profile = {name: np.array(values) for name, values in meta['feature_profile'].items()}
+            self.is_trained = True
+            return True
+        except Exception as e:
+            logger.error(f"Error loading compiled model: {e}")
+            return False
+
+
+def benchmark_backends(training_sets: Dict[str, tuple], backends=SPREAD_BACKENDS,
+                       n_jobs: int = -1) -> List[Dict]:
+    """
+    Fit every backend on the same per-symbol pair training sets.
+
+    Args:
+        training_sets: {symbol: (X, Y, feature_names, pair_names)} as in
+            SpreadModelSet.fit_matrices, one matrix per symbol from
+            SpreadPredictor.build_pair_training_set
+
+    Returns:
+        One dict per backend with at least one trained pair model: backend,
+        fit_seconds (summed over pair models), train_r2 and test_r2 (mean
+        over pair models), n_rows (summed over symbols) and n_models
+    """
+    results = []
+    for backend in backends:
+        metrics = []
+        for symbol, (X, Y, feature_names, pair_names) in training_sets.items():
+            X, Y = np.asarray(X, dtype=np.float64), np.asarray(Y, dtype=np.float64)
+            for j, pair_name in enumerate(pair_names):
+                predictor = SpreadPredictor(backend=backend, n_jobs=n_jobs,
+                                            target_pair=tuple(pair_name.split('->')))
+                if predictor.fit_matrix(X, Y[:, j], feature_names=feature_names):
+                    metrics.append(predictor.train_metrics)
+        if not metrics:
+            continue
+        results.append({
+            'backend': backend,
+            'fit_seconds': sum(m['fit_seconds'] for m in metrics),
+            'train_r2': float(np.mean([m['train_r2'] for m in metrics])),
+            'test_r2': float(np.mean([m['test_r2'] for m in metrics])),
+            'n_rows': sum(len(X) for X, _, _, _ in training_sets.values()),
+            'n_models': len(metrics),
+        })
+    return results
+
+
+def _fit_pair_model(backend: str, model_params: Dict, pair: Tuple[str, str],
+                    X: np.ndarray, y: np.ndarray, feature_names: List[str]) -> SpreadPredictor:
+    """Fit one pair's SpreadPredictor (runs in a worker process)."""
+    # One thread per worker; the process pool provides the parallelism
+    predictor = SpreadPredictor(backend=backend, n_jobs=1, model_params=model_params, target_pair=pair)
+    predictor.fit_matrix(X, y, feature_names=feature_names)
+    return predictor
+
+
+class SpreadModelSet:
+    """
+    Spread predictors keyed by (symbol, ex1, ex2), with routing.
+
+    Each model sees a single symbol's prices and predicts one exchange pair's
+    spread. The opposite direction is derived from the same model, so every
+    (symbol, buy_exchange, sell_exchange) the detector evaluates is covered.
+    Pair models are fitted concurrently in a process pool.
+    """
+
+    def __init__(self, backend: str = 'gbr', model_params: Optional[Dict] = None,
+                 max_workers: Optional[int] = None):
+        """
+        Args:
+            backend: Model backend for every pair, one of SPREAD_BACKENDS
+            model_params: Overrides for the backend's default hyperparameters
+            max_workers: Worker processes for training (default: all cores)
+        """
+        self.backend = backend
+        self.model_params = dict(model_params or {})
+        self.max_workers = max_workers
+        self.models: Dict[Tuple[str, str, str], SpreadPredictor] = {}
+
+    @property
+    def is_trained(self) -> bool:
+        return bool(self.models)
+
+    def pairs(self, symbol: str) -> List[Tuple[str, str]]:
+        """Exchange pairs with a trained model for symbol."""
+        return [(ex1, ex2) for sym, ex1, ex2 in self.models if sym == symbol]
+
+    def feature_names(self, symbol: str) -> Optional[List[str]]:
+        """
+        Feature columns any pair model of symbol reads, for
+        IncrementalFeatureEngine.latest (None if no model serves symbol).
+        """
+        names = [name for (sym, _, _), model in self.models.items() if sym == symbol
+                 for name in model.feature_names]
+        return list(dict.fromkeys(names)) if names else None
+
+    def fit_matrices(self, training_sets: Dict[str, tuple],
+                     selected: Optional[Dict[Tuple[str, str, str], List[str]]] = None) -> bool:
+        """
+        Fit one model per (symbol, pair) in parallel.
+
+        Args:
+            training_sets: {symbol: (X, Y, feature_names, pair_names)} where X and
+                Y come from SpreadPredictor.build_pair_training_set
+            selected: {(symbol, ex1, ex2): feature names} fitting those pairs on
+                a subset of the columns (see feature_selection.py)
+
+        Returns:
+            True if at least one pair model is trained
+        """
+        tasks = []
+        for symbol, (X, Y, feature_names, pair_names) in training_sets.items():
+            X, Y = np.asarray(X, dtype=np.float64), np.asarray(Y, dtype=np.float64)
+            feature_names = list(feature_names)
+            for j, pair_name in enumerate(pair_names):
+                pair = tuple(pair_name.split('->'))
+                names = (selected or {}).get((symbol, *pair))
+                if names:
+                    columns = [feature_names.index(name) for name in names]
+                    args = (self.backend, self.model_params, pair, X[:, columns], Y[:, j], list(names))
+                else:
+                    args = (self.backend, self.model_params, pair, X, Y[:, j], feature_names)
+                tasks.append(((symbol, *pair), args))
+
+        if not tasks:
+            logger.warning("No pair training sets to fit")
+            return False
+
+        workers = min(self.max_workers or os.cpu_count() or 1, len(tasks))
+        logger.info(f"Training {len(tasks)} pair models ({self.backend}) on {workers} worker(s)...")
+        started = time.perf_counter()
+
+        trained = {}
+        if workers == 1:
+            for key, args in tasks:
+                trained[key] = _fit_pair_model(*args)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(_fit_pair_model, *args): key for key, args in tasks}
+                for future in as_completed(futures):
+                    key = futures[future]
+                    try:
+                        trained[key] = future.result()
+                    except Exception as e:
+                        logger.error(f"Training {key} failed: {e}")
+
+        trained = {key: model for key, model in trained.items() if model.is_trained}
+        self.models.update(trained)
+        logger.success(
+            f"Trained {len(trained)}/{len(tasks)} pair models in {time.perf_counter() - started:.1f}s"
+        )
+        return bool(trained)
+
+    def train(self, frames: Dict[str, pd.DataFrame]) -> bool:
+        """
+        Train every pair model from raw price rows.
+
+        Args:
+            frames: {symbol: timestamp/exchange/price/volume/bid/ask rows}
+        """
+        training_sets = {}
+        for symbol, df in frames.items():
+            if df.empty:
+                continue
+            try:
+                X, Y = SpreadPredictor().build_pair_training_set(df)
+            except Exception as e:
+                logger.error(f"Error building {symbol} training set: {e}")
+                continue
+            if X is not None:
+                training_sets[symbol] = (X.to_numpy(), Y.to_numpy(), X.columns.tolist(), Y.columns.tolist())
+
+        return self.fit_matrices(training_sets)
+
+    def train_streaming(self, symbol_chunks: Dict[str, Iterable[pd.DataFrame]], n_jobs: int = -1,
+                        work_dir: Optional[str] = None, validation_chunks: int = 1,
+                        num_boost_round: int = 100) -> bool:
+        """
+        Train every pair model out-of-core with XGBoost external memory.
+
+        Each symbol's chunks are spilled once by spill_pair_chunks and every
+        pair model of that symbol trains from the spilled files, which are
+        removed before the next symbol is read.
+
+        Args:
+            symbol_chunks: {symbol: time-ordered long-format price chunks}
+            n_jobs: XGBoost threads per model (-1 = all cores)
+            work_dir: Where to spill chunks (default: a temporary directory)
+            validation_chunks: Trailing chunks per symbol held out for a time-ordered R²
+            num_boost_round: Boosting rounds
+
+        Returns:
+            True if at least one pair model is trained
+        """
+        self.backend = 'xgboost'
+        trained = {}
+        for symbol, chunks in symbol_chunks.items():
+            with tempfile.TemporaryDirectory(prefix="spread_stream_", dir=work_dir) as symbol_dir:
+                try:
+                    chunk_files, feature_names, pair_names = spill_pair_chunks(chunks, Path(symbol_dir))
+                except Exception as e:
+                    logger.error(f"Error spilling {symbol} chunks: {e}")
+                    continue
+                if not pair_names:
+                    logger.warning(f"No {symbol} pair training data")
+                    continue
+
+                for column, pair_name in enumerate(pair_names):
+                    pair = tuple(pair_name.split('->'))
+                    model = SpreadPredictor(backend='xgboost', n_jobs=n_jobs, target_pair=pair)
+                    logger.info(f"Training {symbol} {pair_name} out-of-core...")
+                    try:
+                        if model.fit_spilled(chunk_files, feature_names, column, Path(symbol_dir),
+                                             validation_chunks, num_boost_round):
+                            trained[(symbol, *pair)] = model
+                    except Exception as e:
+                        logger.error(f"Training {(symbol, *pair)} failed: {e}")
+
+        self.models.update(trained)
+        logger.success(f"Trained {len(trained)} pair models out-of-core")
+        return bool(trained)
+
+    def route(self, symbol: str, buy_exchange: str, sell_exchange: str):
+        """
+        Model serving the buy→sell spread of symbol.
+
+        Returns:
+            (model, reversed) where reversed means the model predicts sell→buy,
+            or (None, False) if no model covers the pair
+        """
+        model = self.models.get((symbol, buy_exchange, sell_exchange))
+        if model is not None:
+            return model, False
+        model = self.models.get((symbol, sell_exchange, buy_exchange))
+        return model, model is not None
+
+    def predict_batch(self, requests: List[Tuple[str, str, str]],
+                      features: Dict[str, Optional[Dict[str, float]]]) -> np.ndarray:
+        """
+        Predict buy→sell spreads, with one model call per routed pair model.
+
+        Args:
+            requests: (symbol, buy_exchange, sell_exchange) tuples
+            features: {symbol: latest feature row}, e.g. from
+                IncrementalFeatureEngine.latest
+
+        Returns:
+            Predicted spread (%) per request, NaN where no model or features
+        """
+        predictions = np.full(len(requests), np.nan)
+
+        groups: Dict[tuple, list] = {}
+        for i, (symbol, buy_exchange, sell_exchange) in enumerate(requests):
+            model, reverse = self.route(symbol, buy_exchange, sell_exchange)
+            if model is not None and features.get(symbol):
+                key = (symbol, *model.target_pair)
+                groups.setdefault(key, []).append((i, reverse))
+
+        for (symbol, ex1, ex2), items in groups.items():
+            spread = self.models[(symbol, ex1, ex2)].predict_batch([features[symbol]])[0]
+            for i, reverse in items:
+                # ex2 = ex1 * (1 + s/100)  =>  spread of ex1 over ex2 = -s / (1 + s/100)
+                predictions[i] = -spread / (1 + spread / 100) if reverse else spread
+
+        return predictions
+
+    def save(self, filepath: str):
+        """Save the model set to disk."""
+        joblib.dump(self, filepath)
+        logger.info(f"Spread model set ({len(self.models)} models) saved to {filepath}")
+
+    def load(self, filepath: str) -> bool:
+        """Load a model set saved with save()."""
+        try:
+            loaded = joblib.load(filepath)
+            self.__dict__.update(loaded.__dict__)
+            logger.info(f"Spread model set ({len(self.models)} models) loaded from {filepath}")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading spread model set: {e}")
+            return False
+
+    def export(self, directory: str):
+        """Export every pair model as flat arrays (one subdirectory per model)."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        index = []
+        for (symbol, ex1, ex2), model in self.models.items():
+            name = f"{symbol}__{ex1}__{ex2}"
+            model.export(directory / name)
+            index.append({'symbol': symbol, 'pair': [ex1, ex2], 'dir': name})
+        (directory / "index.json").write_text(json.dumps({'backend': self.backend, 'models': index}))
+        logger.info(f"Spread model set ({len(index)} models) exported to {directory}")
+
+    def load_compiled(self, directory: str, mmap: bool = True) -> bool:
+        """Load a model set written by export(), memory-mapped, for inference only."""
+        try:
+            directory = Path(directory)
+            index = json.loads((directory / "index.json").read_text())
+            models = {}
+            for entry in index['models']:
+                model = SpreadPredictor(backend=index['backend'])
+                if not model.load_compiled(directory / entry['dir'], mmap=mmap):
+                    return False
+                models[(entry['symbol'], *entry['pair'])] = model
+            self.backend = index['backend']
+            self.models = models
+            logger.info(f"Spread model set ({len(models)} models) loaded from {directory}")
+            return True
+        except Exception as e:
+            logger.error(f"Error loading compiled spread model set: {e}")
+            return False
+
 
 class OpportunityScorer:
     """Scores arbitrage opportunities using ML."""
 
-    def __init__(self):
+    # Column order of the matrices produced by prepare_features
+    FEATURE_NAMES = [
+        'spread_pct', 'profit_after_fees', 'buy_price', 'sell_price',
+        'hour', 'minute', 'buy_exchange', 'sell_exchange'
+    ]
+
+    def __init__(self, model_params: Optional[Dict] = None):
+        """
+        Args:
+            model_params: Overrides for DEFAULT_SCORER_PARAMS
+        """
+        self.model_params = dict(model_params or {})
         self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42
+            random_state=42, **{**DEFAULT_SCORER_PARAMS, **self.model_params}
         )
         self.scaler = StandardScaler()
         self.is_trained = False
+        self.train_metrics: Dict = {}  # Set by train_matrix (accuracy, n_rows)
+
+    @staticmethod
+    def encode_exchange(exchange: str) -> int:
+        """Encode an exchange name as a small integer feature, identically in every process."""
+        return EXCHANGE_CODES.get(exchange.lower(), 0)
 
     def prepare_features(self, opportunity: ArbitrageOpportunity) -> np.ndarray:
         """Extract features from an arbitrage opportunity."""
-        features = [
-            opportunity.spread_pct,
-            opportunity.profit_after_fees,
-            opportunity.buy_price,
-            opportunity.sell_price,
-            opportunity.timestamp.hour,
-            opportunity.timestamp.minute,
-            hash(opportunity.buy_exchange) % 100,  # Simple encoding
-            hash(opportunity.sell_exchange) % 100,
-        ]
-        return np.array(features).reshape(1, -1)
+        return self.prepare_batch([opportunity])
+
+    def prepare_batch(self, opportunities: List[ArbitrageOpportunity]) -> np.ndarray:
+        """Feature matrix (one row per opportunity) with columns in FEATURE_NAMES order."""
+        n_rows = len(opportunities)
+        X = np.empty((n_rows, len(self.FEATURE_NAMES)), dtype=np.float64)
+        X[:, 0] = np.fromiter((opp.spread_pct for opp in opportunities), np.float64, n_rows)
+        X[:, 1] = np.fromiter((opp.profit_after_fees for opp in opportunities), np.float64, n_rows)
+        X[:, 2] = np.fromiter((opp.buy_price for opp in opportunities), np.float64, n_rows)
+        X[:, 3] = np.fromiter((opp.sell_price for opp in opportunities), np.float64, n_rows)
+        X[:, 4] = np.fromiter((opp.timestamp.hour for opp in opportunities), np.float64, n_rows)
+        X[:, 5] = np.fromiter((opp.timestamp.minute for opp in opportunities), np.float64, n_rows)
+        X[:, 6] = np.fromiter((self.encode_exchange(opp.buy_exchange) for opp in opportunities),
+                              np.float64, n_rows)
+        X[:, 7] = np.fromiter((self.encode_exchange(opp.sell_exchange) for opp in opportunities),
+                              np.float64, n_rows)
+        return X
 
     def train(self, opportunities: List[ArbitrageOpportunity], labels: List[bool]):
         """
@@ -279,16 +1219,22 @@ class OpportunityScorer:
             logger.warning("Insufficient data for training opportunity scorer")
             return False
 
-        try:
-            X = np.vstack([self.prepare_features(opp) for opp in opportunities])
-            y = np.array(labels)
+        return self.train_matrix(self.prepare_batch(opportunities), np.array(labels))
+
+    def train_matrix(self, X: np.ndarray, y: np.ndarray):
+        """Train on a prebuilt feature matrix with columns in FEATURE_NAMES order."""
+        if len(X) < 10:
+            logger.warning("Insufficient data for training opportunity scorer")
+            return False
 
+        try:
             X_scaled = self.scaler.fit_transform(X)
             self.model.fit(X_scaled, y)
 
             score = self.model.score(X_scaled, y)
             logger.info(f"Opportunity scorer trained | Accuracy: {score:.3f}")
 
+            self.train_metrics = {'train_accuracy': float(score), 'n_rows': len(X)}
             self.is_trained = True
             return True
 
@@ -296,16 +1242,45 @@ class OpportunityScorer:
             logger.error(f"Error training opportunity scorer: {e}")
             return False
 
+    def export(self, directory: str):
+        """Export classifier and scaler as flat arrays for fast, memory-mapped inference."""
+        export_model(directory, self.model, self.scaler, meta={'feature_names': self.FEATURE_NAMES})
+        logger.info(f"Compiled opportunity scorer exported to {directory}")
+
+    def load_compiled(self, directory: str, mmap: bool = True) -> bool:
+        """Load a classifier written by export() for inference only."""
+        try:
+            self.model, self.scaler, _ = load_model(directory, mmap=mmap)
+            self.is_trained = True
+            return True
+        except Exception as e:
+            logger.error(f"Error loading compiled opportunity scorer: {e}")
+            return False
+
     def score(self, opportunity: ArbitrageOpportunity) -> float:
         """Return confidence score (0-1) for an opportunity."""
-        if not self.is_trained:
-            return 0.5  # Neutral score
+        return float(self.score_batch([opportunity])[0])
+
+    def score_batch(self, opportunities) -> np.ndarray:
+        """
+        Confidence scores (0-1) for many opportunities in one model call.
+
+        Args:
+            opportunities: ArbitrageOpportunity list, or a prebuilt matrix from
+                prepare_batch / build_opportunity_matrix
+
+        Returns:
+            Probability of the profitable class per row (0.5 if untrained or on error)
+        """
+        n_rows = len(opportunities)
+        if not self.is_trained or n_rows == 0:
+            return np.full(n_rows, 0.5)  # Neutral score
 
         try:
-            X = self.prepare_features(opportunity)
-            X_scaled = self.scaler.transform(X)
-            proba = self.model.predict_proba(X_scaled)[0]
-            return proba[1]  # Probability of positive class
+            X = opportunities if isinstance(opportunities, np.ndarray) else self.prepare_batch(opportunities)
+            # Same arithmetic as StandardScaler.transform without its input validation
+            X_scaled = (X - self.scaler.mean_) / self.scaler.scale_
+            return self.model.predict_proba(X_scaled)[:, 1]  # Probability of positive class
         except Exception as e:
-            logger.error(f"Error scoring opportunity: {e}")
-            return 0.5
+            logger.error(f"Error scoring opportunities: {e}")
+            return np.full(n_rows, 0.5)
@@ -0,0 +1,226 @@
+"""Versioned on-disk registry of trained models."""
+import hashlib
+import json
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+from loguru import logger
+
+
+DEFAULT_REGISTRY_DIR = Path("models") / "registry"
+
+# Registry names used by the training scripts and the live system
+SPREAD_MODELS = 'spread_models'          # SpreadModelSet served by main.py
+OPPORTUNITY_SCORER = 'opportunity_scorer'
+
+
+def hash_arrays(*arrays) -> str:
+    """Content hash of the training matrices a model was fitted on."""
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.shape, array.dtype.str)).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _describe(model) -> Dict:
+    """Feature lists and training metrics recorded for a model."""
+    if hasattr(model, 'models'):  # SpreadModelSet
+        features, metrics = {}, {}
+        for (symbol, ex1, ex2), pair_model in sorted(model.models.items()):
+            features.setdefault(symbol, pair_model.feature_names)
+            if pair_model.train_metrics:
+                metrics[f"{symbol} {ex1}->{ex2}"] = pair_model.train_metrics
+        return {'features': features, 'metrics': metrics}
+    return {
+        'features': list(getattr(model, 'FEATURE_NAMES', None) or getattr(model, 'feature_names', [])),
+        'metrics': getattr(model, 'train_metrics', {}),
+    }
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts with metadata.
+
+    Each version lives in <root>/<name>/vNNNN/ with the pickled model, a
+    compiled flat-array export (see tree_export.py) for fast memory-mapped
+    loading, and meta.json (training window, metrics, feature list, data
+    hash, feature version, status). <name>/CURRENT names the version in service; it only ever
+    points at a version marked good, and rollback just moves it back.
+    """
+
+    def __init__(self, root: str = DEFAULT_REGISTRY_DIR):
+        self.root = Path(root)
+
+    def _dir(self, name: str) -> Path:
+        return self.root / name
+
+    def versions(self, name: str) -> List[Dict]:
+        """Metadata of every version of name, oldest first."""
+        model_dir = self._dir(name)
+        if not model_dir.exists():
+            return []
+        return [
+            json.loads((path / "meta.json").read_text())
+            for path in sorted(model_dir.glob("v[0-9]*"))
+            if (path / "meta.json").exists()
+        ]
+
+    def current(self, name: str) -> Optional[str]:
+        """Version in service, or None."""
+        pointer = self._dir(name) / "CURRENT"
+        return pointer.read_text().strip() if pointer.exists() else None
+
+    def _set_current(self, name: str, version: str):
+        pointer = self._dir(name) / "CURRENT"
+        tmp = pointer.with_suffix(".tmp")
+        tmp.write_text(version)
+        os.replace(tmp, pointer)
+
+    def _set_status(self, name: str, version: str, status: str):
+        meta_file = self._dir(name) / version / "meta.json"
+        meta = json.loads(meta_file.read_text())
+        meta['status'] = status
+        meta_file.write_text(json.dumps(meta, indent=2, default=str))
+
+    def register(self, name: str, model, metadata: Optional[Dict] = None, good: bool = True) -> str:
+        """
+        Store a new version of name and, if good, put it in service.
+
+        Args:
+            name: Registry name (e.g. SPREAD_MODELS)
+            model: SpreadModelSet, SpreadPredictor or OpportunityScorer
+            metadata: Caller metadata, e.g. window (start/end), data_hash,
+                source and validation metrics
+            good: Whether the model passed validation and may be served
+
+        Returns:
+            The new version name
+        """
+        model_dir = self._dir(name)
+        model_dir.mkdir(parents=True, exist_ok=True)
+        existing = [int(path.name[1:]) for path in model_dir.glob("v[0-9]*")]
+        version = f"v{max(existing, default=0) + 1:04d}"
+
+        staging = model_dir / f".{version}.tmp"
+        if staging.exists():
+            shutil.rmtree(staging)
+        staging.mkdir()
+
+        joblib.dump(model, staging / "model.pkl")
+        try:
+            model.export(staging / "compiled")
+        except Exception as e:
+            logger.warning(f"Could not export compiled {name} {version}: {e}")
+
+        from ml_predictor import FEATURE_VERSION
+
+        meta = {
+            **_describe(model),
+            **(metadata or {}),
+            'feature_version': FEATURE_VERSION,
+            'name': name,
+            'version': version,
+            'class': type(model).__name__,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'status': 'good' if good else 'candidate',
+        }
+        (staging / "meta.json").write_text(json.dumps(meta, indent=2, default=str))
+        os.replace(staging, model_dir / version)
+
+        if good:
+            self._set_current(name, version)
+        logger.info(f"Registered {name} {version} ({meta['status']})")
+        return version
+
+    def load(self, name: str, version: Optional[str] = None, compiled: bool = True):
+        """
+        Load a version of name (default: the one in service).
+
+        Args:
+            compiled: Prefer the memory-mapped compiled export (inference only)
+
+        Returns:
+            (model, meta), or (None, None) if there is nothing to load
+        """
+        version = version or self.current(name)
+        if version is None:
+            return None, None
+
+        path = self._dir(name) / version
+        meta = json.loads((path / "meta.json").read_text())
+
+        if compiled and (path / "compiled").exists():
+            from ml_predictor import SpreadModelSet, SpreadPredictor, OpportunityScorer
+
+            classes = {cls.__name__: cls for cls in (SpreadModelSet, SpreadPredictor, OpportunityScorer)}
+            model = classes[meta['class']]()
+            if model.load_compiled(path / "compiled"):
+                return model, meta
+
+        return joblib.load(path / "model.pkl"), meta
+
+    def promote(self, name: str, version: str):
+        """Mark version good and put it in service."""
+        self._set_status(name, version, 'good')
+        self._set_current(name, version)
+        logger.info(f"{name} {version} is now in service")
+
+    def rollback(self, name: str) -> Optional[str]:
+        """
+        Take the version in service out and serve the previous good one.
+
+        Returns:
+            The version now in service, or None if there is no earlier good version
+        """
+        current = self.current(name)
+        earlier = [
+            meta['version'] for meta in self.versions(name)
+            if meta['status'] == 'good' and (current is None or meta['version'] < current)
+        ]
+        if not earlier:
+            logger.warning(f"No earlier good version of {name} to roll back to")
+            return None
+
+        if current is not None:
+            self._set_status(name, current, 'rolled_back')
+        self._set_current(name, earlier[-1])
+        logger.info(f"Rolled {name} back from {current} to {earlier[-1]}")
+        return earlier[-1]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect and manage registered models")
+    parser.add_argument('command', choices=['list', 'rollback', 'promote'])
+    parser.add_argument('name', nargs='?', default=SPREAD_MODELS,
+                        help=f'Registry name (default: {SPREAD_MODELS})')
+    parser.add_argument('version', nargs='?', help='Version for promote')
+
+    args = parser.parse_args()
+    registry = ModelRegistry()
+
+    if args.command == 'list':
+        current = registry.current(args.name)
+        for meta in registry.versions(args.name):
+            marker = '*' if meta['version'] == current else ' '
+            window = meta.get('window') or {}
+            logger.info(
+                f"{marker} {meta['version']} {meta['status']:<11} {meta['created_at']} "
+                f"source={meta.get('source', '?')} window={window.get('start')}..{window.get('end')} "
+                f"data={str(meta.get('data_hash', ''))[:12]}"
+            )
+    elif args.command == 'rollback':
+        sys.exit(0 if registry.rollback(args.name) else 1)
+    else:
+        if not args.version:
+            parser.error("promote needs a version")
+        registry.promote(args.name, args.version)
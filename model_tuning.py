@@ -0,0 +1,314 @@
+"""Walk-forward hyperparameter search for the spread predictor and opportunity scorer."""
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import r2_score, roc_auc_score
+from sklearn.model_selection import ParameterGrid, TimeSeriesSplit
+from sklearn.preprocessing import StandardScaler
+
+from ml_predictor import SPREAD_BACKENDS, make_spread_model
+
+
+# Search spaces per model kind; 'scorer' is the OpportunityScorer random forest
+PARAM_GRIDS = {
+    'gbr': {
+        'n_estimators': [100, 200],
+        'max_depth': [3, 5],
+        'learning_rate': [0.05, 0.1],
+        'subsample': [0.8, 1.0],
+    },
+    'hist': {
+        'max_iter': [100, 300],
+        'max_depth': [None, 5, 8],
+        'learning_rate': [0.05, 0.1],
+        'min_samples_leaf': [20, 100],
+    },
+    'xgboost': {
+        'n_estimators': [100, 300],
+        'max_depth': [4, 6, 8],
+        'learning_rate': [0.05, 0.1],
+        'subsample': [0.8, 1.0],
+        'colsample_bytree': [0.8, 1.0],
+    },
+    'scorer': {
+        'n_estimators': [100, 300],
+        'max_depth': [6, 10, None],
+        'min_samples_leaf': [1, 10],
+    },
+}
+
+DEFAULT_CACHE_DIR = Path("models") / "tuning_cache"
+
+
+def walk_forward_splits(n_rows: int, n_splits: int = 5, gap: int = 0) -> List[tuple]:
+    """
+    Expanding-window time-series folds.
+
+    Each fold trains on every row before its test block (minus gap rows), so
+    no fold ever sees data from its own future.
+    """
+    splitter = TimeSeriesSplit(n_splits=n_splits, gap=gap)
+    return list(splitter.split(np.arange(n_rows)))
+
+
+def _array_digest(*arrays: np.ndarray) -> str:
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str((array.shape, array.dtype.str)).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def _fold_key(data_hash: str, kind: str, params: Dict, n_splits: int, gap: int, fold: int) -> str:
+    spec = json.dumps(
+        {'data': data_hash, 'kind': kind, 'params': params,
+         'n_splits': n_splits, 'gap': gap, 'fold': fold},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(spec.encode()).hexdigest()
+
+
+def _fit_fold(kind: str, params: Dict, X_file: str, y_file: str,
+              train_idx: np.ndarray, test_idx: np.ndarray) -> Dict:
+    """Fit one configuration on one fold (runs in a worker process)."""
+    X = np.load(X_file, mmap_mode='r')
+    y = np.load(y_file, mmap_mode='r')
+
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[train_idx])
+    X_test = scaler.transform(X[test_idx])
+    y_train, y_test = np.asarray(y[train_idx]), np.asarray(y[test_idx])
+
+    started = time.perf_counter()
+    if kind == 'scorer':
+        model = RandomForestClassifier(random_state=42, n_jobs=1, **params)
+        model.fit(X_train, y_train)
+        if len(np.unique(y_test)) < 2 or len(model.classes_) < 2:
+            score = float(model.score(X_test, y_test))
+        else:
+            score = float(roc_auc_score(y_test, model.predict_proba(X_test)[:, 1]))
+    else:
+        # One thread per worker; the process pool provides the parallelism
+        model = make_spread_model(kind, n_jobs=1, params=params)
+        model.fit(X_train, y_train)
+        score = float(r2_score(y_test, model.predict(X_test)))
+
+    return {'score': score, 'fit_seconds': time.perf_counter() - started}
+
+
+def grid_search(X: np.ndarray, y: np.ndarray, kind: str, grid: Optional[Dict] = None,
+                n_splits: int = 5, gap: int = 0, max_workers: Optional[int] = None,
+                cache_dir: Path = DEFAULT_CACHE_DIR) -> List[Dict]:
+    """
+    Evaluate every configuration of a grid with walk-forward cross-validation.
+
+    (configuration, fold) fits are fanned out over a process pool. Each fold
+    result is cached on disk under a key derived from the data, model kind,
+    parameters and fold layout, so widening the grid only fits the new
+    configurations.
+
+    Args:
+        X: Time-ordered feature matrix
+        y: Targets (spread for regressors, bool labels for 'scorer')
+        kind: A SpreadPredictor backend or 'scorer'
+        grid: Parameter grid (default: PARAM_GRIDS[kind])
+        n_splits: Walk-forward folds
+        gap: Rows skipped between each train block and its test block
+        max_workers: Worker processes (default: all cores)
+        cache_dir: Where fold results are cached
+
+    Returns:
+        One dict per configuration (params, mean_score, std_score,
+        fit_seconds), best first. Scores are R² for regressors and ROC AUC
+        for the scorer.
+    """
+    if kind not in SPREAD_BACKENDS and kind != 'scorer':
+        raise ValueError(f"Unknown model kind {kind!r}")
+
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.ascontiguousarray(y)
+    data_hash = _array_digest(X, y)
+
+    # Workers memory-map the data instead of receiving a pickled copy per task;
+    # pair targets of one symbol share its feature file
+    X_file = cache_dir / f"{_array_digest(X)}_X.npy"
+    y_file = cache_dir / f"{data_hash}_y.npy"
+    if not X_file.exists():
+        np.save(X_file, X)
+    if not y_file.exists():
+        np.save(y_file, y)
+
+    folds = walk_forward_splits(len(X), n_splits, gap)
+    configs = list(ParameterGrid(grid or PARAM_GRIDS[kind]))
+
+    fold_results: Dict[tuple, Dict] = {}
+    pending = []
+    for config_idx, params in enumerate(configs):
+        for fold, (train_idx, test_idx) in enumerate(folds):
+            result_file = cache_dir / f"{_fold_key(data_hash, kind, params, n_splits, gap, fold)}.json"
+            if result_file.exists():
+                fold_results[(config_idx, fold)] = json.loads(result_file.read_text())
+            else:
+                pending.append((config_idx, fold, result_file, train_idx, test_idx))
+
+    logger.info(
+        f"Tuning {kind}: {len(configs)} configs × {len(folds)} folds | "
+        f"{len(fold_results)} cached, {len(pending)} to fit"
+    )
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as pool:
+            futures = {
+                pool.submit(_fit_fold, kind, configs[config_idx], str(X_file), str(y_file),
+                            train_idx, test_idx): (config_idx, fold, result_file)
+                for config_idx, fold, result_file, train_idx, test_idx in pending
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                config_idx, fold, result_file = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Fold {fold} of {configs[config_idx]} failed: {e}")
+                    continue
+                result_file.write_text(json.dumps(result))
+                fold_results[(config_idx, fold)] = result
+                if done % 10 == 0 or done == len(futures):
+                    logger.info(f"  {done}/{len(futures)} folds fitted")
+
+    results = []
+    for config_idx, params in enumerate(configs):
+        scores = [
+            fold_results[(config_idx, fold)]['score']
+            for fold in range(len(folds)) if (config_idx, fold) in fold_results
+        ]
+        if len(scores) < len(folds):
+            continue
+        results.append({
+            'params': params,
+            'mean_score': float(np.mean(scores)),
+            'std_score': float(np.std(scores)),
+            'fit_seconds': float(sum(
+                fold_results[(config_idx, fold)]['fit_seconds'] for fold in range(len(folds))
+            )),
+        })
+
+    results.sort(key=lambda r: r['mean_score'], reverse=True)
+    return results
+
+
+def grid_search_pairs(training_sets: Dict[str, tuple], kind: str, grid: Optional[Dict] = None,
+                      n_splits: int = 5, gap: int = 0, max_workers: Optional[int] = None,
+                      cache_dir: Path = DEFAULT_CACHE_DIR) -> List[Dict]:
+    """
+    Walk-forward search of a spread backend over every (symbol, pair) model.
+
+    Each pair is searched on its own symbol's training set, as SpreadModelSet
+    trains it, and every configuration is scored by its mean R² across pairs.
+
+    Args:
+        training_sets: {symbol: (X, Y, feature_names, pair_names)}, e.g. the
+            spread_sets of train_historical.prepare_training_matrices
+        kind: A SpreadPredictor backend
+
+    Returns:
+        One dict per configuration (params, mean_score, std_score across
+        pairs, fit_seconds, pair_scores), best first
+    """
+    by_config: Dict[str, Dict] = {}
+    n_pairs = 0
+    for symbol, (X, Y, _, pair_names) in training_sets.items():
+        Y = np.asarray(Y)
+        for j, pair_name in enumerate(pair_names):
+            logger.info(f"Searching {symbol} {pair_name}")
+            n_pairs += 1
+            for r in grid_search(X, Y[:, j], kind, grid, n_splits, gap, max_workers, cache_dir):
+                entry = by_config.setdefault(
+                    json.dumps(r['params'], sort_keys=True, default=str),
+                    {'params': r['params'], 'pair_scores': {}, 'fit_seconds': 0.0}
+                )
+                entry['pair_scores'][f"{symbol} {pair_name}"] = r['mean_score']
+                entry['fit_seconds'] += r['fit_seconds']
+
+    results = []
+    for entry in by_config.values():
+        # Only configurations that completed on every pair are comparable
+        if len(entry['pair_scores']) < n_pairs:
+            continue
+        scores = list(entry['pair_scores'].values())
+        results.append({**entry, 'mean_score': float(np.mean(scores)), 'std_score': float(np.std(scores))})
+
+    results.sort(key=lambda r: r['mean_score'], reverse=True)
+    return results
+
+
+def save_best_params(kind: str, results: List[Dict], path: Path = Path("models") / "best_params.json"):
+    """Record the best configuration of a search, keyed by model kind."""
+    if not results:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    best = json.loads(path.read_text()) if path.exists() else {}
+    best[kind] = results[0]['params']
+    path.write_text(json.dumps(best, indent=2, default=str))
+    logger.success(f"Best {kind} params saved to {path}")
+
+
+def load_best_params(kind: str, path: Path = Path("models") / "best_params.json") -> Dict:
+    """Return the tuned parameters for a model kind, or {} if it was never tuned."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text()).get(kind, {})
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from train_historical import prepare_training_matrices, sample_opportunities
+
+    parser = argparse.ArgumentParser(description="Walk-forward hyperparameter search")
+    parser.add_argument('--days', type=int, default=30, help='Days of historical data (default: 30)')
+    parser.add_argument('--kind', default='xgboost', choices=list(SPREAD_BACKENDS) + ['scorer'],
+                        help='Spread predictor backend or the opportunity scorer (default: xgboost)')
+    parser.add_argument('--splits', type=int, default=5, help='Walk-forward folds (default: 5)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--opp-samples', type=int, default=200000,
+                        help='Opportunities to tune the scorer on (default: 200000)')
+
+    args = parser.parse_args()
+
+    matrices = prepare_training_matrices(days=args.days)
+    if matrices is None:
+        logger.error("Failed to fetch historical data!")
+        sys.exit(1)
+
+    if args.kind == 'scorer':
+        X, y = matrices['X_opps'], matrices['y_opps']
+        idx = sample_opportunities(y, args.opp_samples, 'time')
+        X, y = X[idx], y[idx]
+        n_rows = len(X)
+        results = grid_search(X, y, args.kind, n_splits=args.splits, max_workers=args.workers)
+    else:
+        # Per-symbol, per-pair sets, as train_historical --tuned applies the params
+        n_rows = sum(len(X) for X, _, _, _ in matrices['spread_sets'].values())
+        results = grid_search_pairs(matrices['spread_sets'], args.kind,
+                                    n_splits=args.splits, max_workers=args.workers)
+
+    logger.info("\n" + "="*70)
+    logger.info(f"TOP {args.kind.upper()} CONFIGURATIONS ({n_rows:,} rows, {args.splits} folds)")
+    logger.info("="*70)
+    for r in results[:10]:
+        logger.info(f"{r['mean_score']:.4f} ± {r['std_score']:.4f} | {r['params']}")
+
+    save_best_params(args.kind, results)
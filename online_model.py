@@ -0,0 +1,230 @@
+"""Per-tick online spread models, optionally blended with the batch-trained models."""
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from feature_engine import current_spread
+from ml_predictor import exchange_pairs
+
+
+class RecursiveLeastSquares:
+    """
+    Multi-output linear regression updated one row at a time.
+
+    Exponentially weighted recursive least squares: the forgetting factor
+    discounts old rows, so with forgetting=0.995 the fit is dominated by the
+    last ~200 updates and follows a regime change within that many ticks.
+    Inputs are standardized with exponentially weighted means and variances
+    at the same rate. All outputs share one inverse-covariance matrix, so an
+    update is O(features²) whatever the number of outputs, a few microseconds
+    for a symbol's ~30 features.
+    """
+
+    def __init__(self, n_features: int, n_outputs: int, forgetting: float = 0.995,
+                 delta: float = 100.0, max_trace: float = 1e6):
+        """
+        Args:
+            n_features: Input columns
+            n_outputs: Targets fitted together (one per exchange pair)
+            forgetting: Per-update weight decay of past rows (1.0 = ordinary RLS)
+            delta: Initial inverse-covariance scale (larger = faster initial fit)
+            max_trace: Cap on the inverse-covariance trace, which would otherwise
+                grow without bound along inputs that stop varying
+        """
+        self.forgetting = forgetting
+        self.max_trace = max_trace
+        self.mean = np.zeros(n_features)
+        self.var = np.zeros(n_features)
+        self.P = np.eye(n_features + 1) * delta
+        self.W = np.zeros((n_features + 1, n_outputs))  # Last row is the intercept
+        self.n_updates = 0
+
+    def _standardize(self, x: np.ndarray) -> np.ndarray:
+        z = np.empty(len(x) + 1)
+        z[:-1] = (x - self.mean) / np.sqrt(self.var + 1e-12)
+        z[-1] = 1.0
+        return z
+
+    def update(self, x: np.ndarray, y: np.ndarray):
+        """Fold in one input row x and its targets y."""
+        if self.n_updates == 0:
+            self.mean[:] = x
+        alpha = 1 - self.forgetting
+        delta = x - self.mean
+        self.mean += alpha * delta
+        self.var = (1 - alpha) * (self.var + alpha * delta * delta)
+
+        z = self._standardize(x)
+        Pz = self.P @ z
+        gain = Pz / (self.forgetting + z @ Pz)
+        self.W += np.outer(gain, y - z @ self.W)
+        self.P = (self.P - np.outer(gain, Pz)) / self.forgetting
+        trace = np.trace(self.P)
+        if trace > self.max_trace:
+            self.P *= self.max_trace / trace
+        self.n_updates += 1
+
+    def partial_fit(self, X: np.ndarray, Y: np.ndarray):
+        """Fold in time-ordered rows (e.g. bars), one update per row."""
+        for x, y in zip(np.asarray(X, dtype=np.float64), np.asarray(Y, dtype=np.float64)):
+            self.update(x, y)
+        return self
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        """Predicted outputs for one input row."""
+        return self._standardize(x) @ self.W
+
+
+class OnlineSpreadPredictor:
+    """
+    Spread predictions that adapt tick by tick, without ever refitting.
+
+    For every symbol, one RecursiveLeastSquares model maps the live feature
+    row (the same features the batch models use) to the next-step spread of
+    every exchange pair. On each tick, the row saved at the previous tick is
+    labelled with the spreads just realized and folded into the model.
+
+    With blend=True, predictions are blended with the batch model serving the
+    same pair, weighted by inverse recent error. Both models' predictions are
+    scored against the realized spread every blend_seconds, so the blend
+    shifts towards the online model when the market moves away from the batch
+    model's training data, and back when a retrain catches up.
+    """
+
+    def __init__(self, handle, features, forgetting: float = 0.995, warmup: int = 200,
+                 blend: bool = True, blend_seconds: float = 1.0, blend_halflife: int = 120):
+        """
+        Args:
+            handle: ModelHandle serving the batch SpreadModelSet
+            features: IncrementalFeatureEngine with the live features
+            forgetting: RecursiveLeastSquares forgetting factor
+            warmup: Updates before an online model's predictions are used
+            blend: Blend with the batch models (False = online predictions only)
+            blend_seconds: Minimum time between blend-error samples of a symbol
+            blend_halflife: Half-life of the blend errors, in samples
+        """
+        self.handle = handle
+        self.features = features
+        self.forgetting = forgetting
+        self.warmup = warmup
+        self.blend = blend
+        self.blend_seconds = blend_seconds
+        self.blend_decay = 0.5 ** (1 / blend_halflife)
+        self._models: Dict[str, tuple] = {}  # {symbol: (feature_names, pairs, RecursiveLeastSquares)}
+        self._previous: Dict[str, np.ndarray] = {}  # {symbol: last unlabelled feature row}
+        self._blend_sampled: Dict[str, float] = {}
+        self._blend_pending: Dict[str, tuple] = {}  # {symbol: (online, batch) predictions}
+        self._errors: Dict[tuple, np.ndarray] = {}  # {(symbol, ex1, ex2): EW [online, batch] MSE}
+
+    def _model(self, symbol: str, latest: Dict[str, float]) -> tuple:
+        names = tuple(latest)
+        entry = self._models.get(symbol)
+        if entry is None or entry[0] != names:
+            # First tick, or an exchange joined or left: start over on the new layout
+            exchanges = {name.split('_', 1)[0] for name in names}
+            pairs = exchange_pairs(exchanges)
+            entry = self._models[symbol] = (
+                names, pairs, RecursiveLeastSquares(len(names), len(pairs), self.forgetting)
+            )
+            self._previous.pop(symbol, None)
+            self._blend_pending.pop(symbol, None)
+        return entry
+
+    def observe(self, symbol: str, now: Optional[float] = None):
+        """Label the previous tick's row with the spreads just realized and update (call on every tick)."""
+        # The columns the batch models read (the full row without one)
+        batch_model = self.handle.get()
+        names = batch_model.feature_names(symbol) if batch_model is not None else None
+        latest = self.features.latest(symbol, names)
+        if latest is None:
+            return
+
+        _, pairs, model = self._model(symbol, latest)
+        x = np.fromiter(latest.values(), np.float64, len(latest))
+        realized = np.array([current_spread(latest, ex1, ex2) for ex1, ex2 in pairs])
+        if np.isnan(realized).any() or np.isnan(x).any():
+            return
+
+        previous = self._previous.get(symbol)
+        if previous is not None:
+            model.update(previous, realized)
+        self._previous[symbol] = x
+
+        if self.blend:
+            now = time.monotonic() if now is None else now
+            if now - self._blend_sampled.get(symbol, -math.inf) >= self.blend_seconds:
+                self._blend_sampled[symbol] = now
+                self._score_blend(symbol, pairs, model, latest, x, realized)
+
+    def _score_blend(self, symbol: str, pairs: List[Tuple[str, str]], model: RecursiveLeastSquares,
+                     latest: Dict[str, float], x: np.ndarray, realized: np.ndarray):
+        pending = self._blend_pending.pop(symbol, None)
+        if pending is not None:
+            for j, (ex1, ex2) in enumerate(pairs):
+                squared = (pending[0][j] - realized[j]) ** 2, (pending[1][j] - realized[j]) ** 2
+                if math.isnan(squared[0]) or math.isnan(squared[1]):
+                    continue
+                key = (symbol, ex1, ex2)
+                errors = self._errors.get(key)
+                if errors is None:
+                    self._errors[key] = np.array(squared)
+                else:
+                    errors *= self.blend_decay
+                    errors += (1 - self.blend_decay) * np.array(squared)
+
+        batch = self.handle.get()
+        if model.n_updates >= self.warmup and batch is not None and batch.is_trained:
+            self._blend_pending[symbol] = (
+                model.predict(x),
+                batch.predict_batch([(symbol, ex1, ex2) for ex1, ex2 in pairs], {symbol: latest}),
+            )
+
+    def online_weight(self, symbol: str, ex1: str, ex2: str) -> float:
+        """Blend weight of the online model for a pair (the batch model gets the rest)."""
+        errors = self._errors.get((symbol, *sorted((ex1, ex2))))
+        if errors is None or errors.sum() == 0:
+            return 0.5
+        return float(errors[1] / errors.sum())
+
+    def pairs(self, symbol: str) -> List[Tuple[str, str]]:
+        """Exchange pairs with a warmed-up online model for symbol."""
+        entry = self._models.get(symbol)
+        if entry is None or entry[2].n_updates < self.warmup:
+            return []
+        return list(entry[1])
+
+    def predict_batch(self, requests: List[Tuple[str, str, str]],
+                      features: Dict[str, Optional[Dict[str, float]]]) -> np.ndarray:
+        """
+        Predict buy→sell spreads, like SpreadModelSet.predict_batch.
+
+        Returns:
+            Predicted spread (%) per request: the online prediction, blended
+            with the batch model's where both are available; NaN if neither is
+        """
+        online = np.full(len(requests), np.nan)
+        rows = {}
+        for i, (symbol, buy_exchange, sell_exchange) in enumerate(requests):
+            entry = self._models.get(symbol)
+            latest = features.get(symbol)
+            if entry is None or entry[2].n_updates < self.warmup or not latest or tuple(latest) != entry[0]:
+                continue
+            names, pairs, model = entry
+            if symbol not in rows:
+                rows[symbol] = model.predict(np.fromiter(latest.values(), np.float64, len(latest)))
+            pair = tuple(sorted((buy_exchange, sell_exchange)))
+            if pair in pairs:
+                spread = rows[symbol][pairs.index(pair)]
+                # Pairs are fitted ex1→ex2 in sorted order; flip the others as SpreadModelSet does
+                online[i] = spread if pair == (buy_exchange, sell_exchange) else -spread / (1 + spread / 100)
+
+        batch_model = self.handle.get()
+        if not self.blend or batch_model is None or not batch_model.is_trained:
+            return online
+
+        batch = batch_model.predict_batch(requests, features)
+        weights = np.array([self.online_weight(*request) for request in requests])
+        blended = weights * online + (1 - weights) * batch
+        return np.where(np.isnan(online), batch, np.where(np.isnan(batch), online, blended))
@@ -1,53 +1,195 @@
 """Train ML models on 30 days of historical data from all exchanges."""
 import sys
 from pathlib import Path
+from typing import Optional
+import numpy as np
+import pandas as pd
 from loguru import logger
 
-from historical_data import fetch_and_prepare_training_data
-from ml_predictor import SpreadPredictor, OpportunityClassifier
+from feature_selection import prune_model_set, log_report
+from feature_store import FeatureStore
+from historical_data import (
+    HistoricalDataFetcher, fetch_and_prepare_training_data, prepare_partitioned_training_data,
+    RESOLUTION_ORDER
+)
+from ml_predictor import (
+    SpreadPredictor, SpreadModelSet, OpportunityScorer, SPREAD_BACKENDS, benchmark_backends
+)
+from model_registry import (
+    ModelRegistry, SPREAD_MODELS, OPPORTUNITY_SCORER, hash_arrays
+)
+from model_tuning import load_best_params
 
+EXCHANGES = ['Coinbase', 'Binance', 'Bitstamp']
 
-def train_models_on_historical_data(days: int = 30, force_refetch: bool = False):
+# Taker fees used to synthesize opportunities (Coinbase 0.6%, Binance 0.1%, Bitstamp 0.5%)
+EXCHANGE_FEES = {'Coinbase': 0.6, 'Binance': 0.1, 'Bitstamp': 0.5}
+
+
+def spreads_to_long(training_data: pd.DataFrame) -> pd.DataFrame:
     """
-    Fetch 30 days of historical data and train ML models.
+    Reshape wide {exchange}_price/{exchange}_volume columns into the long
+    timestamp/exchange/price/volume/bid/ask rows SpreadPredictor expects.
+
+    Rows come out in (timestamp, exchange) order with missing prices dropped.
+    """
+    exchanges = [
+        ex for ex in EXCHANGES
+        if f'{ex}_price' in training_data.columns and f'{ex}_volume' in training_data.columns
+    ]
+    if not exchanges:
+        return pd.DataFrame()
+
+    prices = training_data[[f'{ex}_price' for ex in exchanges]].to_numpy(dtype=float)
+    volumes = training_data[[f'{ex}_volume' for ex in exchanges]].to_numpy(dtype=float)
+    n_rows, n_exchanges = prices.shape
+
+    long_df = pd.DataFrame({
+        'timestamp': np.repeat(training_data['timestamp'].to_numpy(), n_exchanges),
+        'exchange': np.tile(np.array(exchanges, dtype=object), n_rows),
+        'price': prices.ravel(),
+        'volume': volumes.ravel(),
+    })
+    long_df = long_df[long_df['price'].notna()].reset_index(drop=True)
+    long_df['bid'] = long_df['price'] * 0.999  # Approximate
+    long_df['ask'] = long_df['price'] * 1.001  # Approximate
+    return long_df
+
+
+def build_opportunity_matrix(training_data: pd.DataFrame, spread_cols: list):
+    """
+    Build OpportunityScorer features for every row × exchange pair.
+
+    Each spread_{ex1}_{ex2} cell becomes one synthetic opportunity that buys on
+    the cheaper exchange and sells on the dearer one, with fee-adjusted profit.
+
+    Returns:
+        (X, y) where X has columns in OpportunityScorer.FEATURE_NAMES order and
+        y flags opportunities with > 0.5% profit after fees. Rows are in
+        (timestamp, pair) order.
+    """
+    pairs = []
+    for col in spread_cols:
+        parts = col.replace("spread_", "").split("_")
+        if len(parts) >= 2 and f'{parts[0]}_price' in training_data.columns \
+                and f'{parts[1]}_price' in training_data.columns:
+            pairs.append((col, parts[0], parts[1]))
+    if not pairs:
+        return np.empty((0, len(OpportunityScorer.FEATURE_NAMES))), np.empty(0, dtype=bool)
+
+    n_rows = len(training_data)
+    timestamps = pd.DatetimeIndex(training_data['timestamp'])
+    hour = timestamps.hour.to_numpy(dtype=float)
+    minute = timestamps.minute.to_numpy(dtype=float)
+
+    # (rows × pairs) blocks, flattened row-major at the end
+    spread = training_data[[col for col, _, _ in pairs]].to_numpy(dtype=float)
+    price1 = training_data[[f'{ex1}_price' for _, ex1, _ in pairs]].to_numpy(dtype=float)
+    price2 = training_data[[f'{ex2}_price' for _, _, ex2 in pairs]].to_numpy(dtype=float)
+    code1 = np.array([OpportunityScorer.encode_exchange(ex1) for _, ex1, _ in pairs], dtype=float)
+    code2 = np.array([OpportunityScorer.encode_exchange(ex2) for _, _, ex2 in pairs], dtype=float)
+    total_fee = np.array([
+        EXCHANGE_FEES.get(ex1, 0.5) + EXCHANGE_FEES.get(ex2, 0.5) for _, ex1, ex2 in pairs
+    ])
+
+    positive = spread > 0
+    spread_pct = np.abs(spread)
+    profit_after_fees = spread_pct - total_fee
+
+    X = np.empty((n_rows, len(pairs), len(OpportunityScorer.FEATURE_NAMES)))
+    X[..., 0] = spread_pct
+    X[..., 1] = profit_after_fees
+    X[..., 2] = np.where(positive, price1, price2)  # buy on the cheaper exchange
+    X[..., 3] = np.where(positive, price2, price1)
+    X[..., 4] = hour[:, None]
+    X[..., 5] = minute[:, None]
+    X[..., 6] = np.where(positive, code1, code2)
+    X[..., 7] = np.where(positive, code2, code1)
+
+    X = X.reshape(-1, len(OpportunityScorer.FEATURE_NAMES))
+    valid = ~np.isnan(X).any(axis=1)
+    X = X[valid]
+    y = X[:, 1] > 0.5
+    return X, y
+
+
+def sample_opportunities(y: np.ndarray, max_samples: int, strategy: str = 'stratified',
+                         random_state: int = 42) -> np.ndarray:
+    """
+    Choose which synthetic opportunities to train on.
 
     Args:
-        days: Number of days of historical data (default 30)
-        force_refetch: If True, refetch data even if cached (default False)
+        y: Labels in time order
+        max_samples: Target size; 0 or >= len(y) keeps everything
+        strategy: 'stratified' keeps the class ratio with uniform random draws
+            per class, 'time' takes evenly spaced rows across the whole history,
+            'all' keeps everything
+        random_state: Seed for stratified draws
+
+    Returns:
+        Sorted row indices into y
+    """
+    n = len(y)
+    if strategy == 'all' or max_samples <= 0 or max_samples >= n:
+        return np.arange(n)
 
-    Data Volume Calculation:
-    - 30 days = 43,200 minutes of data
-    - 3 exchanges × 3 symbols = 9 data streams
-    - Total: ~388,800 data points (43,200 × 9)
-    - With 1-minute OHLCV candles, this gives us rich training data
+    if strategy == 'time':
+        return np.unique(np.linspace(0, n - 1, max_samples).round().astype(int))
 
-    Expected file sizes:
-    - Each symbol per exchange: ~1-2 MB CSV
-    - Total: ~27 MB for all data
+    if strategy != 'stratified':
+        raise ValueError(f"Unknown sampling strategy: {strategy}")
+
+    rng = np.random.default_rng(random_state)
+    chosen = []
+    for label in np.unique(y):
+        label_idx = np.flatnonzero(y == label)
+        take = max(1, int(round(max_samples * len(label_idx) / n)))
+        chosen.append(rng.choice(label_idx, size=min(take, len(label_idx)), replace=False))
+    return np.sort(np.concatenate(chosen))
+
+
+def clear_historical_cache():
+    """Delete cached candles, rollups, checkpoints and partitions."""
+    import shutil
+    cache_dir = Path("historical_data")
+    if cache_dir.exists():
+        shutil.rmtree(cache_dir)
+        logger.info("Cleared historical data cache")
+
+
+def prepare_training_matrices(days: int = 30, resolution: str = '1m', use_cache: bool = True,
+                              symbols: list = None):
     """
-    logger.info("="*70)
-    logger.info("TRAINING ML MODELS ON 30-DAY HISTORICAL DATA")
-    logger.info("="*70)
+    Build (or load from the feature store) every matrix the models train on.
 
-    # Step 1: Fetch/load historical data
-    logger.info(f"\nStep 1: Fetching {days} days of historical data...")
-    logger.info(f"Expected data volume: ~{days * 1440 * 9:,} records")
-    logger.info(f"Symbols: BTC-USD, ETH-USD, SOL-USD")
-    logger.info(f"Exchanges: Coinbase, Binance, Bitstamp")
+    Cache entries are keyed by the content of the raw candle CSVs, the
+    feature-definition version, days and resolution, so repeated runs with
+    unchanged data skip fetching, spread calculation, reshaping and feature
+    engineering entirely.
 
-    if force_refetch:
-        # Clear cache
-        import shutil
-        cache_dir = Path("historical_data")
-        if cache_dir.exists():
-            shutil.rmtree(cache_dir)
-            logger.info("Cleared historical data cache")
+    Returns:
+        Dict with spread_sets ({symbol: (X, Y, feature_names, pair_names)} for
+        the pair spread models), X_opps, y_opps (opportunity classifier),
+        n_records and window (training data start/end), or None if no data
+    """
+    if symbols is None:
+        symbols = ['BTC-USD', 'ETH-USD', 'SOL-USD']
+
+    store = FeatureStore()
+    fetcher = HistoricalDataFetcher()
+    params = {'days': days, 'resolution': resolution, 'symbols': symbols}
 
-    training_data = fetch_and_prepare_training_data(days=days)
+    source_files = fetcher.source_files(symbols)
+    if use_cache and source_files:
+        cached = store.load(store.key(source_files, 'historical_training', params))
+        if cached is not None:
+            logger.success("Loaded training matrices from feature cache, skipping preprocessing")
+            return _unpack_matrices(cached['arrays'], cached['meta'])
+
+    training_data = fetch_and_prepare_training_data(days=days, symbols=symbols, resolution=resolution)
 
     if training_data.empty:
-        logger.error("Failed to fetch historical data!")
-        return False
+        return None
 
     # Step 2: Display data summary
     logger.info("\n" + "="*70)
@@ -72,128 +214,188 @@ def train_models_on_historical_data(days: int = 30, force_refetch: bool = False)
             pct_profitable = (profitable / len(training_data)) * 100
             logger.info(f"  {col}: {profitable:,} profitable records ({pct_profitable:.2f}%)")
 
-    # Step 3: Train Spread Predictor
+    # Per-symbol features and every pair's spread target from the long per-exchange rows
+    matrices = {}
+    spread_sets = {}
+    for symbol in training_data['symbol'].unique():
+        X, Y = SpreadPredictor().build_pair_training_set(
+            spreads_to_long(training_data[training_data['symbol'] == symbol])
+        )
+        if X is None:
+            continue
+        matrices[f'X_{symbol}'] = X.to_numpy(dtype=np.float64)
+        matrices[f'Y_{symbol}'] = Y.to_numpy(dtype=np.float64)
+        spread_sets[symbol] = {'feature_names': X.columns.tolist(), 'pairs': Y.columns.tolist()}
+
+    matrices['X_opps'], matrices['y_opps'] = build_opportunity_matrix(training_data, spread_cols)
+    meta = {
+        'spread_sets': spread_sets,
+        'n_records': len(training_data),
+        'window': {'start': str(training_data['timestamp'].min()),
+                   'end': str(training_data['timestamp'].max())},
+    }
+
+    if use_cache:
+        source_files = fetcher.source_files(symbols)
+        if source_files:
+            store.save(store.key(source_files, 'historical_training', params), matrices, meta)
+
+    return _unpack_matrices(matrices, meta)
+
+
+def _unpack_matrices(arrays: dict, meta: dict) -> dict:
+    """Regroup flat cached arrays into the structure prepare_training_matrices returns."""
+    return {
+        'spread_sets': {
+            symbol: (arrays[f'X_{symbol}'], arrays[f'Y_{symbol}'], spec['feature_names'], spec['pairs'])
+            for symbol, spec in meta['spread_sets'].items()
+        },
+        'X_opps': arrays['X_opps'],
+        'y_opps': arrays['y_opps'],
+        'n_records': meta['n_records'],
+        'window': meta.get('window'),
+    }
+
+
+def train_models_on_historical_data(days: int = 30, force_refetch: bool = False,
+                                    resolution: str = '1m', opp_samples: int = 200000,
+                                    opp_sampling: str = 'stratified', backend: str = 'gbr',
+                                    n_jobs: int = -1, tuned: bool = False, use_cache: bool = True,
+                                    select_tolerance: Optional[float] = None):
+    """
+    Fetch 30 days of historical data and train ML models.
+
+    Args:
+        days: Number of days of historical data (default 30)
+        force_refetch: If True, refetch data even if cached (default False)
+        resolution: Candle resolution to train on (1m, 5m, 15m, 1h, 1d)
+        opp_samples: Opportunities to train the classifier on (0 = all)
+        opp_sampling: How to pick them: 'stratified', 'time' or 'all'
+        backend: Spread predictor backend ('gbr', 'hist' or 'xgboost')
+        n_jobs: Worker processes training the pair models (-1 = all cores)
+        tuned: Use the parameters saved by model_tuning.py (models/best_params.json)
+        use_cache: Reuse feature matrices from the feature store when the raw
+            data and feature definitions are unchanged
+        select_tolerance: If set, prune each pair model to the features it
+            needs within this relative validation-MSE loss (see
+            feature_selection.py) and log the inference savings
+
+    Data Volume Calculation:
+    - 30 days = 43,200 minutes of data
+    - 3 exchanges × 3 symbols = 9 data streams
+    - Total: ~388,800 data points (43,200 × 9)
+    - With 1-minute OHLCV candles, this gives us rich training data
+
+    Expected file sizes:
+    - Each symbol per exchange: ~1-2 MB CSV
+    - Total: ~27 MB for all data
+    """
+    logger.info("="*70)
+    logger.info("TRAINING ML MODELS ON 30-DAY HISTORICAL DATA")
+    logger.info("="*70)
+
+    # Step 1: Fetch/load historical data
+    logger.info(f"\nStep 1: Fetching {days} days of historical data...")
+    logger.info(f"Expected data volume: ~{days * 1440 * 9:,} records")
+    logger.info(f"Symbols: BTC-USD, ETH-USD, SOL-USD")
+    logger.info(f"Exchanges: Coinbase, Binance, Bitstamp")
+
+    if force_refetch:
+        clear_historical_cache()
+
+    matrices = prepare_training_matrices(days=days, resolution=resolution, use_cache=use_cache)
+
+    if matrices is None:
+        logger.error("Failed to fetch historical data!")
+        return False
+
+    # Step 3: Train Spread Predictors (one per symbol and exchange pair)
     logger.info("\n" + "="*70)
-    logger.info("TRAINING SPREAD PREDICTOR")
+    logger.info("TRAINING SPREAD PREDICTORS")
     logger.info("="*70)
 
-    predictor = SpreadPredictor()
-
-    # Convert spread data to format expected by predictor
-    # The predictor expects data in exchange-price format
-    training_records = []
-    for _, row in training_data.iterrows():
-        for exchange in ['Coinbase', 'Binance', 'Bitstamp']:
-            price_col = f'{exchange}_price'
-            volume_col = f'{exchange}_volume'
-
-            if price_col in training_data.columns and volume_col in training_data.columns:
-                if not pd.isna(row[price_col]):
-                    training_records.append({
-                        'timestamp': row['timestamp'],
-                        'exchange': exchange,
-                        'price': row[price_col],
-                        'volume': row[volume_col],
-                        'bid': row[price_col] * 0.999,  # Approximate
-                        'ask': row[price_col] * 1.001   # Approximate
-                    })
-
-    import pandas as pd
-    predictor_df = pd.DataFrame(training_records)
-
-    if not predictor_df.empty:
-        logger.info(f"Training spread predictor on {len(predictor_df):,} records...")
-        predictor.train(predictor_df)
-
-        if predictor.is_trained:
-            # Save model
-            import joblib
-            model_path = Path("models")
-            model_path.mkdir(exist_ok=True)
-
-            predictor_file = model_path / "spread_predictor.pkl"
-            joblib.dump(predictor, predictor_file)
-            logger.success(f"Spread predictor saved to {predictor_file}")
-
-            # Test prediction
-            if len(predictor_df) > 100:
-                test_sample = predictor_df.tail(50)
-                predictions = predictor.predict(test_sample)
-                logger.info(f"\nSample predictions on recent data:")
-                logger.info(f"  Mean predicted spread: {predictions.mean():.4f}%")
-                logger.info(f"  Prediction range: [{predictions.min():.4f}%, {predictions.max():.4f}%]")
+    predictor = SpreadModelSet(
+        backend=backend, max_workers=None if n_jobs == -1 else n_jobs,
+        model_params=load_best_params(backend) if tuned else None
+    )
+    registry = ModelRegistry()
+    run_info = {'source': 'historical', 'window': matrices['window'],
+                'days': days, 'resolution': resolution, 'backend': backend}
+
+    if predictor.fit_matrices(matrices['spread_sets']):
+        if select_tolerance is not None:
+            logger.info(f"\nPruning features (tolerance {select_tolerance:.1%} validation MSE)...")
+            report = prune_model_set(predictor, matrices['spread_sets'], tolerance=select_tolerance)
+            if report:
+                log_report(report)
+                run_info['feature_selection'] = {
+                    'tolerance': select_tolerance,
+                    'features': {name: len(result['selected']) for name, result in report['selection'].items()},
+                }
+
+        # Register model
+        version = registry.register(SPREAD_MODELS, predictor, {
+            **run_info,
+            'data_hash': hash_arrays(*(array for symbol in sorted(matrices['spread_sets'])
+                                       for array in matrices['spread_sets'][symbol][:2])),
+        })
+        logger.success(f"Spread models registered as {SPREAD_MODELS} {version}")
+
+        # Test prediction
+        logger.info(f"\nSample predictions on recent data:")
+        for (symbol, ex1, ex2), model in sorted(predictor.models.items()):
+            X, _, feature_names, _ = matrices['spread_sets'][symbol]
+            columns = [feature_names.index(name) for name in model.feature_names]
+            predictions = model.model.predict(model.scaler.transform(X[-100:][:, columns]))
+            logger.info(
+                f"  {symbol} {ex1}->{ex2}: mean {predictions.mean():.4f}% "
+                f"[{predictions.min():.4f}%, {predictions.max():.4f}%] | "
+                f"test R² {model.train_metrics.get('test_r2', float('nan')):.3f}"
+            )
 
     # Step 4: Train Opportunity Classifier
     logger.info("\n" + "="*70)
     logger.info("TRAINING OPPORTUNITY CLASSIFIER")
     logger.info("="*70)
 
-    classifier = OpportunityClassifier()
+    classifier = OpportunityScorer(model_params=load_best_params('scorer') if tuned else None)
 
-    # Create synthetic opportunities from spread data
-    opportunities = []
-    for _, row in training_data.iterrows():
-        for col in spread_cols:
-            spread_pct = row[col]
-            if pd.notna(spread_pct):
-                # Extract exchanges from column name (e.g., "spread_Coinbase_Binance")
-                parts = col.replace("spread_", "").split("_")
-                if len(parts) >= 2:
-                    # Simulate fees (Coinbase 0.6%, Binance 0.1%, Bitstamp 0.5%)
-                    fees = {'Coinbase': 0.6, 'Binance': 0.1, 'Bitstamp': 0.5}
-                    total_fee = fees.get(parts[0], 0.5) + fees.get(parts[1], 0.5)
-                    profit_after_fees = abs(spread_pct) - total_fee
-
-                    opportunities.append({
-                        'buy_exchange': parts[0] if spread_pct > 0 else parts[1],
-                        'sell_exchange': parts[1] if spread_pct > 0 else parts[0],
-                        'symbol': row.get('symbol', 'BTC-USD'),
-                        'spread_pct': abs(spread_pct),
-                        'profit_after_fees': profit_after_fees,
-                        'is_profitable': profit_after_fees > 0.5
-                    })
-
-    if opportunities:
-        from config import ArbitrageOpportunity
-        import datetime
-
-        opp_objects = [
-            ArbitrageOpportunity(
-                buy_exchange=o['buy_exchange'],
-                sell_exchange=o['sell_exchange'],
-                symbol=o['symbol'],
-                buy_price=100.0,  # Dummy value
-                sell_price=100.0 + o['spread_pct'],
-                spread_pct=o['spread_pct'],
-                profit_after_fees=o['profit_after_fees'],
-                timestamp=datetime.datetime.now(datetime.timezone.utc)
-            )
-            for o in opportunities[:10000]  # Limit to 10k for training
-        ]
+    # Synthetic opportunities for every row × pair of the full history
+    X_opps, y_opps = matrices['X_opps'], matrices['y_opps']
+
+    if len(X_opps):
+        sample_idx = sample_opportunities(y_opps, opp_samples, opp_sampling)
 
-        logger.info(f"Training opportunity classifier on {len(opp_objects):,} opportunities...")
-        classifier.train(opp_objects)
+        logger.info(
+            f"Training opportunity classifier on {len(sample_idx):,} of "
+            f"{len(X_opps):,} opportunities ({opp_sampling} sampling)..."
+        )
+        classifier.train_matrix(X_opps[sample_idx], y_opps[sample_idx])
 
         if classifier.is_trained:
-            # Save model
-            classifier_file = model_path / "opportunity_classifier.pkl"
-            joblib.dump(classifier, classifier_file)
-            logger.success(f"Opportunity classifier saved to {classifier_file}")
+            # Register model
+            version = registry.register(OPPORTUNITY_SCORER, classifier, {
+                **run_info,
+                'data_hash': hash_arrays(X_opps, y_opps),
+                'n_samples': len(sample_idx),
+                'sampling': opp_sampling,
+            })
+            logger.success(f"Opportunity classifier registered as {OPPORTUNITY_SCORER} {version}")
 
             # Show training results
-            profitable = sum(1 for o in opportunities if o['is_profitable'])
+            profitable = int(y_opps.sum())
             logger.info(f"\nTraining data statistics:")
-            logger.info(f"  Total opportunities: {len(opportunities):,}")
-            logger.info(f"  Profitable (>0.5% after fees): {profitable:,} ({profitable/len(opportunities)*100:.1f}%)")
+            logger.info(f"  Total opportunities: {len(y_opps):,}")
+            logger.info(f"  Profitable (>0.5% after fees): {profitable:,} ({profitable/len(y_opps)*100:.1f}%)")
 
     # Step 5: Summary
     logger.info("\n" + "="*70)
     logger.info("TRAINING COMPLETE!")
     logger.info("="*70)
-    logger.info(f"✓ Fetched {len(training_data):,} historical records")
-    logger.info(f"✓ Trained spread predictor: {'Yes' if predictor.is_trained else 'No'}")
+    logger.info(f"✓ Fetched {matrices['n_records']:,} historical records")
+    logger.info(f"✓ Trained spread predictors: {len(predictor.models)}")
     logger.info(f"✓ Trained opportunity classifier: {'Yes' if classifier.is_trained else 'No'}")
-    logger.info(f"✓ Models saved to: models/")
+    logger.info(f"✓ Models registered in: {registry.root}/")
     logger.info("\nYou can now run the main system with pre-trained models:")
     logger.info("  python main.py")
     logger.info("\nThe dashboard will load these models automatically!")
@@ -202,20 +404,167 @@ def train_models_on_historical_data(days: int = 30, force_refetch: bool = False)
     return True
 
 
+def run_backend_benchmark(days: int = 30, resolution: str = '1m', n_jobs: int = -1):
+    """
+    Report fit time and R² of every SpreadPredictor backend on the same data.
+
+    Fit times are summed and R² averaged over the per-symbol pair models.
+    """
+    matrices = prepare_training_matrices(days=days, resolution=resolution)
+    if matrices is None:
+        logger.error("Failed to fetch historical data!")
+        return False
+
+    # One training set per symbol, as the served SpreadModelSet is trained
+    results = benchmark_backends(matrices['spread_sets'], n_jobs=n_jobs)
+    if not results:
+        logger.error("No backend trained successfully")
+        return False
+
+    logger.info("\n" + "="*70)
+    logger.info(
+        f"BACKEND BENCHMARK ({results[0]['n_models']} pair models, "
+        f"{results[0]['n_rows']:,} rows, {days} days)"
+    )
+    logger.info("="*70)
+    logger.info(f"{'Backend':<10} {'Fit (s)':>10} {'Train R²':>10} {'Test R²':>10}")
+    for r in results:
+        logger.info(
+            f"{r['backend']:<10} {r['fit_seconds']:>10.2f} {r['train_r2']:>10.3f} {r['test_r2']:>10.3f}"
+        )
+    logger.info("="*70)
+    return True
+
+
+def train_models_streaming(days: int = 30, force_refetch: bool = False, resolution: str = '1m',
+                           chunk_days: int = 7, n_jobs: int = -1, opp_samples: int = 200000,
+                           opp_sampling: str = 'stratified'):
+    """
+    Out-of-core variant of train_models_on_historical_data.
+
+    Spread features are partitioned by day on disk and read back chunk_days at
+    a time. Every (symbol, pair) spread model trains through XGBoost external
+    memory into the same SpreadModelSet main.py serves; the opportunity
+    classifier draws an equal share of opp_samples from each chunk.
+
+    Training memory is bounded by the chunk size. Writing the partitions is
+    not: prepare_partitioned_training_data still loads one symbol's full
+    candle history at a time, so that step grows with days.
+    """
+    symbols = ['BTC-USD', 'ETH-USD', 'SOL-USD']
+
+    logger.info("="*70)
+    logger.info(f"STREAMING TRAINING ON {days}-DAY HISTORICAL DATA")
+    logger.info("="*70)
+
+    if force_refetch:
+        clear_historical_cache()
+
+    fetcher = prepare_partitioned_training_data(days=days, symbols=symbols, resolution=resolution)
+    n_chunks = fetcher.partition_chunk_count(symbols, chunk_days)
+    if n_chunks == 0:
+        logger.error("Failed to fetch historical data!")
+        return False
+    logger.info(f"Streaming {n_chunks} chunks of {chunk_days} day(s)")
+
+    registry = ModelRegistry()
+    run_info = {'source': 'historical_streaming', 'days': days, 'resolution': resolution,
+                'chunk_days': chunk_days, 'backend': 'xgboost'}
+
+    # Spread predictors (one per symbol and exchange pair)
+    predictor = SpreadModelSet(backend='xgboost')
+    symbol_chunks = {
+        symbol: (spreads_to_long(chunk) for chunk in fetcher.iter_partitions([symbol], chunk_days))
+        for symbol in symbols
+    }
+    if predictor.train_streaming(symbol_chunks, n_jobs=n_jobs):
+        version = registry.register(SPREAD_MODELS, predictor, run_info)
+        logger.success(f"Spread models registered as {SPREAD_MODELS} {version}")
+
+    # Opportunity classifier on a per-chunk sample
+    classifier = OpportunityScorer()
+    per_chunk = opp_samples // n_chunks if opp_samples > 0 else 0
+    X_parts, y_parts = [], []
+    for chunk in fetcher.iter_partitions(symbols, chunk_days):
+        spread_cols = [col for col in chunk.columns if col.startswith('spread_')]
+        X_chunk, y_chunk = build_opportunity_matrix(chunk, spread_cols)
+        if len(X_chunk):
+            idx = sample_opportunities(y_chunk, per_chunk, opp_sampling)
+            X_parts.append(X_chunk[idx])
+            y_parts.append(y_chunk[idx])
+
+    if X_parts:
+        X_opps, y_opps = np.vstack(X_parts), np.concatenate(y_parts)
+        logger.info(f"Training opportunity classifier on {len(X_opps):,} opportunities...")
+        if classifier.train_matrix(X_opps, y_opps):
+            version = registry.register(OPPORTUNITY_SCORER, classifier, {
+                **run_info,
+                'data_hash': hash_arrays(X_opps, y_opps),
+                'sampling': opp_sampling,
+            })
+            logger.success(f"Opportunity classifier registered as {OPPORTUNITY_SCORER} {version}")
+
+    logger.info("="*70)
+    logger.info(f"✓ Trained spread predictors: {len(predictor.models)}")
+    logger.info(f"✓ Trained opportunity classifier: {'Yes' if classifier.is_trained else 'No'}")
+    logger.info("="*70)
+
+    return predictor.is_trained or classifier.is_trained
+
+
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Train ML models on historical crypto data")
     parser.add_argument('--days', type=int, default=30, help='Number of days of historical data (default: 30)')
     parser.add_argument('--force', action='store_true', help='Force refetch data even if cached')
+    parser.add_argument('--resolution', default='1m', choices=RESOLUTION_ORDER,
+                        help='Candle resolution to train on (default: 1m)')
+    parser.add_argument('--opp-samples', type=int, default=200000,
+                        help='Opportunities to train the classifier on, 0 = all (default: 200000)')
+    parser.add_argument('--opp-sampling', default='stratified', choices=['stratified', 'time', 'all'],
+                        help='How to sample opportunities from the full history (default: stratified)')
+    parser.add_argument('--backend', default='gbr', choices=SPREAD_BACKENDS,
+                        help='Spread predictor model backend (default: gbr)')
+    parser.add_argument('--n-jobs', type=int, default=-1,
+                        help='Pair-model training processes, or backend threads with --streaming/--benchmark '
+                             '(default: all cores)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Recompute feature matrices instead of using the feature store')
+    parser.add_argument('--tuned', action='store_true',
+                        help='Use hyperparameters saved by model_tuning.py')
+    parser.add_argument('--select-features', type=float, default=None, metavar='TOLERANCE',
+                        help='Prune spread model features within this relative validation-MSE loss, '
+                             'e.g. 0.01, and report the inference savings')
+    parser.add_argument('--benchmark', action='store_true',
+                        help='Compare fit time and R² of all spread predictor backends, then exit')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Train out-of-core from daily partitions (training memory bounded by --chunk-days)')
+    parser.add_argument('--chunk-days', type=int, default=7,
+                        help='Days of partitions per streaming chunk (default: 7)')
 
     args = parser.parse_args()
 
     logger.info(f"Starting historical data training...")
     logger.info(f"Days: {args.days}")
     logger.info(f"Force refetch: {args.force}")
-
-    success = train_models_on_historical_data(days=args.days, force_refetch=args.force)
+    logger.info(f"Resolution: {args.resolution}")
+
+    if args.benchmark:
+        success = run_backend_benchmark(days=args.days, resolution=args.resolution, n_jobs=args.n_jobs)
+    elif args.streaming:
+        success = train_models_streaming(
+            days=args.days, force_refetch=args.force, resolution=args.resolution,
+            chunk_days=args.chunk_days, n_jobs=args.n_jobs,
+            opp_samples=args.opp_samples, opp_sampling=args.opp_sampling
+        )
+    else:
+        success = train_models_on_historical_data(
+            days=args.days, force_refetch=args.force, resolution=args.resolution,
+            opp_samples=args.opp_samples, opp_sampling=args.opp_sampling,
+            backend=args.backend, n_jobs=args.n_jobs, tuned=args.tuned,
+            use_cache=not args.no_cache, select_tolerance=args.select_features
+        )
 
     if success:
         logger.success("\n🎉 SUCCESS! Models trained and ready to use!")
@@ -4,13 +4,15 @@ import signal
 import sys
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
+import numpy as np
 import pandas as pd
-import joblib
 from loguru import logger
 
 from data_ingestion import MultiExchangeAggregator
 from arbitrage_detector import ArbitrageDetector
-from ml_predictor import SpreadPredictor, OpportunityScorer
+from ml_predictor import SpreadModelSet, OpportunityScorer
+from labeling import persistence_labels, label_column, DEFAULT_LATENCIES
+from model_registry import ModelRegistry, SPREAD_MODELS, OPPORTUNITY_SCORER, hash_arrays
 from config import ArbitrageOpportunity
 
 
@@ -20,16 +22,28 @@ class LiveDataCapture:
     def __init__(self, capture_hours: int = 2):
         self.capture_hours = capture_hours
         self.detector = ArbitrageDetector()
-        self.aggregator = MultiExchangeAggregator(self.detector.update_price)
+        self.aggregator = MultiExchangeAggregator(self.on_price_update)
 
         self.start_time = None
         self.end_time = None
         self.running = True
 
         # Lightweight data storage
-        self.price_records = []  # Store raw prices
+        self.price_records = []  # Raw quote stream (receipt time, symbol, exchange, price, bid, ask)
         self.opportunities = []  # Store opportunities
 
+    def on_price_update(self, price_data):
+        """Record the tick for labeling, then hand it to the detector."""
+        # Receipt time: the clock opportunities are timestamped on
+        self.price_records.append((datetime.now(timezone.utc), price_data.symbol, price_data.exchange,
+                                   price_data.price, price_data.bid, price_data.ask))
+        self.detector.update_price(price_data)
+
+    def quotes_frame(self) -> pd.DataFrame:
+        """Recorded quote stream as a DataFrame (see labeling.QuoteStream)."""
+        return pd.DataFrame(self.price_records,
+                            columns=['timestamp', 'symbol', 'exchange', 'price', 'bid', 'ask'])
+
     async def capture_data(self):
         """Capture live data for specified hours."""
         self.start_time = datetime.now(timezone.utc)
@@ -66,15 +80,15 @@ class LiveDataCapture:
                     remaining = (self.end_time - now).total_seconds() / 3600
 
                     # Get current stats
-                    price_count = len(self.detector.price_buffer.get('BTC-USD', [])) + \
-                                  len(self.detector.price_buffer.get('ETH-USD', [])) + \
-                                  len(self.detector.price_buffer.get('SOL-USD', []))
+                    bar_count = len(self.detector.bar_buffer.get('BTC-USD', [])) + \
+                                  len(self.detector.bar_buffer.get('ETH-USD', [])) + \
+                                  len(self.detector.bar_buffer.get('SOL-USD', []))
                     opp_count = len(self.detector.opportunities)
 
                     logger.info(f"\n📊 Progress Update:")
                     logger.info(f"  Elapsed: {elapsed:.1f}h / {self.capture_hours}h ({elapsed/self.capture_hours*100:.1f}%)")
                     logger.info(f"  Remaining: {remaining:.1f}h")
-                    logger.info(f"  Price updates: {price_count:,}")
+                    logger.info(f"  Buffered bars: {bar_count:,}")
                     logger.info(f"  Opportunities: {opp_count:,}")
                     logger.info(f"  Avg opportunities/hour: {opp_count/elapsed:.1f}")
 
@@ -99,17 +113,23 @@ class LiveDataCapture:
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-        # Save price data
+        # Save price bars
         all_prices = []
         for symbol in ['BTC-USD', 'ETH-USD', 'SOL-USD']:
-            if symbol in self.detector.price_buffer:
-                all_prices.extend(self.detector.price_buffer[symbol])
+            if symbol in self.detector.bar_buffer:
+                all_prices.extend(dict(bar, symbol=symbol) for bar in self.detector.bar_buffer[symbol])
 
         if all_prices:
             df_prices = pd.DataFrame(all_prices)
             price_file = data_dir / f"prices_{timestamp}.csv"
             df_prices.to_csv(price_file, index=False)
-            logger.success(f"✓ Saved {len(all_prices):,} price records to {price_file}")
+            logger.success(f"✓ Saved {len(all_prices):,} price bars to {price_file}")
+
+        # Save raw quotes (needed to relabel opportunities offline)
+        if self.price_records:
+            quote_file = data_dir / f"quotes_{timestamp}.csv"
+            self.quotes_frame().to_csv(quote_file, index=False)
+            logger.success(f"✓ Saved {len(self.price_records):,} quotes to {quote_file}")
 
         # Save opportunities
         if self.detector.opportunities:
@@ -128,30 +148,37 @@ class LiveDataCapture:
         logger.info("🤖 TRAINING ML MODELS")
         logger.info("="*70)
 
-        # Get training data
-        all_prices = []
-        for symbol in ['BTC-USD', 'ETH-USD', 'SOL-USD']:
-            if symbol in self.detector.price_buffer:
-                all_prices.extend(self.detector.price_buffer[symbol])
+        # Get training data, one frame per symbol
+        frames = {
+            symbol: pd.DataFrame(list(self.detector.bar_buffer[symbol]))
+            for symbol in ['BTC-USD', 'ETH-USD', 'SOL-USD']
+            if self.detector.bar_buffer.get(symbol)
+        }
 
-        if not all_prices:
+        if not frames:
             logger.error("❌ No data captured for training!")
             return False
 
-        # Train Spread Predictor
-        logger.info(f"\n1️⃣ Training Spread Predictor on {len(all_prices):,} records...")
-        predictor = SpreadPredictor()
+        # Live-capture models are registered as candidates; promote one with
+        # `python model_registry.py promote <name> <version>` to serve it
+        registry = ModelRegistry()
+        start = min(df['timestamp'].min() for df in frames.values())
+        end = max(df['timestamp'].max() for df in frames.values())
+        run_info = {'source': 'live_capture', 'window': {'start': str(start), 'end': str(end)}}
 
-        df_prices = pd.DataFrame(all_prices)
-        predictor.train(df_prices)
+        # Train Spread Predictors (one per symbol and exchange pair)
+        total = sum(len(df) for df in frames.values())
+        logger.info(f"\n1️⃣ Training Spread Predictors on {total:,} records...")
+        predictor = SpreadModelSet()
+        predictor.train(frames)
 
         if predictor.is_trained:
-            model_dir = Path("models")
-            model_dir.mkdir(exist_ok=True)
-
-            predictor_file = model_dir / "spread_predictor_live.pkl"
-            joblib.dump(predictor, predictor_file)
-            logger.success(f"✓ Spread predictor saved to {predictor_file}")
+            version = registry.register(SPREAD_MODELS, predictor, {
+                **run_info,
+                'data_hash': hash_arrays(*(frames[symbol].select_dtypes('number').to_numpy()
+                                           for symbol in sorted(frames))),
+            }, good=False)
+            logger.success(f"✓ Spread models registered as {SPREAD_MODELS} {version}")
         else:
             logger.warning("⚠️ Spread predictor training incomplete")
 
@@ -160,15 +187,22 @@ class LiveDataCapture:
             logger.info(f"\n2️⃣ Training Opportunity Scorer on {len(self.detector.opportunities):,} opportunities...")
             scorer = OpportunityScorer()
 
-            # Create labels: True if profit > threshold
-            labels = [opp.profit_after_fees > 0.5 for opp in self.detector.opportunities]
+            # Label: still executable 500ms after detection, on the recorded quotes
+            persistence = persistence_labels(self.detector.opportunities, self.quotes_frame())
+            for latency in DEFAULT_LATENCIES:
+                logger.info(f"  Persisting after {latency * 1000:.0f}ms: "
+                            f"{persistence[label_column(latency)].mean():.1%}")
+            labels = persistence[label_column(0.5)].tolist()
 
             scorer.train(self.detector.opportunities, labels)
 
             if scorer.is_trained:
-                scorer_file = model_dir / "opportunity_scorer_live.pkl"
-                joblib.dump(scorer, scorer_file)
-                logger.success(f"✓ Opportunity scorer saved to {scorer_file}")
+                X = scorer.prepare_batch(self.detector.opportunities)
+                version = registry.register(OPPORTUNITY_SCORER, scorer, {
+                    **run_info,
+                    'data_hash': hash_arrays(X, np.array(labels)),
+                }, good=False)
+                logger.success(f"✓ Opportunity scorer registered as {OPPORTUNITY_SCORER} {version}")
             else:
                 logger.warning("⚠️ Opportunity scorer training incomplete")
         else:
@@ -183,8 +217,8 @@ class LiveDataCapture:
         logger.info("📈 CAPTURE SUMMARY")
         logger.info("="*70)
 
-        # Calculate total prices
-        total_prices = sum(len(self.detector.price_buffer.get(symbol, []))
+        # Buffered bars
+        total_prices = sum(len(self.detector.bar_buffer.get(symbol, []))
                           for symbol in ['BTC-USD', 'ETH-USD', 'SOL-USD'])
 
         # Calculate duration
@@ -194,7 +228,7 @@ class LiveDataCapture:
             duration = 0
 
         logger.info(f"Duration: {duration:.2f} hours")
-        logger.info(f"Price updates: {total_prices:,}")
+        logger.info(f"Buffered bars: {total_prices:,}")
         logger.info(f"Opportunities detected: {len(self.detector.opportunities):,}")
 
         if self.detector.opportunities:
@@ -0,0 +1,308 @@
+"""Flat-array export and pure-NumPy evaluation of trained tree ensembles."""
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import xgboost as xgb
+from sklearn.ensemble import (
+    GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestClassifier
+)
+from sklearn.preprocessing import StandardScaler
+
+
+# Arrays making up a flattened ensemble; node indices are global across trees
+NODE_ARRAYS = ('feature', 'threshold', 'left', 'missing_left', 'value', 'roots')
+
+
+class FlatScaler:
+    """StandardScaler transform from its mean_ and scale_ arrays alone."""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class TreeEnsemble:
+    """
+    A tree ensemble as flat node arrays.
+
+    Nodes are numbered breadth-first so the right child of a split is always
+    left + 1, and a row moves to left + (x > threshold) (NaN follows
+    missing_left). Leaves have an infinite threshold and point at themselves,
+    so all trees are walked together for a fixed number of vectorized steps,
+    and the prediction is base + sum of the reached leaf values.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], base: float, depth: int,
+                 float32_inputs: bool, classifier: bool):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.missing_left = arrays['missing_left']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.base = base
+        self.depth = depth
+        self.float32_inputs = float32_inputs
+        self.classifier = classifier
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def _raw_predict(self, X) -> np.ndarray:
+        # Models that split on float32 inputs see the same rounded values here
+        X = np.asarray(X, dtype=np.float32 if self.float32_inputs else np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        # Row offsets into the flattened X, one column per tree
+        flat = X.ravel()
+        offsets = (np.arange(len(X)) * X.shape[1])[:, None]
+        idx = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        has_nan = np.isnan(flat).any()
+
+        for _ in range(self.depth):
+            x = flat[offsets + self.feature[idx]]
+            threshold = self.threshold[idx]
+            if has_nan:
+                go_right = ~((x <= threshold) | (np.isnan(x) & self.missing_left[idx]))
+            else:
+                go_right = x > threshold
+            idx = self.left[idx] + go_right
+
+        return self.base + self.value[idx].sum(axis=1)
+
+    def predict(self, X) -> np.ndarray:
+        """Regression output, or the positive-class label for a classifier."""
+        raw = self._raw_predict(X)
+        return raw > 0.5 if self.classifier else raw
+
+    def predict_proba(self, X) -> np.ndarray:
+        """(n, 2) class probabilities of a binary classifier."""
+        proba = self._raw_predict(X)
+        return np.column_stack([1 - proba, proba])
+
+
+def _sklearn_tree(estimator, value: np.ndarray) -> Dict[str, np.ndarray]:
+    tree = estimator.tree_
+    missing_left = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8))
+    return {
+        'feature': tree.feature,
+        'threshold': tree.threshold,
+        'left': tree.children_left,
+        'right': tree.children_right,
+        'missing_left': missing_left,
+        'value': value,
+        'is_leaf': tree.children_left == -1,
+    }
+
+
+def _hist_tree(predictor) -> Dict[str, np.ndarray]:
+    nodes = predictor.nodes
+    if nodes['is_categorical'].any():
+        raise ValueError("Categorical splits are not supported")
+    return {
+        'feature': nodes['feature_idx'],
+        'threshold': nodes['num_threshold'],
+        'left': nodes['left'],
+        'right': nodes['right'],
+        'missing_left': nodes['missing_go_to_left'],
+        'value': nodes['value'],
+        'is_leaf': nodes['is_leaf'].astype(bool),
+    }
+
+
+def _xgb_tree(tree_json: str, feature_index: Dict[str, int]) -> Dict[str, np.ndarray]:
+    nodes = {}
+    stack = [json.loads(tree_json)]
+    while stack:
+        node = stack.pop()
+        nodes[node['nodeid']] = node
+        stack.extend(node.get('children', []))
+
+    n_nodes = max(nodes) + 1
+    tree = {
+        'feature': np.zeros(n_nodes, dtype=np.int64),
+        'threshold': np.zeros(n_nodes),
+        'left': np.arange(n_nodes),
+        'right': np.arange(n_nodes),
+        'missing_left': np.zeros(n_nodes, dtype=bool),
+        'value': np.zeros(n_nodes),
+        'is_leaf': np.ones(n_nodes, dtype=bool),
+    }
+    for node_id, node in nodes.items():
+        if 'leaf' in node:
+            tree['value'][node_id] = np.float32(node['leaf'])
+            continue
+        tree['is_leaf'][node_id] = False
+        tree['feature'][node_id] = feature_index[node['split']]
+        # XGBoost goes left when x < split on float32 inputs, which for float32
+        # values is x <= the next float32 below split
+        tree['threshold'][node_id] = np.nextafter(
+            np.float32(node['split_condition']), np.float32(-np.inf)
+        )
+        tree['left'][node_id] = node['yes']
+        tree['right'][node_id] = node['no']
+        tree['missing_left'][node_id] = node['missing'] == node['yes']
+    return tree
+
+
+def _xgb_base_score(booster: xgb.Booster) -> float:
+    config = json.loads(booster.save_config())
+    base_score = config['learner']['learner_model_param']['base_score']
+    return float(str(base_score).strip('[]'))
+
+
+def _flatten(trees: List[Dict[str, np.ndarray]], base: float, float32_inputs: bool,
+             classifier: bool) -> TreeEnsemble:
+    """Renumber each tree breadth-first and concatenate them with global indices."""
+    parts = {name: [] for name in NODE_ARRAYS}
+    offset, depth = 0, 0
+
+    for tree in trees:
+        # Breadth-first order from the root; siblings get consecutive numbers
+        order, node_depth = [0], [0]
+        position = 0
+        while position < len(order):
+            node = order[position]
+            if not tree['is_leaf'][node]:
+                order.extend((int(tree['left'][node]), int(tree['right'][node])))
+                node_depth.extend((node_depth[position] + 1,) * 2)
+            position += 1
+
+        order = np.array(order)
+        new_id = np.empty(len(tree['feature']), dtype=np.int64)
+        new_id[order] = np.arange(len(order))
+        is_leaf = tree['is_leaf'][order]
+
+        parts['feature'].append(np.where(is_leaf, 0, tree['feature'][order]))
+        parts['threshold'].append(np.where(is_leaf, np.inf, tree['threshold'][order]))
+        parts['left'].append(np.where(is_leaf, np.arange(len(order)), new_id[tree['left'][order]]) + offset)
+        parts['missing_left'].append(is_leaf | tree['missing_left'][order].astype(bool))
+        parts['value'].append(np.where(is_leaf, tree['value'][order], 0.0))
+        parts['roots'].append([offset])
+
+        # Longest root-to-leaf path = steps needed for every row to settle
+        depth = max(depth, max(node_depth))
+        offset += len(order)
+
+    dtypes = {'feature': np.int32, 'threshold': np.float64, 'left': np.int32,
+              'missing_left': bool, 'value': np.float64, 'roots': np.int32}
+    arrays = {name: np.concatenate(parts[name]).astype(dtypes[name]) for name in NODE_ARRAYS}
+    return TreeEnsemble(arrays, base, depth, float32_inputs, classifier)
+
+
+def compile_ensemble(model) -> TreeEnsemble:
+    """
+    Flatten a trained model into a TreeEnsemble with identical predictions.
+
+    Supports GradientBoostingRegressor, HistGradientBoostingRegressor,
+    XGBRegressor, a BoosterRegressor (any object with a .booster) and binary
+    RandomForestClassifier (as positive-class probability). An already
+    compiled TreeEnsemble is returned as is, so models loaded with
+    load_model can be exported again.
+    """
+    if isinstance(model, TreeEnsemble):
+        return model
+
+    if isinstance(model, GradientBoostingRegressor):
+        n_features = model.n_features_in_
+        base = 0.0 if model.init_ == 'zero' else float(model.init_.predict(np.zeros((1, n_features)))[0])
+        trees = [
+            _sklearn_tree(est, est.tree_.value[:, 0, 0] * model.learning_rate)
+            for est in model.estimators_[:, 0]
+        ]
+        return _flatten(trees, base, float32_inputs=True, classifier=False)
+
+    if isinstance(model, HistGradientBoostingRegressor):
+        trees = [_hist_tree(predictors[0]) for predictors in model._predictors]
+        return _flatten(trees, float(np.ravel(model._baseline_prediction)[0]),
+                        float32_inputs=False, classifier=False)
+
+    if isinstance(model, RandomForestClassifier):
+        if len(model.classes_) != 2:
+            raise ValueError("Only binary classifiers can be compiled")
+        trees = []
+        for est in model.estimators_:
+            counts = est.tree_.value[:, 0, :]
+            trees.append(_sklearn_tree(est, counts[:, 1] / counts.sum(axis=1) / len(model.estimators_)))
+        return _flatten(trees, 0.0, float32_inputs=True, classifier=True)
+
+    if isinstance(model, xgb.XGBRegressor) or hasattr(model, 'booster'):
+        booster = model.get_booster() if isinstance(model, xgb.XGBRegressor) else model.booster
+        dump = booster.get_dump(dump_format='json')
+        if isinstance(model, xgb.XGBRegressor):
+            try:
+                dump = dump[:model.best_iteration + 1]  # predict() stops at the best round
+            except AttributeError:
+                pass
+        names = booster.feature_names or [f"f{i}" for i in range(booster.num_features())]
+        feature_index = {name: i for i, name in enumerate(names)}
+        trees = [_xgb_tree(tree_json, feature_index) for tree_json in dump]
+        return _flatten(trees, _xgb_base_score(booster), float32_inputs=True, classifier=False)
+
+    raise TypeError(f"Cannot compile {type(model).__name__}")
+
+
+def export_model(path, model, scaler: Optional[StandardScaler] = None, meta: Optional[Dict] = None):
+    """
+    Write a compiled model (and its scaler) as uncompressed .npy files plus meta.json.
+
+    Args:
+        path: Output directory
+        model: Any model compile_ensemble supports
+        scaler: Fitted StandardScaler applied before the model
+        meta: Extra JSON-serializable metadata (feature names, target pair, ...)
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    ensemble = compile_ensemble(model)
+    for name in NODE_ARRAYS:
+        np.save(path / f"{name}.npy", getattr(ensemble, name))
+    if scaler is not None:
+        np.save(path / "scaler_mean.npy", scaler.mean_)
+        np.save(path / "scaler_scale.npy", scaler.scale_)
+
+    (path / "meta.json").write_text(json.dumps({
+        **(meta or {}),
+        'base': ensemble.base,
+        'depth': ensemble.depth,
+        'float32_inputs': ensemble.float32_inputs,
+        'classifier': ensemble.classifier,
+        'n_trees': ensemble.n_trees,
+        'source': type(model).__name__,
+        'has_scaler': scaler is not None,
+    }, default=str))
+
+
+def load_model(path, mmap: bool = True):
+    """
+    Load an exported model.
+
+    Args:
+        path: Directory written by export_model
+        mmap: Memory-map the arrays instead of reading them into memory
+
+    Returns:
+        (TreeEnsemble, FlatScaler or None, meta dict)
+    """
+    path = Path(path)
+    meta = json.loads((path / "meta.json").read_text())
+    mode = 'r' if mmap else None
+
+    def load(name):
+        # Plain ndarray views keep indexing fast while the data stays mapped
+        return np.asarray(np.load(path / f"{name}.npy", mmap_mode=mode))
+
+    ensemble = TreeEnsemble(
+        {name: load(name) for name in NODE_ARRAYS},
+        meta['base'], meta['depth'], meta['float32_inputs'], meta['classifier']
+    )
+    scaler = FlatScaler(load("scaler_mean"), load("scaler_scale")) if meta['has_scaler'] else None
+    return ensemble, scaler, meta